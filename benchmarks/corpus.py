@@ -0,0 +1,224 @@
+# Arquivo: benchmarks/corpus.py
+"""
+Deterministic benchmark corpus: the saved pages under fixtures/pages plus generated
+ones (EMV payloads with valid CRC, checksummed wallets, analytics tags, contacts and
+minified-JS filler), and a large synthetic bets whitelist.
+
+Everything is derived from a fixed seed, so two runs (and the stored baseline) see
+byte-identical inputs.
+"""
+import glob
+import hashlib
+import json
+import os
+import random
+from binascii import crc_hqx
+from typing import Any, Dict, List
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+PAGES_DIR = os.path.join(FIXTURES_DIR, "pages")
+
+SEED = 20260101
+
+_B58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+
+_FIRST_NAMES = ["JOAO", "MARIA", "CARLOS", "ANA", "PEDRO", "LUCAS", "JULIANA", "FERNANDA", "RAFAEL", "BRUNA"]
+_LAST_NAMES = ["SILVA", "SANTOS", "OLIVEIRA", "SOUZA", "LIMA", "PEREIRA", "COSTA", "ALVES", "RIBEIRO", "GOMES"]
+_CITIES = ["SAO PAULO", "RIO DE JANEIRO", "BELO HORIZONTE", "CURITIBA", "RECIFE", "SALVADOR", "FORTALEZA"]
+_TLDS = ["com", "net", "bet", "io", "xyz", "bet.br", "com.br"]
+
+
+# --- EMV (PIX copia-e-cola) ---
+
+def _tlv(tag: str, value: str) -> str:
+    return f"{tag}{len(value):02d}{value}"
+
+
+def emv_payload(key: str, name: str, city: str, amount: str = None, txid: str = "***") -> str:
+    """Static PIX payload (BR Code) with a valid CRC16."""
+    account = _tlv("00", "BR.GOV.BCB.PIX") + _tlv("01", key)
+    body = (
+        _tlv("00", "01")
+        + _tlv("26", account)
+        + _tlv("52", "0000")
+        + _tlv("53", "986")
+        + (_tlv("54", amount) if amount else "")
+        + _tlv("58", "BR")
+        + _tlv("59", name[:25])
+        + _tlv("60", city[:15])
+        + _tlv("62", _tlv("05", txid))
+        + "6304"
+    )
+    return body + f"{crc_hqx(body.encode('utf-8'), 0xFFFF):04X}"
+
+
+def emv_payloads(count: int, seed: int = SEED) -> List[str]:
+    rng = random.Random(seed)
+    payloads = []
+    for i in range(count):
+        kind = i % 3
+        if kind == 0:
+            key = f"{rng.randrange(10**13, 10**14):014d}"  # CNPJ
+        elif kind == 1:
+            key = f"financeiro{i}@pagamentos-{rng.randrange(1000)}.com"
+        else:
+            key = str(_uuid(rng))
+        name = f"{rng.choice(_FIRST_NAMES)} {rng.choice(_LAST_NAMES)}"
+        amount = f"{rng.randrange(10, 5000)}.{rng.randrange(100):02d}" if i % 2 else None
+        txid = f"DEP{rng.randrange(10**8):08d}"
+        payloads.append(emv_payload(key, name, rng.choice(_CITIES), amount, txid))
+    return payloads
+
+
+def _uuid(rng: random.Random) -> str:
+    h = f"{rng.getrandbits(128):032x}"
+    return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+
+
+# --- Wallets (valid checksums, so they survive validation) ---
+
+def _b58check(version: int, body: bytes) -> str:
+    raw = bytes([version]) + body
+    raw += hashlib.sha256(hashlib.sha256(raw).digest()).digest()[:4]
+    n = int.from_bytes(raw, "big")
+    out = ""
+    while n:
+        n, r = divmod(n, 58)
+        out = _B58_ALPHABET[r] + out
+    return "1" * (len(raw) - len(raw.lstrip(b"\0"))) + out
+
+
+def wallets(count: int, seed: int = SEED) -> List[Dict[str, str]]:
+    rng = random.Random(seed + 1)
+    found = []
+    for i in range(count):
+        body = rng.getrandbits(160).to_bytes(20, "big")
+        kind = i % 3
+        if kind == 0:
+            found.append({"address": _b58check(0x00, body), "coin": "BTC (Legacy)"})
+        elif kind == 1:
+            found.append({"address": "0x" + body.hex(), "coin": "ETH/EVM"})
+        else:
+            found.append({"address": _b58check(0x41, body), "coin": "TRON (USDT)"})
+    return found
+
+
+# --- Pages ---
+
+def saved_pages() -> Dict[str, str]:
+    """{file name: html} of the pages saved under fixtures/pages."""
+    pages = {}
+    for path in sorted(glob.glob(os.path.join(PAGES_DIR, "*.html"))):
+        with open(path, encoding="utf-8") as f:
+            pages[os.path.basename(path)] = f.read()
+    return pages
+
+
+def _filler(rng: random.Random, size: int) -> str:
+    """Minified-JS-looking noise: identifiers, long digit runs, base64-ish blobs."""
+    parts = []
+    total = 0
+    while total < size:
+        kind = rng.randrange(4)
+        if kind == 0:
+            chunk = f"var _0x{rng.getrandbits(24):06x}=function(a,b){{return a[b]*{rng.randrange(10**9)}}};"
+        elif kind == 1:
+            chunk = "".join(rng.choice("0123456789") for _ in range(rng.randrange(12, 64))) + ";"
+        elif kind == 2:
+            chunk = '"' + "".join(rng.choice(_B58_ALPHABET + "+/") for _ in range(rng.randrange(40, 160))) + '",'
+        else:
+            chunk = f'<div class="c-{rng.getrandbits(16):04x}"><span>Odds {rng.randrange(100, 999) / 100}</span></div>'
+        parts.append(chunk)
+        total += len(chunk)
+    return "".join(parts)
+
+
+def generated_page(index: int, size: int = 200_000, seed: int = SEED) -> str:
+    rng = random.Random(seed * 31 + index)
+    pix = emv_payloads(3, seed + index)
+    coins = wallets(3, seed + 7 * index)
+    phone = f"({rng.randrange(11, 99)}) 9{rng.randrange(1000, 9999)}-{rng.randrange(1000, 9999)}"
+    head = (
+        f"<!DOCTYPE html><html lang=\"pt-BR\"><head><title>Aposta {index} - Cassino e Esportes</title>"
+        f"<link rel=\"icon\" href=\"/static/favicon-{index % 4}.ico\">"
+        f"<script>gtag('config','G-{rng.getrandbits(40):010X}');"
+        f"fbq('init', '{rng.randrange(10**14, 10**15)}');</script></head><body>"
+    )
+    deposit = (
+        "<section id=\"deposito\"><h2>Depósito via PIX</h2>"
+        + "".join(f"<textarea class=\"pix-copia\">{code}</textarea><button>Copiar</button>" for code in pix)
+        + "<h2>Depósito cripto</h2>"
+        + "".join(f"<p>Rede {w['coin']} - endereço da carteira: <code>{w['address']}</code></p>" for w in coins)
+        + f"<p>Suporte: suporte{index}@apostas-{index % 9}.com | WhatsApp {phone}</p></section>"
+    )
+    body = _filler(rng, max(0, size - len(head) - len(deposit)))
+    middle = len(body) // 2
+    return head + "<script>" + body[:middle] + "</script>" + deposit + "<script>" + body[middle:] + "</script></body></html>"
+
+
+def pages(count: int, size: int = 200_000) -> List[str]:
+    """The saved pages first, then generated ones up to `count`."""
+    corpus = list(saved_pages().values())[:count]
+    corpus += [generated_page(i, size) for i in range(count - len(corpus))]
+    return corpus
+
+
+# --- Whitelist / targets ---
+
+def whitelist(operators: int, seed: int = SEED) -> Dict[str, Any]:
+    """bets_db.json-shaped whitelist: `operators` entries with 1-4 domains each."""
+    rng = random.Random(seed + 2)
+    entries = []
+    for i in range(operators):
+        brand = f"MARCA{i:05d}"
+        domains = [f"{brand.lower()}.bet.br"]
+        domains += [f"{brand.lower()}{n}.{rng.choice(_TLDS)}" for n in range(rng.randrange(0, 4))]
+        entries.append({
+            "operator": f"OPERADORA {i:05d} LTDA",
+            "cnpj": f"{rng.randrange(10**13, 10**14):014d}",
+            "brands": [brand],
+            "domains": domains,
+            "auth_type": "JUDICIAL" if i % 10 == 0 else "ADMINISTRATIVE",
+        })
+    return {"metadata": {"source": "benchmark", "version": "SYNTHETIC"}, "whitelist": entries}
+
+
+def write_whitelist(path: str, operators: int) -> str:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(whitelist(operators), f)
+    return path
+
+
+def compliance_urls(count: int, operators: int, seed: int = SEED) -> List[str]:
+    """Mix of whitelisted hosts, their subdomains, unlicensed .bet.br and foreign domains."""
+    rng = random.Random(seed + 3)
+    urls = []
+    for i in range(count):
+        brand = f"marca{rng.randrange(operators):05d}"
+        kind = i % 4
+        if kind == 0:
+            urls.append(f"https://{brand}.bet.br/")
+        elif kind == 1:
+            urls.append(f"https://www.m.{brand}.bet.br/esportes?id={i}")
+        elif kind == 2:
+            urls.append(f"https://pirata{i}.bet.br")
+        else:
+            urls.append(f"http://cassino-{i}.{rng.choice(['com', 'net', 'xyz'])}/promo")
+    return urls
+
+
+def target_urls(count: int) -> List[str]:
+    """Hosts of the full-graph run (served by the replay fixtures)."""
+    return [f"https://alvo{i:04d}.apostas-fixture.com/" for i in range(count)]
+
+
+# --- Case records ---
+
+def case_rows(count: int, seed: int = SEED):
+    """(entities, infras, relations) rows for CaseManager inserts."""
+    rng = random.Random(seed + 4)
+    entities = [(f"{rng.choice(_FIRST_NAMES)} {rng.choice(_LAST_NAMES)} {i}", f"{rng.randrange(10**10, 10**11):011d}",
+                 "suspect", None) for i in range(count)]
+    infras = [(f"alvo{i:05d}.apostas-fixture.com", f"203.0.113.{i % 254 + 1}", "benchmark", None) for i in range(count)]
+    relations = [(entities[i][1], infras[i][0], "OPERA", None) for i in range(count)]
+    return entities, infras, relations
@@ -0,0 +1,192 @@
+# Arquivo: benchmarks/replay.py
+"""
+Offline harness for the full investigation graph.
+
+`offline(pages, workdir)` swaps every outside dependency for the recorded answers in
+fixtures/responses.json:
+  - HTTP: the shared client (core/http.py) talks to an httpx MockTransport that
+    replays the routes; target pages come from the corpus, anything else is a 404;
+  - browser: a pool whose pages "render" the corpus HTML and return a fixed PNG;
+  - DNS / Whois / Shodan: fixed records;
+  - latency: rendering and Whois take the recorded `latency_ms` (sleeps, no CPU), so
+    a branch that waits on another one shows up as a slower graph;
+  - config: API keys from the fixtures, every tuning block at its defaults, and the
+    blob store / enrichment cache / quota ledger under `workdir` (the real ones are
+    left alone); provider rate limits are lifted, so the limiter costs only its overhead.
+
+The code under test is the real one: nodes, blob store, caches, metrics.
+"""
+import asyncio
+import base64
+import contextlib
+import fnmatch
+import json
+import os
+import time
+from collections import Counter
+from typing import Any, Dict, Optional, Tuple
+from unittest import mock
+
+from corpus import FIXTURES_DIR
+
+from anhanga.core import blobs, cache, engine, http, ratelimit
+from anhanga.core.config import ConfigManager
+from anhanga.core.dns import AsyncResolver, _record, clear_dns_cache
+from anhanga.modules.crypto import enrichment
+from anhanga.modules.infra import providers
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+RESPONSES_FILE = os.path.join(FIXTURES_DIR, "responses.json")
+
+
+def load_fixtures(path: str = RESPONSES_FILE) -> Dict[str, Any]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+class Replay:
+    """Recorded answers + counters of what was served (unmatched URLs would mean a leak)."""
+
+    def __init__(self, fixtures: Dict[str, Any], pages: Dict[str, Tuple[str, Optional[str]]], workdir: str):
+        self.fixtures = fixtures
+        self.pages = pages          # url -> (static html, rendered html or None = same)
+        self.workdir = workdir
+        self.hits: Counter = Counter()
+        self.unmatched: Counter = Counter()
+        self.screenshot = base64.b64decode(fixtures["screenshot_b64"])
+        latency = fixtures.get("latency_ms", {})
+        self.render_delay = latency.get("render", 0) / 1000
+        self.whois_delay = latency.get("whois", 0) / 1000
+        self._generation = 0
+
+    # --- HTTP ---
+
+    def handle(self, request):
+        url = str(request.url)
+        for route in self.fixtures["routes"]:
+            if not fnmatch.fnmatchcase(url, route["match"]):
+                continue
+            self.hits[route["match"]] += 1
+            if route.get("page"):
+                page = self.pages.get(url)
+                if page is None:
+                    break
+                return httpx.Response(200, headers={"content-type": "text/html; charset=utf-8"},
+                                      content=page[0].encode("utf-8"), request=request)
+            if "json" in route:
+                return httpx.Response(route["status"], headers=route.get("headers"), json=route["json"], request=request)
+            body = base64.b64decode(route["body_b64"]) if "body_b64" in route else b""
+            return httpx.Response(route["status"], headers=route.get("headers"), content=body, request=request)
+        self.unmatched[url] += 1
+        return httpx.Response(404, content=b"not recorded", request=request)
+
+    def rendered(self, url: str) -> str:
+        static, rendered = self.pages.get(url, ("<html></html>", None))
+        return rendered if rendered is not None else static
+
+    # --- Per-repetition state ---
+
+    def reset(self):
+        """Fresh blob dir and empty in-memory caches, so every repetition does the same work."""
+        self._generation += 1
+        blobs._shared = blobs.BlobStore(os.path.join(self.workdir, f"blobs-{self._generation}"))
+        clear_dns_cache()
+        with enrichment._memory_lock:
+            enrichment._memory.clear()
+
+
+class _ReplayPage:
+    def __init__(self, replay: Replay):
+        self._replay = replay
+        self.url = "about:blank"
+
+    async def goto(self, url, **kwargs):
+        self.url = url
+        await asyncio.sleep(self._replay.render_delay)
+
+    async def wait_for_load_state(self, *args, **kwargs):
+        pass
+
+    async def screenshot(self, **kwargs) -> bytes:
+        return self._replay.screenshot
+
+    async def content(self) -> str:
+        return self._replay.rendered(self.url)
+
+
+class ReplayBrowserPool:
+    def __init__(self, replay: Replay):
+        self._replay = replay
+        self.pages_served = 0
+
+    @contextlib.asynccontextmanager
+    async def page(self):
+        self.pages_served += 1
+        yield _ReplayPage(self._replay)
+
+    async def close(self):
+        pass
+
+
+@contextlib.contextmanager
+def offline(pages: Dict[str, Tuple[str, Optional[str]]], workdir: str, fixtures: Optional[Dict[str, Any]] = None):
+    """Yields the Replay serving `pages` ({url: (static, rendered)}); everything is restored on exit."""
+    if httpx is None:
+        raise RuntimeError("the offline graph benchmark needs httpx (`pip install httpx`)")
+    fixtures = fixtures or load_fixtures()
+    replay = Replay(fixtures, pages, workdir)
+    pool = ReplayBrowserPool(replay)
+
+    settings = {
+        "blobs": {"path": os.path.join(workdir, "blobs")},
+        "cache": {"path": os.path.join(workdir, "enrichment_cache.db")},
+        "quota": {"path": os.path.join(workdir, "quota.db")},
+        "rate_limits": {
+            name: {"rate": 1_000_000, "per": 1.0, "burst": None, "daily": None, "monthly": None}
+            for name in ratelimit.DEFAULT_RATE_LIMITS
+        },
+    }
+    keys = fixtures.get("keys", {})
+
+    class ReplayHttpClient(http.AsyncHttpClient):
+        def _client(self, verify: bool):
+            client = self._clients.get(verify)
+            if client is None:
+                client = self._clients[verify] = httpx.AsyncClient(
+                    transport=httpx.MockTransport(replay.handle), follow_redirects=True,
+                )
+            return client
+
+    dns_fixture = fixtures["dns"]
+
+    async def lookup(self, host):
+        return _record(host, dns_fixture["a"], dns_fixture["aaaa"], dns_fixture["cname"], ttl=dns_fixture["ttl"])
+
+    def lookup_whois(domain):
+        time.sleep(replay.whois_delay)  # worker thread, like the real lookup
+        return dict(fixtures["whois"])
+
+    def lookup_shodan(ip, key):
+        host = dict(fixtures["shodan"], ip_str=ip)
+        return dict(fixtures["shodan"], raw=blobs.get_blob_store().put_json(host))
+
+    with contextlib.ExitStack() as stack:
+        patch = stack.enter_context
+        patch(mock.patch.object(ConfigManager, "get", lambda self, option, default=None: settings.get(option, default)))
+        patch(mock.patch.object(ConfigManager, "get_key", lambda self, service: keys.get(service)))
+        patch(mock.patch.object(blobs, "_shared", None))
+        patch(mock.patch.object(cache, "_shared", None))
+        patch(mock.patch.object(http, "AsyncHttpClient", ReplayHttpClient))
+        patch(mock.patch.object(http, "_client", None))
+        patch(mock.patch.object(engine, "get_browser_pool", lambda: pool))
+        patch(mock.patch.object(AsyncResolver, "_lookup", lookup))
+        patch(mock.patch.object(providers, "lookup_whois", lookup_whois))
+        patch(mock.patch.object(providers, "lookup_shodan", lookup_shodan))
+        patch(mock.patch.object(ratelimit, "_shared", None))
+        stack.callback(clear_dns_cache)
+        replay.reset()
+        yield replay
@@ -0,0 +1,428 @@
+# Arquivo: benchmarks/run.py
+"""
+Offline benchmark suite for the hot paths of Anhangá.
+
+    python benchmarks/run.py                      # run everything, compare with baseline.json
+    python benchmarks/run.py --only pix --only graph
+    python benchmarks/run.py --update-baseline    # record this machine's numbers
+
+Each case is timed `--repeat` times (best run counts) and then run once more under
+tracemalloc for its peak Python heap. Results are compared with benchmarks/baseline.json:
+a case slower than the baseline by more than `--tolerance`, or using more than
+`--memory-tolerance` extra memory, is flagged and the exit status is 1.
+
+Nothing touches the network: the full-graph cases (render modes "auto" and the
+default "always") replay recorded fixtures (see replay.py), the other cases call
+the modules directly on the corpus (corpus.py).
+The checkout's own `src/` is benchmarked, not an installed copy.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(HERE), "src"))
+
+from rich.console import Console
+from rich.markup import escape
+from rich.table import Table
+
+import corpus
+
+from anhanga.core.cache import CacheView, MODE_REFRESH
+from anhanga.core.database import CaseManager
+from anhanga.core.metrics import MetricsAggregator
+from anhanga.modules.crypto.hunter import CryptoModule
+from anhanga.modules.crypto.wallet_hunter import WalletHunter
+from anhanga.modules.fincrime.compliance.validator import BetCompliance
+from anhanga.modules.fincrime.pix_decoder import PixIntelligence
+from anhanga.modules.infra.hunter import InfraModule
+
+BASELINE_FILE = os.path.join(HERE, "baseline.json")
+
+# Corpus sizes at --scale 1.0
+SIZES = {
+    "pages": 24,            # saved + generated pages
+    "page_bytes": 200_000,  # size of a generated page
+    "emv": 5_000,           # loose EMV payloads
+    "operators": 20_000,    # whitelist entries (~50k domains)
+    "urls": 50_000,         # compliance lookups
+    "rows": 5_000,          # CaseManager rows per table
+    "targets": 24,          # full-graph investigations
+    "concurrency": 8,
+}
+
+console = Console()
+
+# A case builder gets the run context and returns (ops, fn): `fn()` does `ops` units of work.
+# Builders do all the setup, so only `fn` is measured.
+Prepared = Tuple[int, Callable[[], Any]]
+
+
+class Context:
+    def __init__(self, scale: float, workdir: str):
+        self.sizes = dict(SIZES)
+        for key in ("pages", "emv", "operators", "urls", "rows", "targets"):
+            self.sizes[key] = max(1, int(SIZES[key] * scale))
+        self.workdir = workdir
+        self.graph_metrics: Dict[str, MetricsAggregator] = {}  # per-node timings of each graph case's last run
+        self._pages: Optional[List[str]] = None
+        self._counter = 0
+
+    @property
+    def pages(self) -> List[str]:
+        if self._pages is None:
+            self._pages = corpus.pages(self.sizes["pages"], self.sizes["page_bytes"])
+        return self._pages
+
+    def path(self, name: str) -> str:
+        self._counter += 1
+        return os.path.join(self.workdir, f"{self._counter:04d}-{name}")
+
+
+# --- Cases ---
+
+def case_pix(ctx: Context) -> Prepared:
+    pages = ctx.pages
+
+    def run():
+        for html in pages:
+            PixIntelligence().run(html)
+    return len(pages), run
+
+
+def case_pix_decode(ctx: Context) -> Prepared:
+    payloads = corpus.emv_payloads(ctx.sizes["emv"])
+    return len(payloads), lambda: PixIntelligence().decode_many(payloads)
+
+
+def case_wallets(ctx: Context) -> Prepared:
+    pages = ctx.pages
+
+    def run():
+        for html in pages:
+            WalletHunter().scan_html(html)
+    return len(pages), run
+
+
+def case_crypto(ctx: Context) -> Prepared:
+    from replay import offline
+
+    pages = ctx.pages
+    workdir = ctx.path("crypto")
+    os.makedirs(workdir)
+
+    def run():
+        # Balance lookups answered by the recorded blockchain.info response
+        with offline({}, workdir):
+            for html in pages:
+                CryptoModule(cache=CacheView(None)).run(html)
+    return len(pages), run
+
+
+def case_dirty_scrape(ctx: Context) -> Prepared:
+    pages = ctx.pages
+    module = InfraModule()
+
+    def run():
+        for html in pages:
+            module.results = []
+            module._dirty_scrape(html)
+    return len(pages), run
+
+
+def case_compliance_load(ctx: Context) -> Prepared:
+    db = corpus.write_whitelist(ctx.path("whitelist.json"), ctx.sizes["operators"])
+    return ctx.sizes["operators"], lambda: BetCompliance(db_path=db)
+
+
+def case_compliance_check(ctx: Context) -> Prepared:
+    db = corpus.write_whitelist(ctx.path("whitelist.json"), ctx.sizes["operators"])
+    checker = BetCompliance(db_path=db)
+    urls = corpus.compliance_urls(ctx.sizes["urls"], ctx.sizes["operators"])
+
+    def run():
+        for url in urls:
+            checker.check_compliance(url)
+    return len(urls), run
+
+
+def case_case_insert(ctx: Context) -> Prepared:
+    entities, infras, relations = corpus.case_rows(ctx.sizes["rows"])
+    case = CaseManager(ctx.path("case.db"))
+
+    def run():
+        with case.batch():
+            for name, doc, role, _ in entities:
+                case.add_entity(name, doc, role)
+            for domain, ip, info, _ in infras:
+                case.add_infra(domain, ip, info)
+            for source, target, kind, _ in relations:
+                case.add_relation(source, target, kind)
+    return 3 * len(entities), run
+
+
+def case_case_bulk(ctx: Context) -> Prepared:
+    entities, infras, relations = corpus.case_rows(ctx.sizes["rows"])
+    case = CaseManager(ctx.path("case.db"))
+
+    def run():
+        with case.batch():
+            case.add_entities(entities)
+            case.add_infras(infras)
+            case.add_relations(relations)
+    return 3 * len(entities), run
+
+
+def case_graph(ctx: Context, render_mode: str) -> Prepared:
+    from anhanga.core import engine
+    from replay import offline
+
+    urls = corpus.target_urls(ctx.sizes["targets"])
+    saved = corpus.saved_pages()
+    # Anti-bot shells render to a real page; everything else renders to itself
+    pages = {}
+    for i, url in enumerate(urls):
+        html = ctx.pages[i % len(ctx.pages)]
+        rendered = corpus.generated_page(10_000 + i, ctx.sizes["page_bytes"]) if html == saved.get("challenge_shell.html") else None
+        pages[url] = (html, rendered)
+    workdir = ctx.path("graph")
+    os.makedirs(workdir)
+
+    def run():
+        with offline(pages, workdir) as replay:
+            states = []
+            engine.run_investigations(urls, concurrency=ctx.sizes["concurrency"], on_result=states.append,
+                                      cache_mode=MODE_REFRESH, render_mode=render_mode)
+        if len(states) != len(urls):
+            raise RuntimeError(f"graph finished {len(states)}/{len(urls)} targets")
+        if replay.unmatched:
+            raise RuntimeError(f"requests without a recorded answer: {sorted(replay.unmatched)[:5]}")
+        metrics = ctx.graph_metrics[f"graph.full[{render_mode}]"] = MetricsAggregator()
+        for state in states:
+            metrics.add(state.get("metrics"))
+    return len(urls), run
+
+
+def case_graph_auto(ctx: Context) -> Prepared:
+    from anhanga.core.page import RENDER_AUTO
+    return case_graph(ctx, RENDER_AUTO)
+
+
+def case_graph_always(ctx: Context) -> Prepared:
+    # The default render mode: browser for every target, infra alongside it
+    from anhanga.core.page import RENDER_ALWAYS
+    return case_graph(ctx, RENDER_ALWAYS)
+
+
+CASES: Dict[str, Callable[[Context], Prepared]] = {
+    "pix.run": case_pix,
+    "pix.decode_many": case_pix_decode,
+    "wallet_hunter.scan_html": case_wallets,
+    "crypto.run": case_crypto,
+    "infra.dirty_scrape": case_dirty_scrape,
+    "compliance.load": case_compliance_load,
+    "compliance.check": case_compliance_check,
+    "case_manager.insert": case_case_insert,
+    "case_manager.bulk": case_case_bulk,
+    "graph.full[auto]": case_graph_auto,
+    "graph.full[always]": case_graph_always,
+}
+
+
+# --- Measurement ---
+
+def measure(builder: Callable[[Context], Prepared], ctx: Context, repeat: int) -> Dict[str, Any]:
+    best = None
+    ops = 0
+    for _ in range(repeat):
+        ops, fn = builder(ctx)
+        gc.collect()
+        gc.disable()  # like timeit: a collection landing in one run skews it
+        try:
+            started = time.perf_counter()
+            fn()
+            elapsed = time.perf_counter() - started
+        finally:
+            gc.enable()
+        best = elapsed if best is None else min(best, elapsed)
+
+    ops, fn = builder(ctx)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "ops": ops,
+        "best_s": round(best, 6),
+        "ops_per_s": round(ops / best, 3) if best else 0.0,
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Optional[Dict[str, Any]],
+            tolerance: float, memory_tolerance: float) -> List[str]:
+    """Annotates each result with its baseline delta; returns the regression messages."""
+    regressions = []
+    cases = (baseline or {}).get("cases", {})
+    for name, result in results.items():
+        reference = cases.get(name)
+        if not reference:
+            result["status"] = "new"
+            continue
+        result["baseline_ops_per_s"] = reference["ops_per_s"]
+        result["baseline_peak_kib"] = reference["peak_kib"]
+        speed = result["ops_per_s"] / reference["ops_per_s"] - 1 if reference["ops_per_s"] else 0.0
+        memory = result["peak_kib"] / reference["peak_kib"] - 1 if reference["peak_kib"] else 0.0
+        result["speed_delta"] = round(speed, 4)
+        result["memory_delta"] = round(memory, 4)
+
+        problems = []
+        if speed < -tolerance:
+            problems.append(f"throughput {speed:+.0%}")
+        if memory > memory_tolerance:
+            problems.append(f"peak memory {memory:+.0%}")
+        if problems:
+            result["status"] = "REGRESSION"
+            regressions.append(f"{name}: {', '.join(problems)}")
+        else:
+            result["status"] = "faster" if speed > tolerance else "ok"
+    return regressions
+
+
+def _memory(kib: float) -> str:
+    return f"{kib / 1024:.1f}MiB" if kib >= 1024 else f"{kib:.0f}KiB"
+
+
+def print_results(results: Dict[str, Dict[str, Any]]):
+    table = Table(title="Benchmarks")
+    table.add_column("Case", style="cyan", no_wrap=True)
+    table.add_column("Ops/s", justify="right")
+    table.add_column("Δ", justify="right")
+    table.add_column("Peak", justify="right")
+    table.add_column("Δ", justify="right")
+    table.add_column("Status")
+    for name, r in results.items():
+        status = r.get("status", "-")
+        style = {"REGRESSION": "bold red", "faster": "green", "new": "yellow"}.get(status, "")
+        table.add_row(
+            escape(name),
+            f"{r['ops_per_s']:,.1f}",
+            f"{r['speed_delta']:+.1%}" if "speed_delta" in r else "-",
+            _memory(r["peak_kib"]),
+            f"{r['memory_delta']:+.1%}" if "memory_delta" in r else "-",
+            f"[{style}]{status}[/{style}]" if style else status,
+        )
+    console.print(table)
+
+
+def load_baseline(path: str) -> Optional[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_baseline(path: str, results: Dict[str, Dict[str, Any]], scale: float, previous: Optional[Dict[str, Any]]):
+    cases = dict((previous or {}).get("cases", {})) if previous and previous["meta"].get("scale") == scale else {}
+    cases.update({name: {"ops_per_s": r["ops_per_s"], "peak_kib": r["peak_kib"]} for name, r in results.items()})
+    baseline = {
+        "meta": {
+            "recorded_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "scale": scale,
+        },
+        "cases": dict(sorted(cases.items())),
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(baseline, f, indent=4)
+        f.write("\n")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the Anhangá hot paths.")
+    parser.add_argument("--only", action="append", default=[], metavar="NAME",
+                        help="run cases whose name contains NAME (repeatable)")
+    parser.add_argument("-r", "--repeat", type=int, default=3, help="timed runs per case (best one counts)")
+    parser.add_argument("--scale", type=float, default=1.0, help="corpus size multiplier")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="baseline file to compare with / update")
+    parser.add_argument("--update-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.20, help="allowed throughput drop (fraction)")
+    parser.add_argument("--memory-tolerance", type=float, default=0.20, help="allowed peak memory growth (fraction)")
+    parser.add_argument("--json", metavar="PATH", help="also write the results as JSON ('-' for stdout)")
+    parser.add_argument("--list", action="store_true", help="list the cases and exit")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for name in CASES:
+            console.print(escape(name))
+        return 0
+    if args.repeat < 1 or args.scale <= 0:
+        parser.error("--repeat must be >= 1 and --scale > 0")
+
+    selected = {name: builder for name, builder in CASES.items()
+                if not args.only or any(pattern in name for pattern in args.only)}
+    if not selected:
+        parser.error(f"no case matches {args.only}")
+
+    baseline = load_baseline(args.baseline)
+    if baseline and baseline["meta"].get("scale") != args.scale:
+        console.print(f"[yellow]Baseline was recorded at scale {baseline['meta'].get('scale')}: not comparing.[/yellow]")
+        comparable = None
+    else:
+        comparable = baseline
+
+    results: Dict[str, Dict[str, Any]] = {}
+    with tempfile.TemporaryDirectory(prefix="anhanga-bench-") as workdir:
+        ctx = Context(args.scale, workdir)
+        for name, builder in selected.items():
+            with console.status(f"[bold green]{escape(name)}..."):
+                results[name] = measure(builder, ctx, args.repeat)
+            console.print(f"  {escape(name)}: {results[name]['ops_per_s']:,.1f} ops/s")
+
+    regressions = compare(results, comparable, args.tolerance, args.memory_tolerance)
+    print_results(results)
+    for name, metrics in ctx.graph_metrics.items():
+        nodes = metrics.summary()["nodes"]
+        console.print(f"{escape(name)} per node (p50 / p95 ms): " + ", ".join(
+            f"{node} {s['p50_ms']:.1f}/{s['p95_ms']:.1f}" for node, s in nodes.items()))
+
+    if args.json:
+        payload = json.dumps({"scale": args.scale, "cases": results, "regressions": regressions}, indent=2)
+        if args.json == "-":
+            print(payload)
+        else:
+            with open(args.json, "w", encoding="utf-8") as f:
+                f.write(payload + "\n")
+
+    if args.update_baseline:
+        write_baseline(args.baseline, results, args.scale, baseline)
+        console.print(f"[green]Baseline updated: {args.baseline}[/green]")
+        return 0
+
+    if regressions:
+        console.print("[bold red]Regressions:[/bold red]")
+        for line in regressions:
+            console.print(f"  - {escape(line)}")
+        return 1
+    if comparable is None:
+        console.print("[yellow]No baseline to compare with (use --update-baseline to record one).[/yellow]")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -19,8 +19,12 @@ if sys.platform == "win32":
     sys.stdout.reconfigure(encoding='utf-8')
 
 # Core Imports
-from anhanga.core.engine import run_investigation
+from anhanga.core.engine import run_investigation, run_investigations
 from anhanga.core.config import ConfigManager
+from anhanga.core.cache import MODE_DEFAULT, MODE_REFRESH, MODE_OFF
+from anhanga.core.page import RENDER_MODES
+from anhanga.core.metrics import MetricsAggregator
+from anhanga.core.ratelimit import get_rate_limiter, parse_priority
 
 # Optional AI Reporter
 try:
@@ -30,8 +34,50 @@ except ImportError:
 
 app = typer.Typer(help="Anhangá - Framework de Defesa Cibernética e Inteligência Financeira")
 console = Console()
+err_console = Console(stderr=True)
 cfg = ConfigManager()
 
+def _cache_mode(no_cache: bool, refresh: bool) -> str:
+    if no_cache:
+        return MODE_OFF
+    if refresh:
+        return MODE_REFRESH
+    return MODE_DEFAULT
+
+def _render_mode(value: Optional[str]) -> Optional[str]:
+    if value is not None and value not in RENDER_MODES:
+        err_console.print(f"[bold red]--render inválido:[/bold red] {value} (use {', '.join(RENDER_MODES)})")
+        raise typer.Exit(code=1)
+    return value
+
+def _human_bytes(n: int) -> str:
+    for unit in ("B", "KB", "MB"):
+        if n < 1024:
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.1f} GB"
+
+def print_profile(metrics: Optional[dict], total_s: float):
+    """Tabela --profile: tempo, resultado e bytes por etapa do grafo e por provedor."""
+    nodes = (metrics or {}).get("nodes") or {}
+    table = Table(title=f"Perfil de Execução (total {total_s * 1000:.0f} ms)")
+    table.add_column("Etapa", style="cyan")
+    table.add_column("Tempo (ms)", justify="right")
+    table.add_column("Resultado")
+    table.add_column("Bytes", justify="right")
+    table.add_column("Chamadas / Retries", justify="right", style="dim")
+
+    for name, node in sorted(nodes.items(), key=lambda item: -item[1].get("wall_ms", 0)):
+        outcome = node.get("outcome", "?")
+        style = "green" if outcome == "ok" else "yellow" if outcome == "degraded" else "red"
+        table.add_row(name, f"{node.get('wall_ms', 0):.1f}", f"[{style}]{outcome}[/{style}]",
+                      _human_bytes(node.get("bytes", 0)), "")
+        for provider, call in sorted((node.get("calls") or {}).items(), key=lambda item: -item[1]["wall_ms"]):
+            outcomes = ", ".join(f"{k}={v}" for k, v in call["outcomes"].items())
+            table.add_row(f"  └ {provider}", f"{call['wall_ms']:.1f}", outcomes,
+                          _human_bytes(call["bytes"]), f"{call['count']} / {call['retries']}")
+    console.print(table)
+
 def print_banner():
     # Professional ASCII Banner
     banner = r"""
@@ -87,10 +133,34 @@ def config(
     if not vt and not shodan and not urlscan:
         console.print("[yellow]Use --set-vt, --set-shodan ou --set-urlscan para configurar.[/yellow]")
 
+@app.command()
+def quota():
+    """Mostra o consumo das cotas diárias/mensais das APIs (contado entre execuções)."""
+    usage = get_rate_limiter().usage()
+    table = Table(title="Cotas das APIs")
+    table.add_column("Provedor", style="cyan")
+    table.add_column("Hoje (UTC)", justify="right")
+    table.add_column("Mês", justify="right")
+    for provider, periods in usage.items():
+        cells = []
+        for used, limit in (periods["daily"], periods["monthly"]):
+            if limit is None:
+                cells.append(f"{used}")
+            else:
+                style = "red" if used >= limit else "green"
+                cells.append(f"[{style}]{used}/{limit}[/{style}]")
+        table.add_row(provider, *cells)
+    console.print(table)
+    console.print("[dim]Limites: bloco \"rate_limits\" do config.json.[/dim]")
+
 @app.command()
 def scan(
     url: str, 
-    report: bool = typer.Option(False, "--report", "-r", help="Gerar relatório de inteligência com IA")
+    report: bool = typer.Option(False, "--report", "-r", help="Gerar relatório de inteligência com IA"),
+    no_cache: bool = typer.Option(False, "--no-cache", help="Ignora o cache local de enriquecimento (não lê nem grava)"),
+    refresh: bool = typer.Option(False, "--refresh", help="Força novas consultas às APIs e atualiza o cache"),
+    render: Optional[str] = typer.Option(None, "--render", help="Navegador: always | never | auto (padrão: config.json ou always)"),
+    profile: bool = typer.Option(False, "--profile", help="Mostra o tempo gasto em cada etapa e provedor")
 ):
     """
     Inicia uma investigação completa contra um alvo (URL).
@@ -104,9 +174,11 @@ def scan(
         
     console.print(f"\n[bold white][Target] Alvo:[/bold white] [cyan]{url}[/cyan]\n")
     
+    render_mode = _render_mode(render)
+    started = time.perf_counter()
     with console.status("[bold blue]Executando Anhangá Engine v3.0 (Async)...[/bold blue]", spinner="dots"):
         try:
-            state = run_investigation(url)
+            state = run_investigation(url, cache_mode=_cache_mode(no_cache, refresh), render_mode=render_mode)
         except Exception as e:
             console.print(f"[bold red]Erro crítico na execução do motor:[/bold red] {e}")
             return
@@ -124,11 +196,13 @@ def scan(
     
     # Enrich with Heavy Infra Data
     if infra_data:
-        ip = infra_data.get("ip", "N/A")
+        ips = infra_data.get("ip") or []
         tech = infra_data.get("tech", [])
         emails = infra_data.get("emails", [])
         
-        infra_text.append(f"IP do Servidor: {ip}\n", style="bold cyan")
+        infra_text.append(f"IP do Servidor: {', '.join(ips) if ips else 'N/A'}\n", style="bold cyan")
+        if cname := infra_data.get("cname"):
+            infra_text.append(f"CNAME: {' -> '.join(cname)}\n", style="cyan")
         
         if tech:
             infra_text.append("\n Tecnologias Detectadas:\n", style="bold white")
@@ -178,7 +252,8 @@ def scan(
                   infra_text.append(f"\n[URLScan] {u_report_url}\n", style="blue underline")
 
         # VirusTotal
-        if vt_data := infra_data.get("virustotal"):
+        vt_data = infra_data.get("virustotal")
+        if isinstance(vt_data, dict):
             if "malicious" in vt_data:
                 malicious = vt_data.get("malicious", 0)
                 harmless = vt_data.get("harmless", 0)
@@ -186,6 +261,11 @@ def scan(
                 infra_text.append(f"\n[🛡️ VirusTotal] {malicious} Maliciosos / {harmless} Seguros\n", style=f"bold {color}")
             elif vt_data.get("status") == "not_found":
                 infra_text.append("\n[🛡️ VirusTotal] URL não encontrada na base.\n", style="dim")
+        if vt_ip := infra_data.get("virustotal_ip"):
+            infra_text.append(f"\n[🛡️ VirusTotal IP] {vt_ip}\n", style="dim")
+
+    if cache_stats := state.get("cache_stats"):
+        infra_text.append(f"\n[Cache] {cache_stats.get('hits', 0)} hits / {cache_stats.get('misses', 0)} misses\n", style="dim")
 
     infra_text.append(f"\nStatus da Coleta: {status}\n", style="white")
     if screenshot:
@@ -246,7 +326,11 @@ def scan(
                 table.add_row("PIX", key, details)
                 
             for crypto in crypto_data:
-                table.add_row(f"Crypto [{crypto['coin']}]", crypto['address'], "Alta Confiança")
+                balance = crypto.get("balance") or {}
+                details = "Alta Confiança"
+                if balance.get("status") == "ok":
+                    details += f" | Saldo: {balance['final_balance']} {balance.get('unit', '')}"
+                table.add_row(f"Crypto [{crypto['coin']}]", crypto['address'], details)
                 
             console.print(table)
             
@@ -259,6 +343,10 @@ def scan(
     else:
          console.print(Panel("Módulo de Inteligência Financeira vazio.", title="[$] Rastreio Financeiro", border_style="dim"))
 
+    if profile:
+        console.print()
+        print_profile(state.get("metrics"), time.perf_counter() - started)
+
     # --- REPORTING (IA) ---
     if report:
         if AIReporter:
@@ -278,11 +366,120 @@ def scan(
                     "financial": fin_intel
                 }
                 dossier_text = reporter.generate_dossier(case_data)
-                filename = reporter.save_report(dossier_text)
+                filename = reporter.save_report(dossier_text, evidence={
+                    "HTML analisado": state.get("html_blob"),
+                    "Screenshot": state.get("screenshot_blob"),
+                    "Shodan (resposta completa)": (infra_data.get("shodan") or {}).get("raw"),
+                })
             console.print(f"[bold green]Relatório IA salvo em: {filename}[/bold green]")
         else:
             console.print("[bold red]Erro: Módulo AIReporter não encontrado.[/bold red]")
 
 
+def _read_targets(source: str, default_priority: Optional[int] = None):
+    """
+    Lê alvos (um por linha) de um arquivo ou do stdin ('-'), sob demanda.
+    Uma segunda coluna opcional define a prioridade do alvo: `exemplo.com high`.
+    """
+    stream = sys.stdin if source == "-" else open(source, "r", encoding="utf-8")
+    try:
+        for line in stream:
+            fields = line.split()
+            if not fields or fields[0].startswith("#"):
+                continue
+            url = fields[0]
+            if not url.startswith("http"):
+                url = "https://" + url
+            try:
+                priority = parse_priority(fields[1]) if len(fields) > 1 else default_priority
+            except ValueError as e:
+                err_console.print(f"[yellow]{e}: {url} fica com a prioridade padrão[/yellow]")
+                priority = default_priority
+            yield url, priority
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+@app.command("scan-batch")
+def scan_batch(
+    source: str = typer.Argument("-", help="Arquivo com uma URL por linha ('-' para stdin)"),
+    concurrency: int = typer.Option(10, "--concurrency", "-c", min=1, help="Investigações simultâneas"),
+    output: Optional[str] = typer.Option(None, "--output", "-o", help="Arquivo JSONL de saída (padrão: stdout)"),
+    no_cache: bool = typer.Option(False, "--no-cache", help="Ignora o cache local de enriquecimento (não lê nem grava)"),
+    refresh: bool = typer.Option(False, "--refresh", help="Força novas consultas às APIs e atualiza o cache"),
+    render: Optional[str] = typer.Option(None, "--render", help="Navegador: always | never | auto (padrão: config.json ou always)"),
+    run_id: Optional[str] = typer.Option(None, "--run-id", help="Nome da varredura: repetir o comando com o mesmo id retoma de onde parou"),
+    checkpoint_db: Optional[str] = typer.Option(None, "--checkpoint-db", help="Arquivo SQLite dos checkpoints (padrão: checkpoints.db)"),
+    metrics: Optional[str] = typer.Option(None, "--metrics", help="Grava p50/p95/p99 por etapa e provedor neste arquivo ('-' para stderr)"),
+    metrics_format: str = typer.Option("json", "--metrics-format", help="Formato das métricas: json | prometheus"),
+    priority: str = typer.Option("normal", "--priority", help="Prioridade padrão nas APIs limitadas: high | normal | low (ou 2ª coluna do arquivo). Vale entre os alvos em andamento; a entrada segue a ordem do arquivo")
+):
+    """
+    Investigação em lote: processa vários alvos em paralelo.
+    Cada resultado é emitido como uma linha JSON assim que termina.
+    Com --run-id, alvos já concluídos são pulados e os interrompidos continuam do último checkpoint.
+    """
+    render_mode = _render_mode(render)
+    try:
+        default_priority = parse_priority(priority)
+    except ValueError as e:
+        err_console.print(f"[bold red]--priority inválido:[/bold red] {e}")
+        raise typer.Exit(code=1)
+    if metrics_format not in ("json", "prometheus"):
+        err_console.print(f"[bold red]--metrics-format inválido:[/bold red] {metrics_format} (use json ou prometheus)")
+        raise typer.Exit(code=1)
+    if source != "-" and not os.path.exists(source):
+        err_console.print(f"[bold red]Arquivo não encontrado:[/bold red] {source}")
+        raise typer.Exit(code=1)
+
+    # Retomando uma varredura: os resultados anteriores continuam no arquivo
+    out = open(output, "a" if run_id else "w", encoding="utf-8") if output else sys.stdout
+    done = 0
+    skipped = 0
+    aggregator = MetricsAggregator()
+
+    def skip(url):
+        nonlocal skipped
+        skipped += 1
+
+    def emit(state):
+        nonlocal done
+        done += 1
+        aggregator.add(state.get("metrics"))
+        # O estado só carrega handles do blob store (HTML/screenshot ficam em disco)
+        out.write(json.dumps(state, ensure_ascii=False, default=str) + "\n")
+        out.flush()
+
+        comp = (state.get("compliance_result") or {}).get("status", "N/A")
+        risk = (state.get("financial_intel") or {}).get("risk_score", 0)
+        err_console.print(f"[dim][{done}][/dim] [cyan]{state.get('url')}[/cyan] -> {state.get('status')} | {comp} | risco {risk}")
+
+    start = time.time()
+    try:
+        total = run_investigations(_read_targets(source, default_priority), concurrency=concurrency, on_result=emit,
+                                   cache_mode=_cache_mode(no_cache, refresh), render_mode=render_mode,
+                                   run_id=run_id, checkpoint_db=checkpoint_db, on_skip=skip)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    elapsed = time.time() - start
+    err_console.print(f"\n[bold green]Lote concluído:[/bold green] {total} alvos em {elapsed:.1f}s")
+    if skipped:
+        err_console.print(f"[dim]{skipped} alvos já concluídos em '{run_id}' foram pulados.[/dim]")
+
+    if metrics:
+        if metrics_format == "prometheus":
+            payload = aggregator.to_prometheus()
+        else:
+            payload = json.dumps(aggregator.summary(), indent=2, ensure_ascii=False) + "\n"
+        if metrics == "-":
+            sys.stderr.write(payload)
+        else:
+            with open(metrics, "w", encoding="utf-8") as f:
+                f.write(payload)
+            err_console.print(f"[dim]Métricas ({metrics_format}) gravadas em {metrics}[/dim]")
+
+
 if __name__ == "__main__":
     app()
\ No newline at end of file
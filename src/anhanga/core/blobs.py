@@ -0,0 +1,170 @@
+# Arquivo: anhanga/core/blobs.py
+"""
+Content-addressed blob store for bulky evidence (HTML, screenshots, raw API responses).
+
+Graph state and checkpoints only carry handles ("sha256:<hex>.<kind>"); the bytes
+live once on local disk, compressed with zstd (gzip without `zstandard`), so the
+same page served by hundreds of white-label domains is stored a single time.
+Already-compressed formats (PNG, JPEG...) are kept raw, which also leaves
+screenshots openable straight from the store.
+"""
+import gzip
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+from typing import Any, Optional
+
+from anhanga.core.config import CONFIG_FILE, ConfigManager
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Lives next to config.json, like the rest of the local state
+BLOB_DIR = os.path.join(os.path.dirname(CONFIG_FILE), "blobs")
+
+CODEC_ZSTD = "zstd"
+CODEC_GZIP = "gzip"
+_SUFFIXES = {CODEC_ZSTD: ".zst", CODEC_GZIP: ".gz"}
+
+# Stored as-is: compressing them again only costs CPU
+RAW_KINDS = frozenset({"png", "jpg", "jpeg", "gif", "webp", "ico"})
+
+_HANDLE_RE = re.compile(r"^sha256:([0-9a-f]{64})\.([a-z0-9]+)$")
+
+
+def is_blob_handle(value: Any) -> bool:
+    return isinstance(value, str) and _HANDLE_RE.match(value) is not None
+
+
+class BlobStore:
+    """
+    put*/get* are blocking file I/O: call them from worker threads (asyncio.to_thread)
+    when the blob can be large. Writes are atomic, so concurrent writers of the same
+    content are harmless.
+    """
+
+    def __init__(self, root: str = BLOB_DIR, codec: Optional[str] = None, level: int = 3):
+        self.root = root
+        self.codec = codec or (CODEC_ZSTD if zstandard is not None else CODEC_GZIP)
+        if self.codec == CODEC_ZSTD and zstandard is None:
+            raise RuntimeError("zstd blobs need `pip install zstandard`")
+        if self.codec not in _SUFFIXES:
+            raise ValueError(f"Unknown blob codec: {self.codec}")
+        self.level = level
+        os.makedirs(root, exist_ok=True)
+
+    @classmethod
+    def from_config(cls, cfg: Optional[ConfigManager] = None) -> "BlobStore":
+        settings = (cfg or ConfigManager()).get("blobs") or {}
+        return cls(
+            root=settings.get("path", BLOB_DIR),
+            codec=settings.get("codec"),
+            level=settings.get("level", 3),
+        )
+
+    # --- Write ---
+
+    def put(self, data: bytes, kind: str = "bin") -> str:
+        """Stores `data` (if not there yet) and returns its handle."""
+        digest = hashlib.sha256(data).hexdigest()
+        handle = f"sha256:{digest}.{kind}"
+        if self._find(digest, kind) is not None:
+            return handle  # dedup: same content already stored
+
+        if kind in RAW_KINDS:
+            suffix, payload = "", data
+        else:
+            suffix, payload = _SUFFIXES[self.codec], self._compress(data)
+        final = self._base(digest, kind) + suffix
+        os.makedirs(os.path.dirname(final), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(final), prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(payload)
+            os.replace(tmp, final)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+        return handle
+
+    def put_text(self, text: str, kind: str = "html") -> str:
+        return self.put(text.encode("utf-8", "surrogatepass"), kind)
+
+    def put_json(self, value: Any) -> str:
+        return self.put(json.dumps(value, ensure_ascii=False, sort_keys=True, default=str).encode("utf-8"), "json")
+
+    # --- Read ---
+
+    def get(self, handle: str) -> bytes:
+        digest, kind = self._parse(handle)
+        path = self._find(digest, kind)
+        if path is None:
+            raise KeyError(f"Blob not found: {handle}")
+        with open(path, "rb") as f:
+            data = f.read()
+        if path.endswith(".zst"):
+            if zstandard is None:
+                raise RuntimeError("zstd blobs need `pip install zstandard`")
+            return zstandard.ZstdDecompressor().decompress(data)
+        if path.endswith(".gz"):
+            return gzip.decompress(data)
+        return data
+
+    def get_text(self, handle: str) -> str:
+        return self.get(handle).decode("utf-8", "surrogatepass")
+
+    def get_json(self, handle: str) -> Any:
+        return json.loads(self.get(handle))
+
+    def path(self, handle: str) -> Optional[str]:
+        """File backing `handle` (None if missing). Raw kinds are directly usable files."""
+        return self._find(*self._parse(handle))
+
+    def exists(self, handle: str) -> bool:
+        return self.path(handle) is not None
+
+    # --- Internals ---
+
+    def _compress(self, data: bytes) -> bytes:
+        if self.codec == CODEC_ZSTD:
+            # Compressor objects aren't thread-safe; one per call is cheap
+            return zstandard.ZstdCompressor(level=self.level).compress(data)
+        return gzip.compress(data, compresslevel=min(max(self.level, 1), 9), mtime=0)
+
+    def _base(self, digest: str, kind: str) -> str:
+        return os.path.join(self.root, digest[:2], f"{digest}.{kind}")
+
+    def _find(self, digest: str, kind: str) -> Optional[str]:
+        base = self._base(digest, kind)
+        for suffix in ("", ".zst", ".gz"):
+            if os.path.exists(base + suffix):
+                return base + suffix
+        return None
+
+    @staticmethod
+    def _parse(handle: str):
+        m = _HANDLE_RE.match(handle or "")
+        if m is None:
+            raise ValueError(f"Not a blob handle: {handle!r}")
+        return m.group(1), m.group(2)
+
+
+# --- Shared instance ---
+
+_shared: Optional[BlobStore] = None
+_shared_lock = threading.Lock()
+
+
+def get_blob_store() -> BlobStore:
+    """Process-wide blob store (configured by the "blobs" block of config.json)."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = BlobStore.from_config()
+        return _shared
@@ -0,0 +1,247 @@
+# Arquivo: anhanga/core/browser.py
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional
+
+from anhanga.core.config import ConfigManager
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POOL_SETTINGS = {
+    "max_browsers": 2,           # Camoufox processes alive at the same time
+    "max_pages_per_browser": 4,  # Concurrent pages (each in its own context) per browser
+    "recycle_after": 50,         # Pages served before a browser is retired
+    "max_rss_mb": 1500,          # Browser RSS (per browser, approx.) before recycling; needs psutil (extra "memory")
+}
+
+_MEMORY_CHECK_INTERVAL = 5.0  # Seconds between RSS samples: walking the process tree is not free
+
+
+class BrowserUnavailable(Exception):
+    """Raised when no browser could be launched (missing lib, crash on start)."""
+
+
+class _PooledBrowser:
+    def __init__(self, manager, browser):
+        self.manager = manager  # AsyncCamoufox context manager that owns the process
+        self.browser = browser
+        self.active = 0
+        self.served = 0
+        self.retiring = False
+        self.dead = False
+
+    @property
+    def usable(self) -> bool:
+        return not (self.retiring or self.dead)
+
+    def connected(self) -> bool:
+        try:
+            return self.browser.is_connected()
+        except Exception:
+            return False
+
+
+def _process_tree_rss_mb() -> float:
+    children = psutil.Process().children(recursive=True)
+    return sum(p.memory_info().rss for p in children) / (1024 * 1024)
+
+
+class BrowserPool:
+    """
+    Long-lived pool of Camoufox browsers shared by concurrent scrapes.
+
+    Each `page()` call gets a fresh page in its own browser context (cookies and
+    storage are not shared between targets), while the expensive browser process
+    is reused. Browsers are retired after `recycle_after` pages or when memory
+    grows past `max_rss_mb` (measured with psutil: `pip install anhanga[memory]`;
+    without it only `recycle_after` applies), and crashed browsers are replaced transparently.
+    """
+
+    def __init__(self, max_browsers: int = 2, max_pages_per_browser: int = 4,
+                 recycle_after: int = 50, max_rss_mb: Optional[int] = 1500,
+                 launch_options: Optional[Dict[str, Any]] = None):
+        self.max_browsers = max(1, max_browsers)
+        self.max_pages_per_browser = max(1, max_pages_per_browser)
+        self.recycle_after = recycle_after
+        self.max_rss_mb = max_rss_mb
+        if max_rss_mb and psutil is None:
+            logger.warning("psutil not installed: browser memory recycling (max_rss_mb) is off")
+        self.launch_options = launch_options or {"headless": True}
+
+        self._browsers: List[_PooledBrowser] = []
+        self._launching = 0
+        self._cond = asyncio.Condition()
+        self._closed = False
+        self._loop = asyncio.get_running_loop()
+        self._memory_checked = 0.0
+
+    @classmethod
+    def from_config(cls) -> "BrowserPool":
+        settings = dict(DEFAULT_POOL_SETTINGS)
+        settings.update(ConfigManager().get("browser_pool") or {})
+        return cls(**settings)
+
+    # --- Public API ---
+
+    @asynccontextmanager
+    async def page(self):
+        """Yields an isolated page. Retries once on a fresh browser if the first one crashed."""
+        pooled, page = None, None
+        for attempt in range(2):
+            pooled = await self._acquire()
+            try:
+                page = await pooled.browser.new_page()
+                break
+            except Exception as e:
+                logger.warning(f"Browser failed to open page, recycling: {e}")
+                pooled.dead = True
+                await self._release(pooled)
+                pooled = None
+                if attempt == 1:
+                    raise BrowserUnavailable(str(e)) from e
+
+        try:
+            yield page
+        finally:
+            try:
+                # Closing a page opened via browser.new_page() also disposes its context
+                await page.close()
+            except Exception:
+                pass
+            if not pooled.connected():
+                pooled.dead = True
+            await self._release(pooled)
+
+    async def close(self):
+        async with self._cond:
+            self._closed = True
+            browsers, self._browsers = self._browsers, []
+            self._cond.notify_all()
+        await asyncio.gather(*(self._shutdown(b) for b in browsers), return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "browsers": len(self._browsers),
+            "active_pages": sum(b.active for b in self._browsers),
+            "served": sum(b.served for b in self._browsers),
+        }
+
+    # --- Internals ---
+
+    async def _acquire(self) -> _PooledBrowser:
+        async with self._cond:
+            while True:
+                if self._closed:
+                    raise BrowserUnavailable("Browser pool is closed.")
+
+                for pooled in self._browsers:
+                    if pooled.usable and pooled.active < self.max_pages_per_browser:
+                        pooled.active += 1
+                        pooled.served += 1
+                        if self.recycle_after and pooled.served >= self.recycle_after:
+                            pooled.retiring = True
+                        return pooled
+
+                # Retired browsers still serving pages count against the cap until they drain
+                if len(self._browsers) + self._launching < self.max_browsers:
+                    self._launching += 1
+                    break
+
+                await self._cond.wait()
+
+        # Launch outside the lock: startup takes seconds and must not block releases
+        pooled = None
+        try:
+            pooled = await self._launch()
+        finally:
+            async with self._cond:
+                self._launching -= 1
+                if pooled:
+                    pooled.active = 1
+                    pooled.served = 1
+                    self._browsers.append(pooled)
+                self._cond.notify_all()
+        return pooled
+
+    async def _release(self, pooled: _PooledBrowser):
+        to_close = []
+        rss_mb = await self._measure_memory()
+        async with self._cond:
+            pooled.active -= 1
+            self._check_memory(rss_mb)
+            for b in list(self._browsers):
+                if b.dead or (b.retiring and b.active == 0):
+                    self._browsers.remove(b)
+                    to_close.append(b)
+            self._cond.notify_all()
+        for b in to_close:
+            await self._shutdown(b)
+
+    async def _measure_memory(self) -> Optional[float]:
+        """RSS (MB) of the browser process tree, sampled at most every _MEMORY_CHECK_INTERVAL seconds."""
+        if not (psutil and self.max_rss_mb and self._browsers):
+            return None
+        now = self._loop.time()
+        if now - self._memory_checked < _MEMORY_CHECK_INTERVAL:
+            return None
+        self._memory_checked = now
+        # The psutil walk reads /proc for every child: keep it off the event loop
+        try:
+            return await asyncio.to_thread(_process_tree_rss_mb)
+        except Exception:
+            return None
+
+    def _check_memory(self, rss_mb: Optional[float]):
+        """Retires the busiest browser when the browser process tree grows too large."""
+        if rss_mb is None or not self._browsers:
+            return
+        if rss_mb > self.max_rss_mb * len(self._browsers):
+            candidates = [b for b in self._browsers if b.usable]
+            if candidates:
+                max(candidates, key=lambda b: b.served).retiring = True
+
+    async def _launch(self) -> _PooledBrowser:
+        try:
+            from camoufox.async_api import AsyncCamoufox
+        except ImportError as e:
+            raise BrowserUnavailable("Camoufox library not found.") from e
+
+        manager = AsyncCamoufox(**self.launch_options)
+        try:
+            browser = await manager.__aenter__()
+        except Exception as e:
+            raise BrowserUnavailable(f"Browser launch failed: {e}") from e
+        return _PooledBrowser(manager, browser)
+
+    async def _shutdown(self, pooled: _PooledBrowser):
+        try:
+            await pooled.manager.__aexit__(None, None, None)
+        except Exception as e:
+            logger.debug(f"Browser shutdown error (ignored): {e}")
+
+
+# --- Shared instance (one per event loop) ---
+
+_pool: Optional[BrowserPool] = None
+
+
+def get_browser_pool() -> BrowserPool:
+    """Returns the pool bound to the running event loop, creating it on first use."""
+    global _pool
+    loop = asyncio.get_running_loop()
+    if _pool is None or _pool._loop is not loop or _pool._closed:
+        _pool = BrowserPool.from_config()
+    return _pool
+
+
+async def close_browser_pool():
+    global _pool
+    pool, _pool = _pool, None
+    if pool is not None and pool._loop is asyncio.get_running_loop():
+        await pool.close()
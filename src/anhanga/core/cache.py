@@ -0,0 +1,254 @@
+# Arquivo: anhanga/core/cache.py
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit
+
+from anhanga.core.config import CONFIG_FILE, ConfigManager
+from anhanga.core.metrics import note_cache_hit
+
+# Lives next to config.json, like the rest of the local state
+CACHE_FILE = os.path.join(os.path.dirname(CONFIG_FILE), "enrichment_cache.db")
+
+# Seconds a positive answer stays valid, per provider.
+# Override with {"cache": {"ttl": {"shodan": 3600}}} in config.json.
+DEFAULT_TTLS = {
+    "whois": 7 * 86400,
+    "shodan": 86400,
+    "virustotal": 86400,
+    "virustotal_ip": 86400,
+    "urlscan": 86400,
+    "blockchain": 3600,   # wallet balances move; keep them fresh
+    "favicon": 7 * 86400,
+}
+DEFAULT_NEGATIVE_TTL = 6 * 3600   # 404 / "not_found" answers
+DEFAULT_MAX_ENTRIES = 100_000
+_EVICT_EVERY = 200                # writes between size checks
+
+# Cache modes (per investigation)
+MODE_DEFAULT = "default"  # read + write
+MODE_REFRESH = "refresh"  # skip reads, overwrite with fresh answers
+MODE_OFF = "off"          # bypass completely
+CACHE_MODES = (MODE_DEFAULT, MODE_REFRESH, MODE_OFF)
+
+
+def normalize_key(value: str) -> str:
+    """Normalizes a domain / IP / URL so equivalent targets share one entry."""
+    value = (value or "").strip()
+    if "://" in value:
+        parts = urlsplit(value)
+        return urlunsplit((parts.scheme.lower(), parts.netloc.lower().rstrip("."), parts.path or "/", parts.query, ""))
+    return value.lower().rstrip(".")
+
+
+class EnrichmentCache:
+    """
+    Persistent TTL cache for paid/slow enrichment APIs (Whois, Shodan, VirusTotal, URLScan).
+
+    Entries are keyed by (provider, normalized target). Negative answers are cached
+    with a shorter TTL, and the table is trimmed to `max_entries` by least recent use.
+    Safe to share across threads; use `view()` to get per-investigation counters.
+    """
+
+    def __init__(self, path: str = CACHE_FILE, ttls: Optional[Dict[str, int]] = None,
+                 negative_ttl: int = DEFAULT_NEGATIVE_TTL, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.ttls = dict(DEFAULT_TTLS)
+        self.ttls.update(ttls or {})
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                provider TEXT NOT NULL,
+                key      TEXT NOT NULL,
+                value    TEXT,
+                negative INTEGER NOT NULL DEFAULT 0,
+                expires  REAL NOT NULL,
+                accessed REAL NOT NULL,
+                PRIMARY KEY (provider, key)
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_accessed ON entries(accessed)")
+
+    @classmethod
+    def from_config(cls, cfg: Optional[ConfigManager] = None) -> "EnrichmentCache":
+        settings = (cfg or ConfigManager()).get("cache") or {}
+        return cls(
+            path=settings.get("path", CACHE_FILE),
+            ttls=settings.get("ttl"),
+            negative_ttl=settings.get("negative_ttl", DEFAULT_NEGATIVE_TTL),
+            max_entries=settings.get("max_entries", DEFAULT_MAX_ENTRIES),
+        )
+
+    def get(self, provider: str, key: str) -> Tuple[bool, Any]:
+        """Returns (hit, value). Expired entries count as misses."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires FROM entries WHERE provider = ? AND key = ?",
+                (provider, normalize_key(key))
+            ).fetchone()
+            if row is None or row[1] < now:
+                return False, None
+            self._conn.execute(
+                "UPDATE entries SET accessed = ? WHERE provider = ? AND key = ?",
+                (now, provider, normalize_key(key))
+            )
+        return True, json.loads(row[0])
+
+    def set(self, provider: str, key: str, value: Any, negative: bool = False):
+        now = time.time()
+        ttl = self.negative_ttl if negative else self.ttls.get(provider, 86400)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (provider, key, value, negative, expires, accessed) VALUES (?, ?, ?, ?, ?, ?)",
+                (provider, normalize_key(key), json.dumps(value, default=str), int(negative), now + ttl, now)
+            )
+            self._writes += 1
+            if self._writes % _EVICT_EVERY == 0:
+                self._evict(now)
+
+    def purge(self, provider: Optional[str] = None):
+        with self._lock:
+            if provider:
+                self._conn.execute("DELETE FROM entries WHERE provider = ?", (provider,))
+            else:
+                self._conn.execute("DELETE FROM entries")
+
+    def view(self, mode: str = MODE_DEFAULT) -> "CacheView":
+        return CacheView(self, mode)
+
+    def _evict(self, now: float):
+        self._conn.execute("DELETE FROM entries WHERE expires < ?", (now,))
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()
+        excess = count - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM entries WHERE rowid IN (SELECT rowid FROM entries ORDER BY accessed ASC LIMIT ?)",
+                (excess,)
+            )
+
+
+class CacheView:
+    """Per-investigation handle: applies the cache mode and counts hits/misses."""
+
+    def __init__(self, cache: Optional[EnrichmentCache], mode: str = MODE_DEFAULT):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Unknown cache mode: {mode}")
+        self.cache = cache
+        self.mode = mode if cache is not None else MODE_OFF
+        self._lock = threading.Lock()
+        self.counters: Dict[str, Dict[str, int]] = {}
+
+    def get_or_fetch(self, provider: str, key: str, fetch: Callable[[], Any],
+                     is_negative: Optional[Callable[[Any], bool]] = None) -> Any:
+        """
+        Returns the cached answer or calls `fetch()` and stores its result.
+        `None` results (transient failures, refused submissions) are never cached;
+        exceptions propagate uncached.
+        """
+        hit, value = self.lookup(provider, key)
+        if hit:
+            note_cache_hit()
+            return value
+
+        value = fetch()
+        if value is not None:
+            self.store(provider, key, value, negative=bool(is_negative and is_negative(value)))
+        return value
+
+    async def aget_or_fetch(self, provider: str, key: str, fetch: Callable[[], Awaitable[Any]],
+                            is_negative: Optional[Callable[[Any], bool]] = None) -> Any:
+        """
+        `get_or_fetch` for coroutine fetchers (same caching rules). The SQLite work
+        runs in a worker thread, so a busy cache never stalls the event loop.
+        """
+        hit, value = await self._offload(self.lookup, provider, key)
+        if hit:
+            note_cache_hit()
+            return value
+
+        value = await fetch()
+        if value is not None:
+            await self._offload(self.store, provider, key, value, bool(is_negative and is_negative(value)))
+        return value
+
+    async def _offload(self, func: Callable[..., Any], *args) -> Any:
+        if self.mode == MODE_OFF:
+            return func(*args)  # no SQLite involved
+        return await asyncio.to_thread(func, *args)
+
+    def lookup(self, provider: str, key: str) -> Tuple[bool, Any]:
+        """Mode-aware read that also counts the hit/miss (for callers doing their own fetching)."""
+        if self.mode == MODE_DEFAULT:
+            hit, value = self.cache.get(provider, key)
+            if hit:
+                self._count(provider, "hits")
+                return True, value
+        self._count(provider, "misses")
+        return False, None
+
+    def store(self, provider: str, key: str, value: Any, negative: bool = False):
+        if self.mode != MODE_OFF:
+            self.cache.set(provider, key, value, negative=negative)
+
+    async def alookup_many(self, items: Iterable[Tuple[str, str]]) -> Dict[Tuple[str, str], Any]:
+        """`lookup` for many (provider, key) pairs in one worker-thread trip; returns the hits only."""
+        def run():
+            hits = {}
+            for provider, key in items:
+                hit, value = self.lookup(provider, key)
+                if hit:
+                    hits[(provider, key)] = value
+            return hits
+        return await self._offload(run)
+
+    async def astore_many(self, provider: str, entries: List[Tuple[str, Any, bool]]):
+        """`store` for many (key, value, negative) entries in one worker-thread trip."""
+        def run():
+            for key, value, negative in entries:
+                self.store(provider, key, value, negative=negative)
+        await self._offload(run)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            providers = {name: dict(c) for name, c in self.counters.items()}
+        return {
+            "mode": self.mode,
+            "hits": sum(c.get("hits", 0) for c in providers.values()),
+            "misses": sum(c.get("misses", 0) for c in providers.values()),
+            "providers": providers,
+        }
+
+    def _count(self, provider: str, field: str):
+        with self._lock:
+            counter = self.counters.setdefault(provider, {"hits": 0, "misses": 0})
+            counter[field] += 1
+
+
+# --- Shared instance ---
+
+_shared: Optional[EnrichmentCache] = None
+_shared_lock = threading.Lock()
+
+
+def get_enrichment_cache() -> Optional[EnrichmentCache]:
+    """Process-wide cache. Returns None if the cache file can't be opened (cache disabled)."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            try:
+                _shared = EnrichmentCache.from_config()
+            except sqlite3.Error:
+                return None
+        return _shared
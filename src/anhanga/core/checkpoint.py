@@ -0,0 +1,195 @@
+# Arquivo: anhanga/core/checkpoint.py
+"""
+Checkpoint storage for investigation_graph.
+
+"memory" (default) keeps checkpoints in RAM; "sqlite" persists them (AsyncSqliteSaver,
+from langgraph-checkpoint-sqlite) so a sweep killed halfway can be resumed: every
+target of a named run gets a deterministic thread, finished targets are recorded in
+`completed_targets`, and an interrupted target continues from its last checkpoint
+(nodes that already finished, like the page render, are not run again).
+
+Either way a thread is deleted once its investigation finishes, so the store holds
+only in-flight targets and stays flat over long batches.
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+from langgraph.checkpoint.memory import MemorySaver
+
+from anhanga.core.config import CONFIG_FILE, ConfigManager
+
+try:
+    import aiosqlite
+    from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+except ImportError:
+    aiosqlite = None
+    AsyncSqliteSaver = None
+
+logger = logging.getLogger(__name__)
+
+# Lives next to config.json, like the rest of the local state
+CHECKPOINT_FILE = os.path.join(os.path.dirname(CONFIG_FILE), "checkpoints.db")
+
+BACKEND_MEMORY = "memory"
+BACKEND_SQLITE = "sqlite"
+
+# Override with a "checkpoint" block in config.json
+DEFAULT_CHECKPOINT_SETTINGS = {
+    "backend": BACKEND_MEMORY,
+    "path": CHECKPOINT_FILE,
+    "prune": True,   # delete a thread's checkpoints once the investigation finishes
+}
+
+
+def checkpoint_settings(cfg: Optional[ConfigManager] = None) -> Dict[str, Any]:
+    settings = dict(DEFAULT_CHECKPOINT_SETTINGS)
+    settings.update((cfg or ConfigManager()).get("checkpoint") or {})
+    return settings
+
+
+def new_thread_id(url: str) -> str:
+    """Throwaway thread for a one-off investigation."""
+    return f"{url}#{uuid.uuid4().hex[:12]}"
+
+
+def target_thread_id(url: str, run_id: str) -> str:
+    """Deterministic thread of `url` within run `run_id` (same target -> same thread on resume)."""
+    digest = hashlib.sha256(url.strip().encode("utf-8")).hexdigest()[:16]
+    return f"{run_id}:{digest}"
+
+
+# Process-wide in-memory saver (not bound to any loop)
+memory_saver = MemorySaver()
+
+
+class CheckpointStore:
+    """
+    Loop-bound checkpointer + completion bookkeeping.
+    Use `compile(workflow)` to get the graph wired to this store.
+    """
+
+    def __init__(self, backend: str, path: Optional[str] = None, prune: bool = True):
+        self.backend = backend
+        self.path = path
+        self.prune = prune
+        self.saver = memory_saver if backend == BACKEND_MEMORY else None
+        self._loop = asyncio.get_running_loop()
+        self._conn = None
+        self._graphs: Dict[int, Any] = {}
+        self._completed: Dict[str, str] = {}  # memory backend: thread_id -> run_id
+        self._closed = False
+
+    @property
+    def durable(self) -> bool:
+        return self.backend == BACKEND_SQLITE
+
+    async def open(self):
+        if self.backend != BACKEND_SQLITE:
+            return
+        if AsyncSqliteSaver is None:
+            raise RuntimeError("SQLite checkpoints need `pip install langgraph-checkpoint-sqlite`")
+        self._conn = await aiosqlite.connect(self.path)
+        self.saver = AsyncSqliteSaver(self._conn)
+        await self.saver.setup()
+        async with self.saver.lock:
+            await self._conn.execute("PRAGMA synchronous=NORMAL")
+            await self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS completed_targets (
+                    thread_id   TEXT PRIMARY KEY,
+                    run_id      TEXT NOT NULL,
+                    url         TEXT NOT NULL,
+                    finished_at TEXT NOT NULL
+                )
+            """)
+            await self._conn.commit()
+
+    def compile(self, workflow):
+        """`workflow` compiled against this store's checkpointer (once per workflow)."""
+        graph = self._graphs.get(id(workflow))
+        if graph is None:
+            graph = self._graphs[id(workflow)] = workflow.compile(checkpointer=self.saver)
+        return graph
+
+    async def is_completed(self, thread_id: str) -> bool:
+        if not self.durable:
+            return thread_id in self._completed
+        async with self.saver.lock:
+            async with self._conn.execute(
+                "SELECT 1 FROM completed_targets WHERE thread_id = ?", (thread_id,)
+            ) as cur:
+                return await cur.fetchone() is not None
+
+    async def finish(self, thread_id: str, url: str, run_id: Optional[str] = None):
+        """Records a finished target of run `run_id` and prunes its checkpoints."""
+        if run_id is not None:
+            if self.durable:
+                async with self.saver.lock:
+                    await self._conn.execute(
+                        "INSERT OR REPLACE INTO completed_targets (thread_id, run_id, url, finished_at) "
+                        "VALUES (?, ?, ?, ?)",
+                        (thread_id, run_id, url, datetime.now().isoformat()),
+                    )
+                    await self._conn.commit()
+            else:
+                self._completed[thread_id] = run_id
+        if self.prune:
+            await self.discard(thread_id)
+
+    async def discard(self, thread_id: str):
+        try:
+            await self.saver.adelete_thread(thread_id)
+        except Exception as e:
+            logger.warning(f"Could not prune checkpoints of {thread_id}: {e}")
+
+    async def close(self):
+        self._closed = True
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            await conn.close()
+
+
+_store: Optional[CheckpointStore] = None
+_store_lock: Optional[Tuple[asyncio.AbstractEventLoop, asyncio.Lock]] = None
+
+
+async def get_checkpoint_store(path: Optional[str] = None) -> CheckpointStore:
+    """
+    Store bound to the running loop. `path` opens (or switches to) the SQLite backend
+    on that file; without it the store already open on this loop is reused, else the
+    "checkpoint" block of config.json decides (memory by default).
+    """
+    global _store, _store_lock
+    loop = asyncio.get_running_loop()
+    if _store_lock is None or _store_lock[0] is not loop:
+        _store_lock = (loop, asyncio.Lock())
+
+    async with _store_lock[1]:
+        current = _store if _store is not None and _store._loop is loop and not _store._closed else None
+        if current is not None and (path is None or current.path == path):
+            return current
+
+        settings = checkpoint_settings()
+        backend = BACKEND_SQLITE if path else settings["backend"]
+        if backend not in (BACKEND_MEMORY, BACKEND_SQLITE):
+            raise ValueError(f"Unknown checkpoint backend: {backend}")
+        if backend == BACKEND_SQLITE:
+            path = path or settings["path"]
+
+        if current is not None:
+            await current.close()
+        store = CheckpointStore(backend, path, prune=bool(settings.get("prune", True)))
+        await store.open()
+        _store = store
+        return store
+
+
+async def close_checkpoint_store():
+    global _store
+    store, _store = _store, None
+    if store is not None and store._loop is asyncio.get_running_loop():
+        await store.close()
@@ -30,4 +30,8 @@ class ConfigManager:
         self._save()
 
     def get_key(self, service):
-        return self.data.get(f"{service}_key")
\ No newline at end of file
+        return self.data.get(f"{service}_key")
+
+    def get(self, option, default=None):
+        """Reads a non-secret setting (e.g. tuning blocks like "browser_pool")."""
+        return self.data.get(option, default)
\ No newline at end of file
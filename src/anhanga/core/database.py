@@ -1,13 +1,35 @@
 # Arquivo: anhanga/core/database.py
 import json
 import os
+import sqlite3
+from contextlib import contextmanager
 from datetime import datetime
 
-DB_FILE = "investigation_current.json"
+DB_FILE = "investigation_current.db"
+LEGACY_DB_FILE = "investigation_current.json"
 
-class CaseManager:
-    def __init__(self):
-        self.db_file = DB_FILE
+
+def _rows(items, fields, defaults):
+    """Aceita dicts ({"name": ..}) ou tuplas posicionais e devolve tuplas completas."""
+    for item in items:
+        if isinstance(item, dict):
+            yield tuple(item.get(f, defaults.get(f)) for f in fields)
+        else:
+            item = tuple(item)
+            yield item + tuple(defaults.get(f) for f in fields[len(item):])
+
+ENTITY_FIELDS = (("name", "document", "role", "timestamp"), {"role": "suspect"})
+INFRA_FIELDS = (("domain", "ip", "info", "timestamp"), {"ip": "Pending", "info": ""})
+RELATION_FIELDS = (("source", "target", "type", "timestamp"), {})
+
+
+class JsonCaseStore:
+    """Backend original: o caso inteiro em um único arquivo JSON."""
+
+    def __init__(self, db_file):
+        self.db_file = db_file
+        self._batch_depth = 0
+        self._dirty = False
         self._load_db()
 
     def _load_db(self):
@@ -27,49 +49,100 @@ class CaseManager:
                 # Se corromper, recria (Fail-safe)
                 os.remove(self.db_file)
                 self._load_db()
+                return
+        self._build_index()
+
+    def _build_index(self):
+        # Conjuntos de chaves: deduplicação O(1) em vez de varrer as listas
+        self._docs = {e["document"] for e in self.data["entities"]}
+        self._domains = {i["domain"] for i in self.data["infra"]}
+        self._rel_keys = {(r["source"], r["target"]) for r in self.data["relations"]}
 
     def _save_db(self):
-        with open(self.db_file, 'w', encoding='utf-8') as f:
+        if self._batch_depth:
+            # Dentro de batch(): só marca, grava uma vez no final
+            self._dirty = True
+            return
+        # Escrita atômica: arquivo temporário + rename, nunca deixa um JSON pela metade
+        tmp_file = f"{self.db_file}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
             json.dump(self.data, f, indent=4, ensure_ascii=False)
+        os.replace(tmp_file, self.db_file)
+        self._dirty = False
 
-    def add_entity(self, name, doc, role="suspect"):
+    @contextmanager
+    def batch(self):
+        """Acumula alterações em memória e grava o arquivo uma única vez ao sair."""
+        self._batch_depth += 1
+        try:
+            yield
+        except BaseException:
+            self._batch_depth -= 1
+            if self._batch_depth == 0 and self._dirty:
+                # Descarta o lote incompleto (mesma semântica do ROLLBACK no SQLite)
+                self._dirty = False
+                self._load_db()
+            raise
+        else:
+            self._batch_depth -= 1
+            if self._batch_depth == 0 and self._dirty:
+                self._save_db()
+
+    transaction = batch
+
+    def add_entity(self, name, doc, role="suspect", timestamp=None):
         # Evita duplicatas pelo Documento
-        for ent in self.data["entities"]:
-            if ent["document"] == doc: return False
-        
+        if doc in self._docs: return False
+
+        self._docs.add(doc)
         self.data["entities"].append({
             "name": name, "document": doc, "role": role,
-            "timestamp": str(datetime.now())
+            "timestamp": timestamp or str(datetime.now())
         })
         self._save_db()
         return True
 
-    def add_infra(self, domain, ip="Pending", extra_info=""):
+    def add_infra(self, domain, ip="Pending", extra_info="", timestamp=None):
         # Evita duplicatas pelo Domínio
-        for inf in self.data["infra"]:
-            if inf["domain"] == domain: return False
-                
+        if domain in self._domains: return False
+
+        self._domains.add(domain)
         self.data["infra"].append({
             "domain": domain, "ip": ip, "info": extra_info,
-            "timestamp": str(datetime.now())
+            "timestamp": timestamp or str(datetime.now())
         })
         self._save_db()
         return True
 
-    def add_relation(self, source_id, target_id, type_rel):
-        """Cria um vínculo FORENSE entre dois nós."""
+    def add_relation(self, source_id, target_id, type_rel, timestamp=None):
         # Verifica se já existe para não poluir o grafo
-        for rel in self.data["relations"]:
-            if rel["source"] == source_id and rel["target"] == target_id:
-                return
-        
+        if (source_id, target_id) in self._rel_keys: return False
+
+        self._rel_keys.add((source_id, target_id))
         self.data["relations"].append({
             "source": source_id,
             "target": target_id,
             "type": type_rel,
-            "timestamp": str(datetime.now())
+            "timestamp": timestamp or str(datetime.now())
         })
         self._save_db()
+        return True
+
+    def add_entities(self, rows):
+        with self.batch():
+            return sum(self.add_entity(*row) for row in rows)
+
+    def add_infras(self, rows):
+        with self.batch():
+            return sum(self.add_infra(*row) for row in rows)
+
+    def add_relations(self, rows):
+        with self.batch():
+            return sum(self.add_relation(*row) for row in rows)
+
+    def set_meta(self, meta):
+        self.data["meta"].update(meta)
+        self._save_db()
 
     def get_full_case(self):
         return self.data
@@ -77,83 +150,226 @@ class CaseManager:
     def nuke(self):
         if os.path.exists(self.db_file):
             os.remove(self.db_file)
-        self._load_db()# Arquivo: anhanga/core/database.py
-import json
-import os
-from datetime import datetime
+        self._load_db()
+
+
+class SqliteCaseStore:
+    """
+    Backend indexado: índices únicos em documento, domínio e (origem, destino)
+    deixam cada inserção O(log N) e sem reescrever o caso inteiro.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS meta (
+            key   TEXT PRIMARY KEY,
+            value TEXT
+        );
+        CREATE TABLE IF NOT EXISTS entities (
+            id        INTEGER PRIMARY KEY,
+            name      TEXT,
+            document  TEXT NOT NULL UNIQUE,
+            role      TEXT,
+            timestamp TEXT
+        );
+        CREATE TABLE IF NOT EXISTS infra (
+            id        INTEGER PRIMARY KEY,
+            domain    TEXT NOT NULL UNIQUE,
+            ip        TEXT,
+            info      TEXT,
+            timestamp TEXT
+        );
+        CREATE TABLE IF NOT EXISTS relations (
+            id        INTEGER PRIMARY KEY,
+            source    TEXT NOT NULL,
+            target    TEXT NOT NULL,
+            type      TEXT,
+            timestamp TEXT,
+            UNIQUE (source, target)
+        );
+    """
+
+    def __init__(self, db_file):
+        self.db_file = db_file
+        self.created = not os.path.exists(db_file)
+        self._tx_depth = 0
+        self._open()
+
+    def _open(self):
+        # isolation_level=None: autocommit, transactions are opened explicitly
+        self.conn = sqlite3.connect(self.db_file, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(self.SCHEMA)
+        self.conn.execute(
+            "INSERT OR IGNORE INTO meta (key, value) VALUES (?, ?), (?, ?)",
+            ("start", json.dumps(str(datetime.now())), "case_name", json.dumps("OP_DEFAULT"))
+        )
+
+    @contextmanager
+    def transaction(self):
+        """Agrupa várias escritas em um único commit (aninhável)."""
+        if self._tx_depth == 0:
+            self.conn.execute("BEGIN")
+        self._tx_depth += 1
+        try:
+            yield
+        except BaseException:
+            self._tx_depth -= 1
+            if self._tx_depth == 0:
+                self.conn.execute("ROLLBACK")
+            raise
+        else:
+            self._tx_depth -= 1
+            if self._tx_depth == 0:
+                self.conn.execute("COMMIT")
+
+    batch = transaction
+
+    def _insert(self, sql, params):
+        return self.conn.execute(sql, params).rowcount > 0
+
+    def add_entity(self, name, doc, role="suspect", timestamp=None):
+        return self._insert(
+            "INSERT OR IGNORE INTO entities (name, document, role, timestamp) VALUES (?, ?, ?, ?)",
+            (name, doc, role, timestamp or str(datetime.now()))
+        )
+
+    def add_infra(self, domain, ip="Pending", extra_info="", timestamp=None):
+        return self._insert(
+            "INSERT OR IGNORE INTO infra (domain, ip, info, timestamp) VALUES (?, ?, ?, ?)",
+            (domain, ip, extra_info, timestamp or str(datetime.now()))
+        )
+
+    def add_relation(self, source_id, target_id, type_rel, timestamp=None):
+        return self._insert(
+            "INSERT OR IGNORE INTO relations (source, target, type, timestamp) VALUES (?, ?, ?, ?)",
+            (source_id, target_id, type_rel, timestamp or str(datetime.now()))
+        )
+
+    def _insert_many(self, sql, rows):
+        now = str(datetime.now())
+        with self.transaction():
+            cur = self.conn.executemany(sql, ((*row[:3], row[3] or now) for row in rows))
+            return max(cur.rowcount, 0)
+
+    def add_entities(self, rows):
+        return self._insert_many("INSERT OR IGNORE INTO entities (name, document, role, timestamp) VALUES (?, ?, ?, ?)", rows)
+
+    def add_infras(self, rows):
+        return self._insert_many("INSERT OR IGNORE INTO infra (domain, ip, info, timestamp) VALUES (?, ?, ?, ?)", rows)
+
+    def add_relations(self, rows):
+        return self._insert_many("INSERT OR IGNORE INTO relations (source, target, type, timestamp) VALUES (?, ?, ?, ?)", rows)
+
+    def set_meta(self, meta):
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+            [(k, json.dumps(v, ensure_ascii=False)) for k, v in meta.items()]
+        )
+
+    def get_full_case(self):
+        # Mesmo formato do JSON legado, na ordem de inserção
+        q = self.conn.execute
+        return {
+            "meta": {k: json.loads(v) for k, v in q("SELECT key, value FROM meta")},
+            "entities": [
+                {"name": n, "document": d, "role": r, "timestamp": t}
+                for n, d, r, t in q("SELECT name, document, role, timestamp FROM entities ORDER BY id")
+            ],
+            "infra": [
+                {"domain": d, "ip": ip, "info": i, "timestamp": t}
+                for d, ip, i, t in q("SELECT domain, ip, info, timestamp FROM infra ORDER BY id")
+            ],
+            "relations": [
+                {"source": s, "target": tg, "type": ty, "timestamp": t}
+                for s, tg, ty, t in q("SELECT source, target, type, timestamp FROM relations ORDER BY id")
+            ],
+        }
+
+    def nuke(self):
+        self.conn.close()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(self.db_file + suffix):
+                os.remove(self.db_file + suffix)
+        self._open()
 
-DB_FILE = "investigation_current.json"
 
 class CaseManager:
-    def __init__(self):
-        self.db_file = DB_FILE
-        self._load_db()
+    """
+    Banco do caso atual. O backend é escolhido pela extensão do arquivo:
+    `.json` usa o formato legado, qualquer outra (padrão `.db`) usa SQLite.
+    """
 
-    def _load_db(self):
-        if not os.path.exists(self.db_file):
-            self.data = {
-                "meta": {"start": str(datetime.now()), "case_name": "OP_DEFAULT"},
-                "entities": [],
-                "infra": [],
-                "relations": [] # AQUI MORA A VERDADE
-            }
-            self._save_db()
+    def __init__(self, db_file=None):
+        self.db_file = db_file or DB_FILE
+        if self.db_file.lower().endswith(".json"):
+            self.store = JsonCaseStore(self.db_file)
         else:
-            try:
-                with open(self.db_file, 'r', encoding='utf-8') as f:
-                    self.data = json.load(f)
-            except:
-                # Se corromper, recria (Fail-safe)
-                os.remove(self.db_file)
-                self._load_db()
+            self.store = SqliteCaseStore(self.db_file)
+            # Primeira execução com o backend novo: migra o caso JSON legado, se existir
+            if self.store.created and db_file is None and os.path.exists(LEGACY_DB_FILE):
+                self.import_json(LEGACY_DB_FILE)
 
-    def _save_db(self):
-        with open(self.db_file, 'w', encoding='utf-8') as f:
-            json.dump(self.data, f, indent=4, ensure_ascii=False)
+    def transaction(self):
+        return self.store.transaction()
+
+    def batch(self):
+        """
+        `with case.batch():` agrupa várias inserções: no SQLite vira uma transação,
+        no JSON as alterações ficam em memória e o arquivo é gravado uma vez no final.
+        """
+        return self.store.batch()
 
     def add_entity(self, name, doc, role="suspect"):
-        # Evita duplicatas pelo Documento
-        for ent in self.data["entities"]:
-            if ent["document"] == doc: return False
-        
-        self.data["entities"].append({
-            "name": name, "document": doc, "role": role,
-            "timestamp": str(datetime.now())
-        })
-        self._save_db()
-        return True
+        return self.store.add_entity(name, doc, role)
 
     def add_infra(self, domain, ip="Pending", extra_info=""):
-        # Evita duplicatas pelo Domínio
-        for inf in self.data["infra"]:
-            if inf["domain"] == domain: return False
-                
-        self.data["infra"].append({
-            "domain": domain, "ip": ip, "info": extra_info,
-            "timestamp": str(datetime.now())
-        })
-        self._save_db()
-        return True
+        return self.store.add_infra(domain, ip, extra_info)
 
     def add_relation(self, source_id, target_id, type_rel):
         """Cria um vínculo FORENSE entre dois nós."""
-        # Verifica se já existe para não poluir o grafo
-        for rel in self.data["relations"]:
-            if rel["source"] == source_id and rel["target"] == target_id:
-                return
-        
-        self.data["relations"].append({
-            "source": source_id,
-            "target": target_id,
-            "type": type_rel,
-            "timestamp": str(datetime.now())
-        })
-        self._save_db()
+        return self.store.add_relation(source_id, target_id, type_rel)
+
+    # --- Bulk API (aceita dicts ou tuplas na ordem dos campos) ---
+
+    def add_entities(self, items):
+        """Insere várias entidades de uma vez. Retorna quantas eram novas."""
+        return self.store.add_entities(_rows(items, *ENTITY_FIELDS))
+
+    def add_infras(self, items):
+        """Insere vários domínios de uma vez. Retorna quantos eram novos."""
+        return self.store.add_infras(_rows(items, *INFRA_FIELDS))
+
+    def add_relations(self, items):
+        """Insere vários vínculos de uma vez. Retorna quantos eram novos."""
+        return self.store.add_relations(_rows(items, *RELATION_FIELDS))
+
+    def import_json(self, json_file):
+        """Importa (uma vez) um caso salvo no formato JSON legado. Duplicatas são ignoradas."""
+        return import_json_case(json_file, self)
 
     def get_full_case(self):
-        return self.data
+        return self.store.get_full_case()
 
     def nuke(self):
-        if os.path.exists(self.db_file):
-            os.remove(self.db_file)
-        self._load_db()
\ No newline at end of file
+        self.store.nuke()
+
+
+def import_json_case(json_file, case=None):
+    """
+    Carrega um arquivo de caso JSON (formato legado) para o CaseManager informado
+    (por padrão, o banco SQLite atual) em uma única transação.
+    Retorna quantos itens novos foram inseridos por coleção.
+    """
+    case = case or CaseManager()
+    with open(json_file, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    with case.batch():
+        if data.get("meta"):
+            case.store.set_meta(data["meta"])
+        return {
+            "entities": case.add_entities(data.get("entities", [])),
+            "infra": case.add_infras(data.get("infra", [])),
+            "relations": case.add_relations(data.get("relations", [])),
+        }
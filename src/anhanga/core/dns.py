@@ -0,0 +1,272 @@
+# Arquivo: anhanga/core/dns.py
+"""
+Async DNS resolution with a TTL-respecting cache.
+
+`get_resolver().resolve(host)` returns every A/AAAA record plus the CNAME chain
+without blocking the event loop. Answers are cached process-wide for their own TTL
+(clamped to [min_ttl, max_ttl]), NXDOMAIN for `negative_ttl`; concurrent lookups of
+the same name share one query, and a semaphore bounds how many are in flight, so a
+sweep over thousands of domains runs in parallel without flooding the resolver.
+
+Uses dnspython's asyncresolver when installed (needed for `nameservers`/`port`,
+e.g. a local stub resolver in tests); otherwise falls back to the loop's
+getaddrinfo (system resolver, no TTL: `fallback_ttl` is used).
+With the system configuration, /etc/hosts entries are honored like gethostbyname did.
+"""
+import asyncio
+import ipaddress
+import logging
+import os
+import socket
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from anhanga.core.config import ConfigManager
+
+try:
+    import dns.asyncresolver
+    import dns.resolver
+except ImportError:
+    dns = None
+
+logger = logging.getLogger(__name__)
+
+# Override with a "dns" block in config.json
+DEFAULT_DNS_SETTINGS = {
+    "nameservers": None,   # None = system configuration (/etc/resolv.conf)
+    "port": 53,
+    "timeout": 2.0,        # per nameserver attempt
+    "lifetime": 5.0,       # whole query, retries included
+    "concurrency": 256,    # lookups in flight per event loop
+    "aaaa": True,          # False = A records only (halves the queries of a big sweep)
+    "min_ttl": 30,
+    "max_ttl": 3600,
+    "negative_ttl": 60,    # NXDOMAIN / no address
+    "fallback_ttl": 300,   # getaddrinfo gives no TTL
+}
+
+_MAX_ENTRIES = 100_000
+
+
+def dns_settings(cfg: Optional[ConfigManager] = None) -> Dict[str, Any]:
+    settings = dict(DEFAULT_DNS_SETTINGS)
+    settings.update((cfg or ConfigManager()).get("dns") or {})
+    return settings
+
+
+def normalize_host(host: str) -> str:
+    return (host or "").strip().rstrip(".").lower()
+
+
+def _record(host: str, a=(), aaaa=(), cname=(), ttl: int = 0, status: str = "ok",
+            error: Optional[str] = None) -> Dict[str, Any]:
+    record = {
+        "host": host,
+        "addresses": list(a) + list(aaaa),  # IPv4 first
+        "a": list(a),
+        "aaaa": list(aaaa),
+        "cname": list(cname),
+        "ttl": ttl,
+        "status": status,
+    }
+    if error:
+        record["error"] = error
+    return record
+
+
+# --- Process-wide answer cache (shared by every loop / investigation) ---
+
+_cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+_cache_lock = threading.Lock()
+
+
+def _cache_get(host: str) -> Optional[Dict[str, Any]]:
+    with _cache_lock:
+        entry = _cache.get(host)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del _cache[host]
+            return None
+        return entry[1]
+
+
+def _cache_set(host: str, record: Dict[str, Any], ttl: float):
+    with _cache_lock:
+        if len(_cache) >= _MAX_ENTRIES:
+            _cache.clear()
+        _cache[host] = (time.monotonic() + ttl, record)
+
+
+def clear_dns_cache():
+    with _cache_lock:
+        _cache.clear()
+
+
+@lru_cache(maxsize=1)
+def _hosts_file() -> Dict[str, Tuple[List[str], List[str]]]:
+    """/etc/hosts entries ({name: (ipv4, ipv6)}): dnspython only talks DNS."""
+    if os.name == "nt":
+        path = os.path.join(os.environ.get("SystemRoot", r"C:\Windows"), r"System32\drivers\etc\hosts")
+    else:
+        path = "/etc/hosts"
+    entries: Dict[str, Tuple[List[str], List[str]]] = {}
+    try:
+        with open(path, encoding="utf-8", errors="ignore") as f:
+            lines = f.readlines()
+    except OSError:
+        return entries
+    for line in lines:
+        fields = line.split("#", 1)[0].split()
+        if len(fields) < 2:
+            continue
+        try:
+            version = ipaddress.ip_address(fields[0].split("%", 1)[0]).version
+        except ValueError:
+            continue
+        for name in fields[1:]:
+            a, aaaa = entries.setdefault(normalize_host(name), ([], []))
+            (a if version == 4 else aaaa).append(fields[0])
+    return entries
+
+
+class AsyncResolver:
+    """
+    Loop-bound resolver. `resolve` never raises: failures come back as
+    {"status": "error", "error": ...} (not cached) and unknown names as
+    {"status": "not_found"} (cached for `negative_ttl`).
+    """
+
+    def __init__(self, settings: Optional[Dict[str, Any]] = None):
+        self.settings = settings or dns_settings()
+        self._loop = asyncio.get_running_loop()
+        self._semaphore = asyncio.Semaphore(self.settings["concurrency"])
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._dns = self._build_resolver() if dns is not None else None
+        if self._dns is None and self.settings.get("nameservers"):
+            logger.warning("dnspython not installed: 'dns.nameservers' ignored, using the system resolver")
+
+    def _build_resolver(self):
+        nameservers = self.settings.get("nameservers")
+        resolver = dns.asyncresolver.Resolver(configure=not nameservers)
+        if nameservers:
+            resolver.nameservers = list(nameservers)
+            resolver.port = int(self.settings["port"])
+        resolver.timeout = float(self.settings["timeout"])
+        resolver.lifetime = float(self.settings["lifetime"])
+        return resolver
+
+    async def resolve(self, host: str) -> Dict[str, Any]:
+        host = normalize_host(host)
+        if not host:
+            return _record(host, status="error", error="empty hostname")
+        try:
+            ip = ipaddress.ip_address(host)
+        except ValueError:
+            pass
+        else:
+            return _record(host, a=[host]) if ip.version == 4 else _record(host, aaaa=[host])
+
+        if not self.settings.get("nameservers") and host in _hosts_file():
+            a, aaaa = _hosts_file()[host]
+            return _record(host, a, aaaa)
+
+        cached = _cache_get(host)
+        if cached is not None:
+            return cached
+
+        future = self._inflight.get(host)
+        if future is None:
+            future = self._inflight[host] = asyncio.ensure_future(self._lookup(host))
+            future.add_done_callback(lambda _f: self._inflight.pop(host, None))
+        return await asyncio.shield(future)
+
+    async def resolve_many(self, hosts: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """{host: record} for every distinct host, resolved concurrently."""
+        unique = list(dict.fromkeys(hosts))
+        records = await asyncio.gather(*(self.resolve(host) for host in unique))
+        return dict(zip(unique, records))
+
+    async def _lookup(self, host: str) -> Dict[str, Any]:
+        async with self._semaphore:
+            try:
+                if self._dns is not None:
+                    record = await self._lookup_dns(host)
+                else:
+                    record = await self._lookup_system(host)
+            except Exception as e:
+                return _record(host, status="error", error=str(e) or type(e).__name__)
+
+        if record["status"] == "ok":
+            ttl = min(max(record["ttl"], self.settings["min_ttl"]), self.settings["max_ttl"])
+        else:
+            ttl = self.settings["negative_ttl"]
+        _cache_set(host, record, ttl)
+        return record
+
+    async def _lookup_dns(self, host: str) -> Dict[str, Any]:
+        rdtypes = ("A", "AAAA") if self.settings.get("aaaa", True) else ("A",)
+        answers = await asyncio.gather(*(self._query(host, t) for t in rdtypes), return_exceptions=True)
+        if any(isinstance(a, dns.resolver.NXDOMAIN) for a in answers):
+            return _record(host, status="not_found")
+        failures = [a for a in answers if isinstance(a, BaseException)]
+        if len(failures) == len(answers):
+            raise failures[0]  # one family timing out still leaves the other usable
+
+        addresses: Dict[str, List[str]] = {"A": [], "AAAA": []}
+        cname: List[str] = []
+        ttls = []
+        for rdtype, answer in zip(rdtypes, answers):
+            if isinstance(answer, BaseException):
+                continue
+            chain = answer.chaining_result
+            if not cname:
+                cname = [str(rrset[0].target).rstrip(".") for rrset in chain.cnames]
+            if answer.rrset is not None:
+                addresses[rdtype] = [rdata.address for rdata in answer.rrset]
+                ttls.append(chain.minimum_ttl)
+
+        if not ttls:
+            return _record(host, cname=cname, status="not_found")
+        return _record(host, addresses["A"], addresses["AAAA"], cname, ttl=min(ttls))
+
+    async def _query(self, host: str, rdtype: str):
+        return await self._dns.resolve(host, rdtype, search=False, raise_on_no_answer=False)
+
+    async def _lookup_system(self, host: str) -> Dict[str, Any]:
+        try:
+            infos = await self._loop.getaddrinfo(
+                host, None, type=socket.SOCK_STREAM, flags=socket.AI_CANONNAME,
+            )
+        except socket.gaierror as e:
+            if e.errno in (socket.EAI_NONAME, getattr(socket, "EAI_NODATA", socket.EAI_NONAME)):
+                return _record(host, status="not_found")
+            raise
+
+        a, aaaa = {}, {}
+        canonical = None
+        for family, _type, _proto, canonname, sockaddr in infos:
+            canonical = canonical or canonname
+            if family == socket.AF_INET:
+                a[sockaddr[0]] = None
+            elif family == socket.AF_INET6:
+                aaaa[sockaddr[0]] = None
+        canonical = normalize_host(canonical or "")
+        cname = [canonical] if canonical and canonical != host else []
+        return _record(host, list(a), list(aaaa), cname, ttl=self.settings["fallback_ttl"])
+
+
+# --- Shared instance ---
+
+_resolver: Optional[AsyncResolver] = None
+
+
+def get_resolver() -> AsyncResolver:
+    """Returns the resolver bound to the running event loop, creating it on first use."""
+    global _resolver
+    loop = asyncio.get_running_loop()
+    if _resolver is None or _resolver._loop is not loop:
+        _resolver = AsyncResolver()
+    return _resolver
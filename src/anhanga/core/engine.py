@@ -1,31 +1,37 @@
 import logging
 import asyncio
-import os
-import requests
-import difflib
-import base64
-from datetime import datetime
-from typing import TypedDict, Annotated, List, Dict, Any, Optional
+import inspect
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import TypedDict, Annotated, List, Dict, Any, Optional, Iterable, AsyncIterator, Callable, Tuple, Union
 import operator
 
 from langgraph.graph import StateGraph, START, END
-from langgraph.checkpoint.memory import MemorySaver
 from rich.console import Console
 
 # Import Modules
 from anhanga.modules.fincrime.pix_decoder import PixIntelligence
 from anhanga.modules.crypto.wallet_hunter import WalletHunter
 from anhanga.modules.fincrime.compliance.validator import BetCompliance
+from anhanga.modules.fincrime.matcher import get_operator_matcher, similarity, MATCH_THRESHOLD
 from anhanga.modules.infra.hunter import InfraModule
+from anhanga.modules.infra import providers
 from anhanga.core.config import ConfigManager
-try:
-    import whois
-except ImportError:
-    whois = None
-try:
-    import shodan
-except ImportError:
-    shodan = None
+from anhanga.core.browser import get_browser_pool, close_browser_pool, BrowserUnavailable
+from anhanga.core.blobs import get_blob_store
+from anhanga.core.cache import CacheView, get_enrichment_cache, MODE_DEFAULT
+from anhanga.core.checkpoint import (
+    BACKEND_MEMORY, checkpoint_settings, close_checkpoint_store, get_checkpoint_store, memory_saver,
+    new_thread_id, target_thread_id,
+)
+from anhanga.core.http import close_http_client
+from anhanga.core.metrics import OUTCOME_ERROR, OUTCOME_THROTTLED, OUTCOME_TIMEOUT, instrument_node, track_call
+from anhanga.core.page import (
+    RENDER_ALWAYS, RENDER_MODES, RENDER_NEVER, fetch_static, load_html, page_handle,
+    static_is_sufficient,
+)
+from anhanga.core.ratelimit import RateLimitError, priority_scope, wait_for
+from anhanga.modules.crypto.enrichment import get_wallet_enricher
 
 # Configure Logging
 logging.basicConfig(level=logging.ERROR) 
@@ -33,240 +39,327 @@ logger = logging.getLogger(__name__)
 
 # --- DEFINITIONS ---
 
+def merge_dicts(left: Optional[Dict[str, Any]], right: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Reducer for nested dict channels: parallel branches may each write part of
+    the same dict in one superstep, so updates are merged recursively (right wins on leaves).
+    """
+    if left is None:
+        return right
+    if right is None:
+        return left
+    merged = dict(left)
+    for key, value in right.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_dicts(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+def merge_counters(left: Optional[Dict[str, Any]], right: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Reducer for stats channels: numeric leaves are summed, anything else is replaced."""
+    if not left:
+        return right
+    if not right:
+        return left
+    merged = dict(left)
+    for key, value in right.items():
+        current = merged.get(key)
+        if isinstance(value, dict) and isinstance(current, dict):
+            merged[key] = merge_counters(current, value)
+        elif isinstance(value, (int, float)) and isinstance(current, (int, float)) and not isinstance(value, bool):
+            merged[key] = current + value
+        else:
+            merged[key] = value
+    return merged
+
 class AgentState(TypedDict):
+    # Nodes return partial updates. Channels written by more than one branch
+    # need a reducer; single-writer channels keep last-value semantics.
     url: str
-    html: Optional[str]
+    html_blob: Optional[str] # Handle of the analyzed HTML (core/blobs.py), never the HTML itself
     headers: Dict[str, Any]
     protection_type: str 
-    screenshot_path: Optional[str]
+    screenshot_blob: Optional[str]
+    screenshot_path: Optional[str] # File of the screenshot blob (PNG stored raw)
     status: str 
     retry_count: int
-    errors: List[str]
-    financial_intel: Dict[str, Any] 
+    errors: Annotated[List[str], operator.add]
+    financial_intel: Annotated[Dict[str, Any], merge_dicts]
     compliance_result: Optional[Dict[str, Any]]
-    infra_data: Optional[Dict[str, Any]] # New Field for Rich Infra Data
+    infra_data: Annotated[Optional[Dict[str, Any]], merge_dicts] # New Field for Rich Infra Data
+    cache_mode: str # "default" | "refresh" | "off" (see core/cache.py)
+    cache_stats: Annotated[Optional[Dict[str, Any]], merge_counters]
+    page: Annotated[Optional[Dict[str, Any]], merge_dicts] # Page artifacts (core/page.py): fetched/rendered once
+    render_mode: str # "always" | "never" | "auto"
+    metrics: Annotated[Optional[Dict[str, Any]], merge_dicts] # Per-node timings / provider calls (core/metrics.py)
 
 # --- NODES ---
 
-def infra_hunter_node(state: AgentState) -> AgentState:
+def _parse_infra_results(results: List[Dict[str, Any]], infra_data: Dict[str, Any]):
+    """Maps InfraModule evidences into the structured infra_data dict."""
+    for res in results:
+        title = res.get("title")
+        content = res.get("content")
+        
+        if title == "Endereço IP":
+            infra_data["ip"] = [ip for ip in content.split(", ") if ip != "N/A"]
+        elif title == "CNAME":
+            infra_data["cname"] = content.split(" -> ")
+        elif "Scraping:" in title:
+            tech_name = title.replace("Scraping: ", "")
+            if "E-mails" in tech_name:
+                infra_data["emails"].extend(content.split(", "))
+            else:
+                infra_data["tech"].append(f"{tech_name}: {content}")
+        elif title == "Favicon Hash":
+            infra_data["favicon_hash"] = content
+        elif title == "VirusTotal":
+            # IP reputation verdict; infra_data["virustotal"] holds the URL stats
+            infra_data["virustotal_ip"] = content
+
+# Page fields owned by the browser render: a static fetch running alongside it
+# (the "always" infra branch) must not reset them
+_RENDER_FIELDS = ("rendered_blob", "rendered", "final_url")
+
+async def _fetch_page(url: str, render_fields: bool = True) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Static download of the target: (page artifacts, state update carrying them)."""
+    with track_call("page"):
+        page = await fetch_static(url)
+    shared = page if render_fields else {k: v for k, v in page.items() if k not in _RENDER_FIELDS}
+    update = {"page": shared, "headers": page["headers"], "errors": []}
+    if page["fetch_error"]:
+        update["errors"].append(f"FetchPage Error: {page['fetch_error']}")
+    return page, update
+
+async def fetch_page_node(state: AgentState) -> Dict[str, Any]:
+    """
+    Static download of the target, shared by every consumer through the `page` channel
+    (dirty scrape, favicon, and - unless rendered - PIX/wallet extraction).
+    Runs ahead of the scraper in "never"/"auto"; in "always" infra_hunter fetches instead.
+    """
+    _, update = await _fetch_page(state["url"])
+    return update
+
+async def infra_hunter_node(state: AgentState) -> Dict[str, Any]:
     """
     Checks infrastructure using Heavy Infra logic (Ported from v2).
+    InfraModule and the external lookups (Whois, Shodan, VirusTotal, URLScan) run
+    concurrently, each bounded by its own timeout, so the node takes roughly as
+    long as the slowest provider instead of the sum of all of them.
+    In "always" render mode the node starts alongside the browser and does the
+    static fetch itself, so neither branch waits on the other.
     """
     url = state["url"]
-    
-    # Initialize defaults
-    state.setdefault("retry_count", 0)
-    state.setdefault("errors", [])
-    state.setdefault("screenshot_path", None)
-    state.setdefault("financial_intel", {"risk_score": 0, "flags": [], "pix_data": [], "crypto_data": []})
-    state.setdefault("compliance_result", None)
-    state.setdefault("infra_data", {})
+    page = state.get("page")
+    update: Dict[str, Any] = {"errors": []}
+    if page is None:
+        page, update = await _fetch_page(url, render_fields=False)
+    errors = update["errors"]
+    infra_data = {}
+    cache = CacheView(get_enrichment_cache(), state.get("cache_mode") or MODE_DEFAULT)
     
     try:
-        # 1. Run Heavy Infra Module
-        infra_module = InfraModule()
-        infra_module.run(url)
-        results = infra_module.get_results()
-        
-        # 2. Parse Results into structured infra_data
+        cfg = ConfigManager()
         infra_data = {
-            "ip": "N/A",
+            "ip": [],     # every A/AAAA record, IPv4 first
+            "cname": [],
             "tech": [],
             "emails": [],
             "favicon_hash": None,
-            "virustotal": None,
-            "virustotal": None,
+            "virustotal": None,      # URL stats (engine lookup)
+            "virustotal_ip": None,   # IP verdict (InfraModule)
             "whois": {"registrar": "N/A", "creation_date": "N/A"},
             "shodan": {"ports": [], "tags": []},
             "urlscan": {"report_url": "N/A"}
         }
-        
-        for res in results:
-            title = res.get("title")
-            content = res.get("content")
-            
-            if title == "Endereço IP":
-                infra_data["ip"] = content
-            elif "Scraping:" in title:
-                tech_name = title.replace("Scraping: ", "")
-                if "E-mails" in tech_name:
-                    infra_data["emails"].extend(content.split(", "))
-                else:
-                    infra_data["tech"].append(f"{tech_name}: {content}")
-            elif title == "Favicon Hash":
-                infra_data["favicon_hash"] = content
-            elif title == "VirusTotal":
-                infra_data["virustotal"] = content
-        
-        state["infra_data"] = infra_data
 
-        # --- EXTERNAL ENRICHMENT ---
-        # --- EXTERNAL ENRICHMENT ---
-        cfg = ConfigManager()
-        target_ip = infra_data.get("ip")
-        
-        # 1. Whois Lookup (Native)
-        try:
-            # Robust extraction: remove protocol and path
-            domain = url.split("//")[-1].split("/")[0]
-            w = whois.whois(domain)
-            state["infra_data"]["whois"] = {
-                "registrar": w.registrar,
-                "creation_date": str(w.creation_date[0] if isinstance(w.creation_date, list) else w.creation_date),
-                "org": w.org
-            }
-        except Exception as e:
-            # Capturing generic exception including PywhoisError if generic
-            state["errors"].append(f"Whois Error: {e}")
-            
-        # 2. Shodan Lookup (API)
-        if target_ip and target_ip != "N/A":
-            if shodan_key := cfg.get_key("shodan"):
+        async def call(label: str, provider: str, func, *args, cache_key: Optional[str] = None):
+            # HTTP providers are coroutines on the shared client (cancelled on timeout).
+            # Blocking libs (whois, shodan) run in worker threads; a timed-out thread is
+            # abandoned, not killed: its result is simply ignored.
+            # Time spent waiting on the rate limiter doesn't count against the timeout.
+            timeout = providers.provider_timeout(provider, cfg)
+            job = partial(func, *args)
+            if inspect.iscoroutinefunction(func):
+                if cache_key is not None:
+                    pending = cache.aget_or_fetch(provider, cache_key, job, providers.is_not_found)
+                else:
+                    pending = job()
+            else:
+                if cache_key is not None:
+                    job = partial(cache.get_or_fetch, provider, cache_key, job, providers.is_not_found)
+                pending = asyncio.to_thread(job)
+            with track_call(provider) as tracked:
                 try:
-                    api = shodan.Shodan(shodan_key)
-                    # Use timeout or safe call if possible, but Shodan lib handles most
-                    host = api.host(target_ip)
-                    state["infra_data"]["shodan"] = {
-                        "ports": host.get("ports", []),
-                        "org": host.get("org", "Unknown"),
-                        "tags": host.get("tags", []),
-                        "vulns": list(host.get("vulns", []))
-                    }
+                    return await wait_for(pending, timeout)
+                except asyncio.TimeoutError:
+                    tracked.outcome = OUTCOME_TIMEOUT
+                    errors.append(f"{label} Error: timeout after {timeout:.0f}s")
+                except RateLimitError as e:
+                    tracked.outcome = OUTCOME_THROTTLED
+                    errors.append(f"{label} Error: {e}")
                 except Exception as e:
-                    state["errors"].append(f"Shodan Error: {e}")
+                    tracked.outcome = OUTCOME_ERROR
+                    errors.append(f"{label} Error: {e}")
+            return None
+
+        # 1. Heavy Infra Module, then Shodan (needs the resolved IP)
+        async def infra_and_shodan():
+            infra_module = InfraModule(cache=cache)
+            await call("InfraHunter", "infra", infra_module.run_async, url, page)
+            _parse_infra_results(infra_module.get_results(), infra_data)
+
+            ips = infra_data.get("ip") or []
+            if ips:
+                target_ip = ips[0]
+                if shodan_key := cfg.get_key("shodan"):
+                    if host := await call("Shodan", "shodan", providers.lookup_shodan, target_ip, shodan_key, cache_key=target_ip):
+                        infra_data["shodan"] = host
+
+        # 2. Whois Lookup (Native)
+        async def whois_lookup():
+            domain = providers.extract_domain(url)
+            if w_data := await call("Whois", "whois", providers.lookup_whois, domain, cache_key=domain):
+                infra_data["whois"] = w_data
 
         # 3. VirusTotal Integration
-        if vt_key := cfg.get_key("virustotal"):
-            try:
-                # VT requires base64 URL ID (urlsafe, no padding)
-                url_id = base64.urlsafe_b64encode(url.encode()).decode().strip("=")
-                vt_url = f"https://www.virustotal.com/api/v3/urls/{url_id}"
-                headers = {"x-apikey": vt_key}
-                
-                vt_res = requests.get(vt_url, headers=headers, timeout=15)
-                if vt_res.status_code == 200:
-                    vt_json = vt_res.json()
-                    stats = vt_json.get("data", {}).get("attributes", {}).get("last_analysis_stats", {})
-                    state["infra_data"]["virustotal"] = stats
-                elif vt_res.status_code == 404:
-                    # URL not found in VT
-                    state["infra_data"]["virustotal"] = {"status": "not_found"}
-            except Exception as e:
-                state["errors"].append(f"VirusTotal Error: {e}")
+        async def virustotal_lookup():
+            if vt_key := cfg.get_key("virustotal"):
+                timeout = providers.provider_timeout("virustotal", cfg)
+                if stats := await call("VirusTotal", "virustotal", providers.lookup_virustotal_url, url, vt_key, timeout, cache_key=url):
+                    infra_data["virustotal"] = stats
 
         # 4. URLScan.io Submission
-        urlscan_key = cfg.get_key("urlscan")
-        if urlscan_key:
-            try:
-                # Check previous implementation compatibility
-                headers = {'API-Key': urlscan_key,'Content-Type': 'application/json'}
-                data = {"url": url, "visibility": "public"}
-                u_res = requests.post('https://urlscan.io/api/v1/scan/', headers=headers, json=data, timeout=15)
-                if u_res.status_code == 200:
-                    u_data = u_res.json()
-                    if "urlscan" not in state["infra_data"]:
-                         state["infra_data"]["urlscan"] = {}
-                    state["infra_data"]["urlscan"]["report_url"] = u_data.get("result", "N/A")
-            except Exception as e:
-                state["errors"].append(f"URLScan Error: {str(e)}")
-
-        state["protection_type"] = "Unknown"
+        async def urlscan_submit():
+            if urlscan_key := cfg.get_key("urlscan"):
+                timeout = providers.provider_timeout("urlscan", cfg)
+                if report_url := await call("URLScan", "urlscan", providers.submit_urlscan, url, urlscan_key, timeout, cache_key=url):
+                    infra_data["urlscan"]["report_url"] = report_url
+
+        await asyncio.gather(infra_and_shodan(), whois_lookup(), virustotal_lookup(), urlscan_submit())
             
     except Exception as e:
-        state["errors"].append(f"InfraHunter Error: {str(e)}")
-        state["protection_type"] = "Unknown" 
+        errors.append(f"InfraHunter Error: {str(e)}")
         
-    return state
+    update.update({"infra_data": infra_data, "protection_type": "Unknown", "cache_stats": cache.stats()})
+    return update
 
-async def stealth_scraper_node(state: AgentState) -> AgentState:
+async def stealth_scraper_node(state: AgentState) -> Dict[str, Any]:
     """
     Stealth Scraper: Uses AsyncCamoufox for ALL targets.
-    Ensures screenshots are always taken.
+    Pages come from the shared BrowserPool, so the browser startup is paid once per batch.
+    Ensures screenshots are always taken when the page is rendered.
+    With render_mode "never" (or "auto" and a self-sufficient static page) the
+    browser is skipped and the static HTML is used instead.
     """
     url = state["url"]
-    
-    try:
-        from camoufox.async_api import AsyncCamoufox
-    except ImportError:
-        msg = "Camoufox library not found."
-        state["errors"].append(msg)
-        state["status"] = "failed"
-        return state
+    page_artifacts = state.get("page") or {}
+    render_mode = state.get("render_mode") or RENDER_ALWAYS
+
+    if render_mode != RENDER_ALWAYS:
+        skip = render_mode == RENDER_NEVER or await asyncio.to_thread(static_is_sufficient, page_artifacts)
+        if skip:
+            static_blob = page_artifacts.get("static_blob")
+            if static_blob is None:
+                return {"status": "failed", "errors": ["StealthScraper Error: no static HTML and rendering disabled"]}
+            return {"html_blob": static_blob, "status": "success"}
 
     try:
-        async with AsyncCamoufox(headless=True) as browser:
-            page = await browser.new_page()
-            
-            # Stealth navigation
-            await page.goto(url, timeout=60000, wait_until="domcontentloaded")
-            await page.wait_for_load_state("networkidle", timeout=15000)
-            
-            # Screenshot Logic
-            screenshots_dir = "screenshots"
-            if not os.path.exists(screenshots_dir):
-                os.makedirs(screenshots_dir)
+        pool = get_browser_pool()
+        with track_call("browser") as tracked:
+            async with pool.page() as page:
+                # Stealth navigation
+                await page.goto(url, timeout=60000, wait_until="domcontentloaded")
+                await page.wait_for_load_state("networkidle", timeout=15000)
                 
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            safe_url = "".join(c if c.isalnum() else "_" for c in url)[:50]
-            screenshot_path = os.path.join(screenshots_dir, f"{safe_url}_{timestamp}.png")
-            
-            await page.screenshot(path=screenshot_path)
-            state["screenshot_path"] = screenshot_path
+                # Screenshot + DOM go to the blob store; the state only keeps the handles
+                png = await page.screenshot()
+                content = await page.content()
+                final_url = page.url
+            tracked.bytes += len(png) + len(content.encode("utf-8", "surrogatepass"))
 
-            content = await page.content()
-            state["html"] = content
-            state["status"] = "success"
+        blobs = get_blob_store()
+        screenshot_blob = await asyncio.to_thread(blobs.put, png, "png")
+        html_blob = await asyncio.to_thread(blobs.put_text, content)
+        return {
+            "html_blob": html_blob,
+            "screenshot_blob": screenshot_blob,
+            "screenshot_path": blobs.path(screenshot_blob),
+            "status": "success",
+            "page": {"rendered_blob": html_blob, "rendered": True, "final_url": final_url},
+        }
+
+    except BrowserUnavailable as e:
+        return {"status": "failed", "errors": [f"StealthScraper Error: {str(e)}"]}
             
     except Exception as e:
-        state["errors"].append(f"StealthScraper Error: {str(e)}")
-        state["status"] = "failed"
-        state["retry_count"] += 1
-        
-    return state
+        return {
+            "status": "failed",
+            "retry_count": (state.get("retry_count") or 0) + 1,
+            "errors": [f"StealthScraper Error: {str(e)}"]
+        }
 
-def compliance_check_node(state: AgentState) -> AgentState:
+def compliance_check_node(state: AgentState) -> Dict[str, Any]:
     """
     Checks if the site is Authorized/Illegal using BetCompliance.
     """
     url = state["url"]
     
     try:
-        # Initialize Compliance Checker (loads bets_db.json)
-        checker = BetCompliance()
+        # Shared Compliance Checker (bets_db.json parsed once per process, reloaded on change)
+        checker = BetCompliance.shared()
         result = checker.check_compliance(url)
         
-        state["compliance_result"] = {
-            "status": result.get("status", "UNKNOWN"),
-            "operator": result.get("operator"),
-            "auth_type": result.get("auth_type"),
-            "brand": result.get("brand")
+        return {
+            "compliance_result": {
+                "status": result.get("status", "UNKNOWN"),
+                "operator": result.get("operator"),
+                "auth_type": result.get("auth_type"),
+                "brand": result.get("brand")
+            }
         }
         
     except Exception as e:
-        state["errors"].append(f"Compliance Error: {str(e)}")
-        
-    return state
+        return {"errors": [f"Compliance Error: {str(e)}"]}
 
-def financial_analysis_node(state: AgentState) -> AgentState:
-    """
-    Extracts PIX/Crypto and performs 'Orange Check'.
-    """
-    html = state.get("html", "")
+def _extract_financial(handle: Optional[str]):
+    # HTML is only loaded here, for the duration of the extraction
+    html = load_html(handle)
     if not html:
-        state["errors"].append("No HTML content to analyze.")
-        return state
-        
+        return None
+
     # Initialize Modules
     pix_module = PixIntelligence()
     wallet_module = WalletHunter()
-    
+
     # Run Extraction
-    pix_results = pix_module.run(html)
-    crypto_results = wallet_module.run(html)
-    
-    # Store Raw Data
-    state["financial_intel"]["pix_data"] = pix_results["decoded"]
-    state["financial_intel"]["crypto_data"] = crypto_results
+    return pix_module.run(html), wallet_module.run(html)
+
+
+async def financial_analysis_node(state: AgentState) -> Dict[str, Any]:
+    """
+    Extracts PIX/Crypto and performs 'Orange Check'.
+    Joins the scraper and compliance branches (needs both HTML and the operator).
+    """
+    # Rendered DOM if we have it, else the static response (e.g. browser failed)
+    handle = page_handle(state.get("page")) or state.get("html_blob")
+    # Blob read + regex work stay off the event loop so parallel investigations keep moving
+    extracted = await asyncio.to_thread(_extract_financial, handle)
+    if extracted is None:
+        return {"errors": ["No HTML content to analyze."]}
+    pix_results, crypto_results = extracted
+
+    # --- WALLET BALANCES (batched, rate-limited, cached per address) ---
+    cache = CacheView(get_enrichment_cache(), state.get("cache_mode") or MODE_DEFAULT)
+    balances = await get_wallet_enricher().enrich(
+        ((w["address"], w["coin"]) for w in crypto_results), cache=cache
+    )
+    errors = []
+    for wallet in crypto_results:
+        wallet["balance"] = balances.get(wallet["address"])
+        if wallet["balance"] and wallet["balance"].get("status") == "error":
+            errors.append(f"Balance lookup failed for {wallet['address']}: {wallet['balance']['error']}")
     
     # --- ORANGE CHECK (LARANJA DETECTION) ---
     risk_score = 0
@@ -275,79 +368,270 @@ def financial_analysis_node(state: AgentState) -> AgentState:
     # Get Authorized Operator from AgentSate
     compliance_result = state.get("compliance_result") or {}
     operator_name = compliance_result.get("operator") 
-    
-    match_score = 1.0 
-    
-    if operator_name:
-        for pix in pix_results["decoded"]:
-            pix_name = pix.get("beneficiary_name")
-            if pix_name:
-                # Fuzzy Match
-                similarity = difflib.SequenceMatcher(None, operator_name.lower(), pix_name.lower()).ratio()
-                
-                if similarity < 0.6:
-                    flags.append(f"Mismatch: Operator '{operator_name}' vs PIX '{pix_name}' (Score: {similarity:.2f})")
-                    risk_score += 50 
-                    match_score = min(match_score, similarity) 
-                else:
-                    flags.append(f"Verified: Operator '{operator_name}' matches PIX '{pix_name}' (Score: {similarity:.2f})")
 
-    state["financial_intel"]["risk_score"] = risk_score
-    state["financial_intel"]["flags"] = flags
-    
-    return state
+    # Every beneficiary is matched against ALL authorized operators and brands
+    named = [pix for pix in pix_results["decoded"] if pix.get("beneficiary_name")]
+    best_matches = get_operator_matcher().match_many(pix["beneficiary_name"] for pix in named)
+
+    for pix, best in zip(named, best_matches):
+        pix_name = pix["beneficiary_name"]
+        pix["operator_match"] = best
+        strong = best if best and best["score"] >= MATCH_THRESHOLD else None
+
+        if operator_name:
+            # Site is authorized: the money must go to its own operator (or one of its brands)
+            score = similarity(operator_name, pix_name)
+            if best and best["operator"] == operator_name:
+                score = max(score, best["score"])
+
+            if score < MATCH_THRESHOLD:
+                flag = f"Mismatch: Operator '{operator_name}' vs PIX '{pix_name}' (Score: {score:.2f})"
+                if strong:
+                    flag += f" - PIX matches another authorized operator '{strong['operator']}'"
+                flags.append(flag)
+                risk_score += 50 
+            else:
+                flags.append(f"Verified: Operator '{operator_name}' matches PIX '{pix_name}' (Score: {score:.2f})")
+        elif strong:
+            # Unlicensed site collecting in the name of an authorized operator
+            flags.append(
+                f"Impersonation: PIX '{pix_name}' matches authorized {strong['kind']} "
+                f"'{strong['name']}' ({strong['operator']}) (Score: {strong['score']:.2f})"
+            )
+
+    return {
+        "financial_intel": {
+            "pix_data": pix_results["decoded"],
+            "crypto_data": crypto_results,
+            "risk_score": risk_score,
+            "flags": flags
+        },
+        "errors": errors,
+        "cache_stats": cache.stats(),
+    }
 
 
 # --- GRAPH CONSTRUCTION ---
 
 workflow = StateGraph(AgentState)
 
-# Add Nodes
-workflow.add_node("infra_hunter", infra_hunter_node)
-workflow.add_node("stealth_scraper", stealth_scraper_node)
-workflow.add_node("compliance_check", compliance_check_node)
-workflow.add_node("financial_analysis", financial_analysis_node)
-
-# Add Edges: Simple Linear Flow
-workflow.add_edge(START, "infra_hunter")
-workflow.add_edge("infra_hunter", "stealth_scraper") # FORCE STEALTH
-workflow.add_edge("stealth_scraper", "compliance_check")
-workflow.add_edge("compliance_check", "financial_analysis")
-workflow.add_edge("financial_analysis", END)
+# Add Nodes (each one timed into the `metrics` channel)
+for _name, _node in (
+    ("fetch_page", fetch_page_node),
+    ("infra_hunter", infra_hunter_node),
+    ("stealth_scraper", stealth_scraper_node),
+    ("compliance_check", compliance_check_node),
+    ("financial_analysis", financial_analysis_node),
+):
+    workflow.add_node(_name, instrument_node(_name, _node))
 
-# Persistence
-memory = MemorySaver()
+def _route_start(state: AgentState) -> List[str]:
+    # "always": the browser doesn't need the static fetch, so every branch starts
+    # right away (infra_hunter fetches the page itself). Nodes of one superstep wait
+    # for each other, so infra must not hang off a node that runs beside the browser.
+    if (state.get("render_mode") or RENDER_ALWAYS) == RENDER_ALWAYS:
+        return ["infra_hunter", "stealth_scraper", "compliance_check"]
+    # "never"/"auto": the scraper decides from the static HTML
+    return ["fetch_page", "compliance_check"]
 
-# Compilation
-investigation_graph = workflow.compile(checkpointer=memory)
+# Add Edges: Fan-out / Fan-in
+# The page is fetched once; infra reads it, compliance needs only the URL.
+workflow.add_conditional_edges(START, _route_start, ["fetch_page", "infra_hunter", "stealth_scraper", "compliance_check"])
+workflow.add_edge("fetch_page", "infra_hunter")
+workflow.add_edge("fetch_page", "stealth_scraper")
+# financial_analysis waits for BOTH the HTML and the compliance verdict
+workflow.add_edge(["stealth_scraper", "compliance_check"], "financial_analysis")
+workflow.add_edge("infra_hunter", END)
+workflow.add_edge("financial_analysis", END)
+
+# Compilation (in-memory checkpoints). The runners compile against the store
+# chosen for the run instead (core/checkpoint.py: memory or SQLite).
+investigation_graph = workflow.compile(checkpointer=memory_saver)
 
 # --- EXECUTION HELPERS ---
 
-async def run_investigation_async(url: str, thread_id: str = "1") -> Dict[str, Any]:
+def _resolve_render_mode(render_mode: Optional[str]) -> str:
+    render_mode = render_mode or ConfigManager().get("render_mode") or RENDER_ALWAYS
+    if render_mode not in RENDER_MODES:
+        raise ValueError(f"Unknown render mode: {render_mode}")
+    return render_mode
+
+async def run_investigation_async(url: str, thread_id: Optional[str] = None,
+                                  cache_mode: str = MODE_DEFAULT,
+                                  render_mode: Optional[str] = None,
+                                  run_id: Optional[str] = None,
+                                  priority: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Runs one target through the graph. With `run_id` the target gets a deterministic
+    thread, so re-running the same run resumes an interrupted investigation from its
+    last checkpoint instead of starting over. Checkpoints are pruned once it finishes.
+    `priority` (core/ratelimit.py, lower = sooner) orders its provider calls against
+    those of concurrent investigations when a provider is rate limited.
+    """
     initial_state = {
         "url": url,
-        "html": None,
+        "html_blob": None,
         "headers": {},
         "protection_type": None,
+        "screenshot_blob": None,
         "screenshot_path": None,
         "status": "pending",
         "retry_count": 0,
         "errors": [],
         "financial_intel": {"risk_score": 0, "flags": [], "pix_data": [], "crypto_data": []},
         "compliance_result": None,
-        "infra_data": None
+        "infra_data": None,
+        "cache_mode": cache_mode,
+        "cache_stats": None,
+        "page": None,
+        "render_mode": _resolve_render_mode(render_mode),
+        "metrics": None,
     }
     
+    store = await get_checkpoint_store()
+    graph = store.compile(workflow)
+    if thread_id is None:
+        thread_id = target_thread_id(url, run_id) if run_id else new_thread_id(url)
     config = {"configurable": {"thread_id": thread_id}}
     
+    finished = False
     try:
-        result_state = await investigation_graph.ainvoke(initial_state, config=config)
+        with priority_scope(priority):
+            snapshot = await graph.aget_state(config) if run_id else None
+            if snapshot is not None and snapshot.values:
+                # Checkpointed by an earlier (interrupted) run: only the missing nodes run
+                result_state = await graph.ainvoke(None, config=config) if snapshot.next else snapshot.values
+            else:
+                result_state = await graph.ainvoke(initial_state, config=config)
+        await store.finish(thread_id, url, run_id)
+        finished = True
         return result_state
     except Exception as e:
         # Fallback to prevent crash
         initial_state["status"] = "failed"
         initial_state["errors"].append(str(e))
         return initial_state
+    finally:
+        # Durable checkpoints of an unfinished target are kept for the resume
+        if not finished and not store.durable:
+            await store.discard(thread_id)
+
+Target = Union[str, Tuple[str, Optional[int]]]  # url, or (url, priority)
+
+def _target(item: Target) -> Tuple[str, Optional[int]]:
+    return (item, None) if isinstance(item, str) else item
+
+async def run_investigations_async(urls: Iterable[Target], concurrency: int = 10,
+                                   cache_mode: str = MODE_DEFAULT,
+                                   render_mode: Optional[str] = None,
+                                   run_id: Optional[str] = None,
+                                   checkpoint_db: Optional[str] = None,
+                                   on_skip: Optional[Callable[[str], None]] = None) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Bulk mode: pushes many targets through investigation_graph with at most
+    `concurrency` investigations in flight, each on its own thread_id.
+    Yields every final state as soon as it finishes (completion order, not input order).
+    `urls` is consumed lazily, so it can be a file or stdin iterator. Items may be
+    (url, priority) pairs: higher-priority targets get rate-limited providers first.
+    Priority only reorders calls among the investigations already in flight; targets
+    are still admitted in input order, so a high-priority line waits for a free slot.
+
+    `run_id` names the sweep so it can be resumed: checkpoints go to SQLite
+    (`checkpoint_db`, or the configured path), targets already finished in that run
+    are skipped (reported through `on_skip`), interrupted ones pick up where they stopped.
+    """
+    if concurrency < 1:
+        raise ValueError("concurrency must be >= 1")
+    render_mode = _resolve_render_mode(render_mode)
+    if run_id and checkpoint_db is None and checkpoint_settings()["backend"] == BACKEND_MEMORY:
+        checkpoint_db = checkpoint_settings()["path"]  # a resumable run needs durable checkpoints
+    store = await get_checkpoint_store(checkpoint_db)
+
+    targets = iter(urls)
+    end = object()
+    pending = set()
+    reader = None  # in-flight read of the next target
+    exhausted = False
+
+    try:
+        while True:
+            # `urls` may block (slow stdin, file on a network share): read it in a worker
+            # thread, waited on alongside the scans, so finished ones are yielded meanwhile
+            if reader is None and not exhausted and len(pending) < concurrency:
+                reader = asyncio.create_task(asyncio.to_thread(next, targets, end))
+
+            waiting = pending | {reader} if reader else pending
+            if not waiting:
+                break
+
+            done, _ = await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
+            if reader in done:
+                done.discard(reader)
+                item, reader = reader.result(), None
+                if item is end:
+                    exhausted = True
+                else:
+                    url, priority = _target(item)
+                    if run_id and await store.is_completed(target_thread_id(url, run_id)):
+                        if on_skip:
+                            on_skip(url)
+                    else:
+                        pending.add(asyncio.create_task(
+                            run_investigation_async(url, cache_mode=cache_mode, render_mode=render_mode,
+                                                    run_id=run_id, priority=priority)
+                        ))
+
+            pending -= done
+            for task in done:
+                yield task.result()
+    finally:
+        # Consumer stopped early (break / Ctrl+C): don't leave orphan scans running
+        if reader:
+            pending.add(reader)
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+def run_investigation(url: str, thread_id: Optional[str] = None, cache_mode: str = MODE_DEFAULT,
+                      render_mode: Optional[str] = None) -> Dict[str, Any]:
+    async def _runner() -> Dict[str, Any]:
+        try:
+            return await run_investigation_async(url, thread_id, cache_mode=cache_mode, render_mode=render_mode)
+        finally:
+            await close_browser_pool()
+            await close_http_client()
+            await close_checkpoint_store()
+
+    return asyncio.run(_runner())
+
+def run_investigations(urls: Iterable[Target], concurrency: int = 10,
+                       on_result: Optional[Callable[[Dict[str, Any]], None]] = None,
+                       cache_mode: str = MODE_DEFAULT, render_mode: Optional[str] = None,
+                       run_id: Optional[str] = None, checkpoint_db: Optional[str] = None,
+                       on_skip: Optional[Callable[[str], None]] = None) -> int:
+    """
+    Sync wrapper for bulk mode. Calls `on_result` for each finished state and
+    returns how many targets were processed (skipped targets of a resumed run not included).
+    """
+    async def _runner() -> int:
+        # Sync nodes run on the loop's default executor; size it for the batch
+        # so blocking lookups don't become the concurrency ceiling.
+        loop = asyncio.get_running_loop()
+        loop.set_default_executor(ThreadPoolExecutor(max_workers=max(32, concurrency * 4)))
+
+        count = 0
+        try:
+            async for state in run_investigations_async(urls, concurrency=concurrency, cache_mode=cache_mode,
+                                                        render_mode=render_mode, run_id=run_id,
+                                                        checkpoint_db=checkpoint_db, on_skip=on_skip):
+                count += 1
+                if on_result:
+                    on_result(state)
+        finally:
+            await close_browser_pool()
+            await close_http_client()
+            await close_checkpoint_store()
+        return count
 
-def run_investigation(url: str, thread_id: str = "1") -> Dict[str, Any]:
-    return asyncio.run(run_investigation_async(url, thread_id))
\ No newline at end of file
+    return asyncio.run(_runner())
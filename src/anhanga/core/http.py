@@ -0,0 +1,163 @@
+# Arquivo: anhanga/core/http.py
+"""
+Shared HTTP layer: keep-alive connection pools reused across modules and investigations.
+
+Async code uses `get_http_client()` (httpx, HTTP/2 when `h2` is installed; falls back
+to the pooled requests.Session in worker threads). Sync code uses `get_session()`.
+Either way, a batch pays the TCP+TLS handshake once per host instead of once per request.
+"""
+import asyncio
+import threading
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from anhanga.core.config import ConfigManager
+from anhanga.core.metrics import note_transfer
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+except ImportError:
+    h2 = None
+
+# Override with an "http" block in config.json
+DEFAULT_HTTP_SETTINGS = {
+    "max_connections": 100,            # global, across every host
+    "max_keepalive_connections": 20,   # idle connections kept open
+    "max_per_host": 6,                 # concurrent requests to one host
+    "keepalive_expiry": 30.0,
+    "http2": True,
+    "timeout": 15.0,
+}
+
+DEFAULT_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+
+
+def http_settings(cfg: Optional[ConfigManager] = None) -> Dict[str, Any]:
+    settings = dict(DEFAULT_HTTP_SETTINGS)
+    settings.update((cfg or ConfigManager()).get("http") or {})
+    return settings
+
+
+# --- Sync: one pooled requests.Session per process ---
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """Process-wide requests.Session (thread-safe for plain get/post use)."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            settings = http_settings()
+            adapter = HTTPAdapter(
+                pool_connections=settings["max_connections"],  # host pools kept
+                pool_maxsize=settings["max_per_host"],         # connections per host
+            )
+            session = requests.Session()
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session = session
+        return _session
+
+
+# --- Async ---
+
+class AsyncHttpClient:
+    """
+    Loop-bound async client with a global connection limit and a per-host limit.
+    Responses expose status_code / text / content / json() / headers like requests.
+    """
+
+    def __init__(self, settings: Optional[Dict[str, Any]] = None):
+        self.settings = settings or http_settings()
+        self._loop = asyncio.get_running_loop()
+        self._clients: Dict[bool, Any] = {}  # one httpx client per TLS-verify mode
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+        self._closed = False
+
+    @property
+    def http2(self) -> bool:
+        return bool(self.settings.get("http2") and httpx is not None and h2 is not None)
+
+    def _client(self, verify: bool):
+        client = self._clients.get(verify)
+        if client is None:
+            limits = httpx.Limits(
+                max_connections=self.settings["max_connections"],
+                max_keepalive_connections=self.settings["max_keepalive_connections"],
+                keepalive_expiry=self.settings["keepalive_expiry"],
+            )
+            client = self._clients[verify] = httpx.AsyncClient(
+                http2=self.http2,
+                verify=verify,
+                limits=limits,
+                timeout=self.settings["timeout"],
+                follow_redirects=True,  # same as requests
+            )
+        return client
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc.lower()
+        limit = self._host_limits.get(host)
+        if limit is None:
+            limit = self._host_limits[host] = asyncio.Semaphore(self.settings["max_per_host"])
+        return limit
+
+    async def request(self, method: str, url: str, *, headers: Optional[Dict[str, str]] = None,
+                      params: Optional[Dict[str, Any]] = None, json: Any = None,
+                      timeout: Optional[float] = None, verify: bool = True):
+        if self._closed:
+            raise RuntimeError("HTTP client is closed")
+        timeout = timeout if timeout is not None else self.settings["timeout"]
+        async with self._host_limit(url):
+            if httpx is None:
+                # No httpx: pooled requests.Session in a worker thread
+                response = await asyncio.to_thread(
+                    get_session().request, method, url, headers=headers, params=params,
+                    json=json, timeout=timeout, verify=verify,
+                )
+            else:
+                response = await self._client(verify).request(
+                    method, url, headers=headers, params=params, json=json, timeout=timeout,
+                )
+        note_transfer(len(response.content))  # body is already read (no streaming)
+        return response
+
+    async def get(self, url: str, **kwargs):
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs):
+        return await self.request("POST", url, **kwargs)
+
+    async def close(self):
+        self._closed = True
+        clients, self._clients = list(self._clients.values()), {}
+        for client in clients:
+            await client.aclose()
+
+
+_client: Optional[AsyncHttpClient] = None
+
+
+def get_http_client() -> AsyncHttpClient:
+    """Returns the client bound to the running event loop, creating it on first use."""
+    global _client
+    loop = asyncio.get_running_loop()
+    if _client is None or _client._loop is not loop or _client._closed:
+        _client = AsyncHttpClient()
+    return _client
+
+
+async def close_http_client():
+    global _client
+    client, _client = _client, None
+    if client is not None and client._loop is asyncio.get_running_loop():
+        await client.close()
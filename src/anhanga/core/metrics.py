@@ -0,0 +1,289 @@
+# Arquivo: anhanga/core/metrics.py
+"""
+Per-investigation timing / transfer metrics.
+
+Every graph node is wrapped by `instrument_node`, which times it and returns a
+`metrics` update ({"nodes": {node: {...}}}, merged by the state reducer). Inside a
+node, `track_call(provider)` times one external call; the shared HTTP client reports
+response sizes with `note_transfer`, and retry loops with `note_retry`, both
+attributed to the innermost call in progress. The current node/call live in
+contextvars, so tasks and worker threads started by a node report to it.
+
+`MetricsAggregator` folds the per-target metrics of a batch into p50/p95/p99 per
+stage, as JSON or Prometheus text.
+"""
+import asyncio
+import contextlib
+import functools
+import inspect
+import logging
+import math
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+OUTCOME_OK = "ok"
+OUTCOME_DEGRADED = "degraded"   # node finished but reported errors
+OUTCOME_FAILED = "failed"       # node returned status "failed"
+OUTCOME_ERROR = "error"         # exception
+OUTCOME_TIMEOUT = "timeout"
+OUTCOME_CANCELLED = "cancelled"
+OUTCOME_CACHED = "cached"       # answered by the enrichment cache
+OUTCOME_THROTTLED = "throttled" # refused by the rate limiter (quota / persistent 429)
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class _Call:
+    __slots__ = ("provider", "outcome", "bytes", "retries")
+
+    def __init__(self, provider: str):
+        self.provider = provider
+        self.outcome = OUTCOME_OK
+        self.bytes = 0
+        self.retries = 0
+
+
+class NodeRecorder:
+    """Aggregates the provider calls made while one node runs (thread-safe)."""
+
+    def __init__(self):
+        self.calls: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def add_call(self, provider: str, wall_ms: float, outcome: str, nbytes: int = 0, retries: int = 0):
+        with self._lock:
+            entry = self.calls.setdefault(
+                provider, {"count": 0, "wall_ms": 0.0, "bytes": 0, "retries": 0, "outcomes": {}}
+            )
+            entry["count"] += 1
+            entry["wall_ms"] = round(entry["wall_ms"] + wall_ms, 3)
+            entry["bytes"] += nbytes
+            entry["retries"] += retries
+            entry["outcomes"][outcome] = entry["outcomes"].get(outcome, 0) + 1
+
+    def add_bytes(self, provider: str, nbytes: int):
+        with self._lock:
+            entry = self.calls.setdefault(
+                provider, {"count": 0, "wall_ms": 0.0, "bytes": 0, "retries": 0, "outcomes": {}}
+            )
+            entry["bytes"] += nbytes
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {provider: dict(entry, outcomes=dict(entry["outcomes"])) for provider, entry in self.calls.items()}
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            return sum(entry["bytes"] for entry in self.calls.values())
+
+
+_recorder: ContextVar[Optional[NodeRecorder]] = ContextVar("anhanga_node_recorder", default=None)
+_call: ContextVar[Optional[_Call]] = ContextVar("anhanga_provider_call", default=None)
+
+
+@contextlib.contextmanager
+def track_call(provider: str) -> Iterator[_Call]:
+    """
+    Times one external call (works around sync and async code). Set `.outcome` on the
+    yielded object to override the default ("ok", or derived from the exception).
+    No-op outside an instrumented node.
+    """
+    recorder = _recorder.get()
+    call = _Call(provider)
+    token = _call.set(call)
+    started = time.perf_counter()
+    try:
+        yield call
+    except (asyncio.TimeoutError, TimeoutError):
+        call.outcome = OUTCOME_TIMEOUT
+        raise
+    except asyncio.CancelledError:
+        call.outcome = OUTCOME_CANCELLED
+        raise
+    except Exception:
+        call.outcome = OUTCOME_ERROR
+        raise
+    finally:
+        _call.reset(token)
+        if recorder is not None:
+            wall_ms = (time.perf_counter() - started) * 1000
+            recorder.add_call(provider, wall_ms, call.outcome, call.bytes, call.retries)
+
+
+def note_transfer(nbytes: int):
+    """Bytes moved by the current call (or loose HTTP traffic of the current node)."""
+    call = _call.get()
+    if call is not None:
+        call.bytes += nbytes
+        return
+    recorder = _recorder.get()
+    if recorder is not None:
+        recorder.add_bytes("http", nbytes)
+
+
+def note_retry():
+    call = _call.get()
+    if call is not None:
+        call.retries += 1
+
+
+def note_cache_hit():
+    call = _call.get()
+    if call is not None:
+        call.outcome = OUTCOME_CACHED
+
+
+def _node_outcome(result: Any) -> str:
+    if not isinstance(result, dict):
+        return OUTCOME_OK
+    if result.get("status") == "failed":
+        return OUTCOME_FAILED
+    if result.get("errors"):
+        return OUTCOME_DEGRADED
+    return OUTCOME_OK
+
+
+def instrument_node(name: str, func: Callable) -> Callable:
+    """Wraps a graph node (sync or async) so its update carries metrics.nodes[name]."""
+
+    def finish(recorder: NodeRecorder, started: float, result: Any, outcome: str) -> Any:
+        wall_ms = round((time.perf_counter() - started) * 1000, 3)
+        entry = {"wall_ms": wall_ms, "outcome": outcome, "bytes": recorder.total_bytes(), "calls": recorder.snapshot()}
+        logger.debug(f"node {name}: {wall_ms:.1f}ms {outcome}")
+        if isinstance(result, dict):
+            result = dict(result, metrics={"nodes": {name: entry}})
+        return result
+
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_node(state):
+            recorder = NodeRecorder()
+            token = _recorder.set(recorder)
+            started = time.perf_counter()
+            try:
+                result = await func(state)
+            except Exception:
+                logger.debug(f"node {name} raised", exc_info=True)
+                raise
+            finally:
+                _recorder.reset(token)
+            return finish(recorder, started, result, _node_outcome(result))
+        return async_node
+
+    @functools.wraps(func)
+    def sync_node(state):
+        recorder = NodeRecorder()
+        token = _recorder.set(recorder)
+        started = time.perf_counter()
+        try:
+            result = func(state)
+        finally:
+            _recorder.reset(token)
+        return finish(recorder, started, result, _node_outcome(result))
+    return sync_node
+
+
+# --- Batch aggregation ---
+
+def percentile(samples: List[float], q: float) -> float:
+    """Nearest-rank percentile (samples need not be sorted)."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(q * len(ordered)))
+    return ordered[rank - 1]
+
+
+class _Series:
+    __slots__ = ("samples", "outcomes", "bytes", "retries")
+
+    def __init__(self):
+        self.samples: List[float] = []
+        self.outcomes: Dict[str, int] = {}
+        self.bytes = 0
+        self.retries = 0
+
+    def summary(self) -> Dict[str, Any]:
+        ordered = sorted(self.samples)
+        summary = {"count": len(ordered)}
+        for q in QUANTILES:
+            summary[f"p{round(q * 100)}_ms"] = percentile(ordered, q)
+        summary["mean_ms"] = round(sum(ordered) / len(ordered), 3) if ordered else 0.0
+        summary["max_ms"] = ordered[-1] if ordered else 0.0
+        summary.update(bytes=self.bytes, retries=self.retries, outcomes=dict(self.outcomes))
+        return summary
+
+
+class MetricsAggregator:
+    """Collects the `metrics` of many final states (batch mode)."""
+
+    def __init__(self):
+        self.targets = 0
+        self.nodes: Dict[str, _Series] = {}
+        self.providers: Dict[str, _Series] = {}
+
+    def add(self, metrics: Optional[Dict[str, Any]]):
+        self.targets += 1
+        for node, entry in ((metrics or {}).get("nodes") or {}).items():
+            series = self.nodes.setdefault(node, _Series())
+            series.samples.append(entry.get("wall_ms", 0.0))
+            series.bytes += entry.get("bytes", 0)
+            outcome = entry.get("outcome", OUTCOME_OK)
+            series.outcomes[outcome] = series.outcomes.get(outcome, 0) + 1
+
+            for provider, call in (entry.get("calls") or {}).items():
+                series = self.providers.setdefault(provider, _Series())
+                if call.get("count"):
+                    # One sample per target: mean wall time of this provider's calls
+                    series.samples.append(round(call["wall_ms"] / call["count"], 3))
+                series.bytes += call.get("bytes", 0)
+                series.retries += call.get("retries", 0)
+                for outcome, n in (call.get("outcomes") or {}).items():
+                    series.outcomes[outcome] = series.outcomes.get(outcome, 0) + n
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "targets": self.targets,
+            "nodes": {name: series.summary() for name, series in sorted(self.nodes.items())},
+            "providers": {name: series.summary() for name, series in sorted(self.providers.items())},
+        }
+
+    def to_prometheus(self) -> str:
+        lines = []
+        lines += ["# HELP anhanga_targets_total Investigations aggregated.",
+                  "# TYPE anhanga_targets_total counter",
+                  f"anhanga_targets_total {self.targets}"]
+        for kind, label, groups in (("node", "node", self.nodes), ("provider", "provider", self.providers)):
+            metric = f"anhanga_{kind}_duration_seconds"
+            lines += [f"# HELP {metric} Wall time per {kind}.", f"# TYPE {metric} summary"]
+            for name, series in sorted(groups.items()):
+                name = _escape(name)
+                for q in QUANTILES:
+                    lines.append(f'{metric}{{{label}="{name}",quantile="{q}"}} {percentile(series.samples, q) / 1000:.6f}')
+                lines.append(f'{metric}_sum{{{label}="{name}"}} {sum(series.samples) / 1000:.6f}')
+                lines.append(f'{metric}_count{{{label}="{name}"}} {len(series.samples)}')
+
+            outcomes = f"anhanga_{kind}_outcomes_total"
+            lines += [f"# HELP {outcomes} Results per {kind} and outcome.", f"# TYPE {outcomes} counter"]
+            for name, series in sorted(groups.items()):
+                for outcome, n in sorted(series.outcomes.items()):
+                    lines.append(f'{outcomes}{{{label}="{_escape(name)}",outcome="{outcome}"}} {n}')
+
+            transferred = f"anhanga_{kind}_bytes_total"
+            lines += [f"# HELP {transferred} Response bytes per {kind}.", f"# TYPE {transferred} counter"]
+            for name, series in sorted(groups.items()):
+                lines.append(f'{transferred}{{{label}="{_escape(name)}"}} {series.bytes}')
+
+        retries = "anhanga_provider_retries_total"
+        lines += [f"# HELP {retries} Retries per provider.", f"# TYPE {retries} counter"]
+        for name, series in sorted(self.providers.items()):
+            lines.append(f'{retries}{{provider="{_escape(name)}"}} {series.retries}')
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
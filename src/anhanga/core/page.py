@@ -0,0 +1,120 @@
+# Arquivo: anhanga/core/page.py
+"""
+Per-investigation page artifacts.
+
+The target page is downloaded once (static fetch) and, if needed, rendered once in
+the browser. Both results live in the state's `page` channel, and every consumer
+(dirty scrape, favicon discovery, PIX/wallet extraction, legal text) reads from it
+instead of fetching the page again. The HTML itself goes to the blob store
+(core/blobs.py): `page` only carries the handles, read back on demand.
+"""
+import asyncio
+import re
+from typing import Any, Dict, Optional
+
+from anhanga.core.blobs import get_blob_store
+from anhanga.core.http import DEFAULT_USER_AGENT, get_http_client
+from anhanga.modules.crypto.wallet_hunter import COIN_PATTERNS, has_checksummed_address
+
+# Render modes (per investigation)
+RENDER_ALWAYS = "always"  # Camoufox for every target (screenshot included)
+RENDER_NEVER = "never"    # static HTML only, browser never started
+RENDER_AUTO = "auto"      # browser only if the static HTML isn't enough
+RENDER_MODES = (RENDER_ALWAYS, RENDER_NEVER, RENDER_AUTO)
+
+STATIC_TIMEOUT = 10
+
+# Anti-bot interstitials / JS shells: the static HTML is not the real page
+_CHALLENGE_RE = re.compile(
+    r"cf-browser-verification|challenge-platform|just a moment\.\.\.|checking your browser|"
+    r"captcha|enable javascript|<noscript>[^<]*javascript",
+    re.IGNORECASE,
+)
+# Financial-data markers for 'auto': a BR Code (anchor followed by the PIX GUI) or a
+# checksummed address with a coin prefix. Bare base58 (SOL) runs are too common in
+# minified JS to count.
+_PIX_ANCHOR = "000201"
+_PIX_GUI = "br.gov.bcb.pix"
+_PIX_GUI_WINDOW = 40   # "000201" + "26xx" + "0014" + GUI, with room for an optional tag 01
+_WALLET_COINS = [coin for coin in COIN_PATTERNS if coin != "SOL"]
+
+
+def empty_page(url: str) -> Dict[str, Any]:
+    return {
+        "requested_url": url,
+        "final_url": url,
+        "status_code": None,
+        "headers": {},
+        "static_blob": None,     # blob handles (core/blobs.py)
+        "rendered_blob": None,
+        "rendered": False,
+        "fetch_error": None,
+    }
+
+
+async def fetch_static(url: str, timeout: float = STATIC_TIMEOUT) -> Dict[str, Any]:
+    """Plain HTTP download of the target (no JS). Never raises: errors go in `fetch_error`."""
+    page = empty_page(url)
+    try:
+        r = await get_http_client().get(url, headers={"User-Agent": DEFAULT_USER_AGENT}, verify=False, timeout=timeout)
+        page.update({
+            "final_url": str(r.url),
+            "status_code": r.status_code,
+            "headers": dict(r.headers),
+            "static_blob": await asyncio.to_thread(get_blob_store().put_text, r.text),
+        })
+    except Exception as e:
+        page["fetch_error"] = str(e) or type(e).__name__
+    return page
+
+
+def page_handle(page: Optional[Dict[str, Any]]) -> Optional[str]:
+    """Handle of the best available HTML: the rendered DOM, else the static response."""
+    if not page:
+        return None
+    return page.get("rendered_blob") or page.get("static_blob")
+
+
+def load_html(handle: Optional[str]) -> Optional[str]:
+    """Reads an HTML blob (blocking). A missing blob counts as no HTML."""
+    if not handle:
+        return None
+    try:
+        return get_blob_store().get_text(handle)
+    except KeyError:
+        return None
+
+
+def page_html(page: Optional[Dict[str, Any]]) -> Optional[str]:
+    """Best available HTML, loaded from the blob store (blocking: use a worker thread)."""
+    return load_html(page_handle(page))
+
+
+def static_is_sufficient(page: Optional[Dict[str, Any]]) -> bool:
+    """
+    'auto' render mode: skip the browser when the static HTML is a real page
+    (2xx, no challenge / JS-only shell) that already carries financial data.
+
+    Only cheap marker checks run here: the full PIX/wallet extraction happens once,
+    in financial_analysis_node.
+    """
+    status = (page or {}).get("status_code")
+    if status is None or not 200 <= status < 300:
+        return False
+    html = load_html((page or {}).get("static_blob"))
+    if not html:
+        return False
+    if _CHALLENGE_RE.search(html[:20000]):
+        return False
+
+    return _has_pix_code(html) or has_checksummed_address(html, _WALLET_COINS)
+
+
+def _has_pix_code(html: str) -> bool:
+    start = html.find(_PIX_ANCHOR)
+    while start != -1:
+        if _PIX_GUI in html[start:start + _PIX_GUI_WINDOW].lower():
+            return True
+        start = html.find(_PIX_ANCHOR, start + 1)
+    return False
+
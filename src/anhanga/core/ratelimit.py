@@ -0,0 +1,646 @@
+# Arquivo: anhanga/core/ratelimit.py
+"""
+Rate limiting and quota accounting for the external providers.
+
+`get_rate_limiter()` is the process-wide governor every provider call goes through:
+  - one token bucket per provider ("rate_limits" block of config.json), shared by
+    every investigation, thread and event loop;
+  - async callers wait in a per-loop priority queue, so high-priority targets get
+    the next token first (`priority_scope` sets the priority of an investigation);
+  - daily/monthly quotas are counted in SQLite (quota.db, next to config.json), so
+    they survive restarts; an exhausted quota fails fast with `QuotaExceeded`, and
+    calls the provider refuses with a 429 are given back;
+  - HTTP 429 pauses the provider's bucket for `Retry-After` (or an exponential
+    backoff) and the call is retried, up to `max_retries`.
+
+Time spent queued doesn't count against provider timeouts: run provider calls
+with `wait_for` (instead of asyncio.wait_for) and the limiter extends the deadline.
+"""
+import asyncio
+import contextlib
+import heapq
+import itertools
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+import weakref
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
+
+from anhanga.core.config import CONFIG_FILE, ConfigManager
+from anhanga.core.metrics import note_retry
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """
+    Token bucket limiting calls to `rate` per `per` seconds, with bursts of up to `burst`.
+
+    Reservation based: each caller takes a token immediately (the balance may go
+    negative) and sleeps for its share of the debt. This keeps callers in FIFO order
+    and makes the bucket safe to share across threads and event loops.
+    """
+
+    def __init__(self, rate: float, per: float = 1.0, burst: Optional[float] = None):
+        if rate <= 0 or per <= 0:
+            raise ValueError("rate and per must be positive")
+        self.fill_rate = rate / per            # tokens per second
+        self.capacity = burst if burst is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()       # in the future while paused
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        if now > self._updated:
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.fill_rate)
+            self._updated = now
+
+    def _reserve(self, tokens: float = 1.0) -> float:
+        """Takes `tokens` and returns how long the caller must wait before using them."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens -= tokens
+            paused = max(0.0, self._updated - now)
+            if self._tokens >= 0:
+                return paused
+            return paused - self._tokens / self.fill_rate
+
+    def try_acquire(self, tokens: float = 1.0) -> float:
+        """Takes `tokens` only if available now (returns 0); otherwise returns the wait, taking nothing."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            paused = max(0.0, self._updated - now)
+            if paused == 0 and self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return paused + max(0.0, tokens - self._tokens) / self.fill_rate
+
+    def pause(self, seconds: float):
+        """Stops handing out tokens for `seconds` (e.g. after a 429), starting from an empty bucket."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens = min(self._tokens, 0.0)
+            self._updated = max(self._updated, now + seconds)
+
+    async def acquire(self, tokens: float = 1.0):
+        wait = self._reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def acquire_sync(self, tokens: float = 1.0):
+        wait = self._reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+
+
+# --- Settings ---
+
+# Lives next to config.json, like the rest of the local state
+QUOTA_FILE = os.path.join(os.path.dirname(CONFIG_FILE), "quota.db")
+
+# Per provider: `rate` calls per `per` seconds (bursts up to `burst`), optional
+# `daily` / `monthly` quotas. Defaults follow the free tiers; override per provider
+# with a "rate_limits" block in config.json, e.g.
+#   "rate_limits": {"shodan": {"monthly": 100}, "virustotal": {"rate": 500, "per": 60, "daily": null}}
+DEFAULT_RATE_LIMITS = {
+    "virustotal": {"rate": 4, "per": 60.0, "daily": 500, "monthly": 15500},
+    "urlscan": {"rate": 60, "per": 60.0, "daily": 5000},
+    "shodan": {"rate": 1, "per": 1.0},
+    "whois": {"rate": 5, "per": 1.0},
+    # blockchain.info asks for ~1 request every 10s on the free tier
+    "blockchain": {"rate": 1, "per": 10.0, "burst": 2},
+}
+# Applied to every provider (and overridable per provider)
+DEFAULT_LIMIT_OPTIONS = {
+    "max_retries": 3,      # 429 retries before giving up
+    "backoff": 2.0,        # first backoff without Retry-After (doubles per retry)
+    "max_backoff": 300.0,  # cap on any single 429 pause, Retry-After included
+}
+# Calls that spend another provider's key/quota
+PROVIDER_ALIASES = {
+    "virustotal_ip": "virustotal",
+}
+
+PERIOD_DAILY = "daily"
+PERIOD_MONTHLY = "monthly"
+PERIODS = (PERIOD_DAILY, PERIOD_MONTHLY)
+
+# Lower runs first
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 5
+PRIORITY_LOW = 9
+PRIORITIES = {"high": PRIORITY_HIGH, "normal": PRIORITY_NORMAL, "low": PRIORITY_LOW}
+
+
+def parse_priority(value: Any) -> int:
+    """'high' / 'normal' / 'low' or an integer (lower = sooner)."""
+    if isinstance(value, int):
+        return value
+    text = str(value).strip().lower()
+    if text in PRIORITIES:
+        return PRIORITIES[text]
+    try:
+        return int(text)
+    except ValueError:
+        raise ValueError(f"Unknown priority: {value!r} (use high, normal, low or a number)") from None
+
+
+class RateLimitError(Exception):
+    """A provider call refused by the limiter (the provider was not called)."""
+
+    def __init__(self, provider: str, message: str):
+        super().__init__(message)
+        self.provider = provider
+
+
+class QuotaExceeded(RateLimitError):
+    def __init__(self, provider: str, period: str, used: int, limit: int):
+        super().__init__(provider, f"{provider} {period} quota exhausted ({used}/{limit})")
+        self.period = period
+        self.used = used
+        self.limit = limit
+
+
+class QuotaUnavailable(RateLimitError):
+    """quota.db couldn't be read or updated (e.g. locked by another process past the busy timeout)."""
+
+    def __init__(self, provider: str, error: Exception):
+        super().__init__(provider, f"{provider} quota ledger unavailable: {error}")
+        self.error = error
+
+
+class RateLimited(RateLimitError):
+    def __init__(self, provider: str, retries: int):
+        super().__init__(provider, f"{provider} still rate limited (HTTP 429) after {retries} retries")
+        self.retries = retries
+
+
+# --- Priority and deadlines (per investigation / per call, via contextvars) ---
+
+_priority: ContextVar[int] = ContextVar("anhanga_priority", default=PRIORITY_NORMAL)
+
+
+@contextlib.contextmanager
+def priority_scope(priority: Optional[int]) -> Iterator[None]:
+    """Provider calls made inside (tasks and worker threads included) queue with `priority`."""
+    if priority is None:
+        yield
+        return
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class _Deadline:
+    """Deadline that stops running while the call is queued in the limiter."""
+
+    def __init__(self, timeout: float):
+        self._at = time.monotonic() + timeout
+        self._held = 0
+        self._held_since = 0.0
+        self._lock = threading.Lock()
+
+    def hold(self):
+        with self._lock:
+            if self._held == 0:
+                self._held_since = time.monotonic()
+            self._held += 1
+
+    def release(self):
+        with self._lock:
+            self._held -= 1
+            if self._held == 0:
+                self._at += time.monotonic() - self._held_since
+
+    def remaining(self) -> float:
+        with self._lock:
+            if self._held:
+                # Frozen while queued; wait_for re-checks after at most this long
+                return max(self._at - self._held_since, 0.05)
+            return self._at - time.monotonic()
+
+
+_deadline: ContextVar[Optional[_Deadline]] = ContextVar("anhanga_deadline", default=None)
+
+
+async def wait_for(aw: Awaitable[Any], timeout: float) -> Any:
+    """
+    asyncio.wait_for for provider calls: the clock stops while the call is queued in
+    the rate limiter, so a long queue isn't reported as a timeout.
+    """
+    deadline = _Deadline(timeout)
+    token = _deadline.set(deadline)
+    try:
+        task = asyncio.ensure_future(aw)  # the task inherits the deadline
+    finally:
+        _deadline.reset(token)
+    try:
+        while True:
+            remaining = deadline.remaining()
+            if remaining <= 0:
+                raise asyncio.TimeoutError()
+            done, _ = await asyncio.wait({task}, timeout=remaining)
+            if done:
+                return task.result()
+    finally:
+        if not task.done():
+            task.cancel()
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+
+@contextlib.contextmanager
+def _queued() -> Iterator[None]:
+    """Time spent inside doesn't count against the enclosing wait_for deadline."""
+    deadline = _deadline.get()
+    if deadline is None:
+        yield
+        return
+    deadline.hold()
+    try:
+        yield
+    finally:
+        deadline.release()
+
+
+# --- Quota ledger ---
+
+def _period_keys(now: Optional[datetime] = None) -> Dict[str, str]:
+    # Provider quotas reset at 00:00 UTC
+    now = now or datetime.now(timezone.utc)
+    return {PERIOD_DAILY: now.strftime("%Y-%m-%d"), PERIOD_MONTHLY: now.strftime("%Y-%m")}
+
+
+class QuotaLedger:
+    """Calls made per provider per day/month, persisted in SQLite (thread-safe)."""
+
+    def __init__(self, path: str = QUOTA_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS quota_usage (
+                provider TEXT NOT NULL,
+                period   TEXT NOT NULL,
+                used     INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (provider, period)
+            )
+        """)
+
+    def _used(self, provider: str, key: str) -> int:
+        row = self._conn.execute(
+            "SELECT used FROM quota_usage WHERE provider = ? AND period = ?", (provider, key)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def exhausted(self, provider: str, limits: Dict[str, Optional[int]]) -> Optional[Tuple[str, int, int]]:
+        """(period, used, limit) of the first exhausted quota, or None."""
+        keys = _period_keys()
+        with self._lock:
+            for period in PERIODS:
+                limit = limits.get(period)
+                if limit is not None:
+                    used = self._used(provider, keys[period])
+                    if used >= limit:
+                        return period, used, limit
+        return None
+
+    def consume(self, provider: str, limits: Dict[str, Optional[int]]) -> Dict[str, str]:
+        """
+        Counts one call, or raises QuotaExceeded (nothing counted) if a quota is used up.
+        Returns the periods charged, for `refund`.
+        """
+        keys = _period_keys()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")  # other processes may share the file
+            try:
+                for period in PERIODS:
+                    limit = limits.get(period)
+                    if limit is not None:
+                        used = self._used(provider, keys[period])
+                        if used >= limit:
+                            raise QuotaExceeded(provider, period, used, limit)
+                for period in PERIODS:
+                    self._conn.execute(
+                        "INSERT INTO quota_usage (provider, period, used) VALUES (?, ?, 1) "
+                        "ON CONFLICT (provider, period) DO UPDATE SET used = used + 1",
+                        (provider, keys[period]),
+                    )
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+        return keys
+
+    def refund(self, provider: str, keys: Dict[str, str]):
+        """Gives back a unit charged by `consume` (the provider refused the call)."""
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE quota_usage SET used = used - 1 WHERE provider = ? AND period = ? AND used > 0",
+                [(provider, key) for key in keys.values()],
+            )
+
+    def usage(self, provider: str) -> Dict[str, int]:
+        keys = _period_keys()
+        with self._lock:
+            return {period: self._used(provider, keys[period]) for period in PERIODS}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# --- Per-loop priority queue in front of a bucket ---
+
+class _PriorityGate:
+    """Hands the bucket's tokens to waiting coroutines in (priority, arrival) order."""
+
+    def __init__(self, bucket: TokenBucket):
+        self.bucket = bucket
+        self._heap: List[Tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._pump: Optional[asyncio.Task] = None
+
+    async def acquire(self, priority: int) -> float:
+        """Waits for a token; returns the seconds spent waiting."""
+        if not self._heap and self.bucket.try_acquire() == 0:
+            return 0.0
+        started = time.monotonic()
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._heap, (priority, next(self._seq), future))
+        if self._pump is None or self._pump.done():
+            self._pump = asyncio.ensure_future(self._run())
+        await future  # cancelled waiters are skipped by the pump
+        return time.monotonic() - started
+
+    async def _run(self):
+        while self._heap:
+            if self._heap[0][2].done():
+                heapq.heappop(self._heap)
+                continue
+            wait = self.bucket.try_acquire()
+            if wait > 0:
+                await asyncio.sleep(wait)
+                continue
+            heapq.heappop(self._heap)[2].set_result(None)
+
+
+class RateLimiter:
+    """Process-wide limiter: buckets and quotas are shared, priority queues are per event loop."""
+
+    def __init__(self, limits: Optional[Dict[str, Dict[str, Any]]] = None, quota_path: str = QUOTA_FILE):
+        self.limits = limits if limits is not None else _configured_limits()
+        self.quota_path = quota_path
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._gates: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, _PriorityGate]]" = \
+            weakref.WeakKeyDictionary()
+        self._ledger: Optional[QuotaLedger] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, cfg: Optional[ConfigManager] = None) -> "RateLimiter":
+        cfg = cfg or ConfigManager()
+        return cls(_configured_limits(cfg), quota_path=(cfg.get("quota") or {}).get("path", QUOTA_FILE))
+
+    # --- Settings ---
+
+    @staticmethod
+    def canonical(provider: str) -> str:
+        return PROVIDER_ALIASES.get(provider, provider)
+
+    def settings(self, provider: str) -> Dict[str, Any]:
+        settings = dict(DEFAULT_LIMIT_OPTIONS)
+        settings.update(self.limits.get(self.canonical(provider)) or {})
+        return settings
+
+    def bucket(self, provider: str) -> Optional[TokenBucket]:
+        """None = no rate limit configured for this provider."""
+        provider = self.canonical(provider)
+        with self._lock:
+            if provider not in self._buckets:
+                settings = self.settings(provider)
+                rate = settings.get("rate")
+                self._buckets[provider] = (
+                    TokenBucket(rate, settings.get("per", 1.0), settings.get("burst")) if rate else None
+                )
+            return self._buckets[provider]
+
+    def _quotas(self, provider: str) -> Dict[str, Optional[int]]:
+        settings = self.settings(provider)
+        return {period: settings.get(period) for period in PERIODS}
+
+    @property
+    def ledger(self) -> QuotaLedger:
+        with self._lock:
+            if self._ledger is None:
+                self._ledger = QuotaLedger(self.quota_path)
+            return self._ledger
+
+    def _gate(self, provider: str, bucket: TokenBucket) -> _PriorityGate:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            gates = self._gates.get(loop)
+            if gates is None:
+                gates = self._gates[loop] = {}
+            gate = gates.get(provider)
+            if gate is None:
+                gate = gates[provider] = _PriorityGate(bucket)
+            return gate
+
+    # --- Tokens + quota ---
+
+    def _ledger_call(self, provider: str, func: Callable[..., Any], *args) -> Any:
+        try:
+            return func(*args)
+        except sqlite3.OperationalError as e:
+            # "database is locked" once another process held quota.db past the busy timeout
+            raise QuotaUnavailable(provider, e) from e
+
+    def _check_quota(self, provider: str, quotas: Dict[str, Optional[int]]):
+        exhausted = self._ledger_call(provider, lambda: self.ledger.exhausted(provider, quotas))
+        if exhausted is not None:
+            raise QuotaExceeded(provider, *exhausted)
+
+    def _consume_quota(self, provider: str, quotas: Dict[str, Optional[int]]) -> Dict[str, str]:
+        return self._ledger_call(provider, lambda: self.ledger.consume(provider, quotas))
+
+    def _refund_quota(self, provider: str, charged: Optional[Dict[str, str]]):
+        if charged is not None:
+            try:
+                self._ledger_call(provider, lambda: self.ledger.refund(provider, charged))
+            except QuotaUnavailable as e:
+                logger.warning(f"{provider}: could not refund the quota of a refused call: {e}")
+
+    @staticmethod
+    def _has_quota(quotas: Dict[str, Optional[int]]) -> bool:
+        return any(limit is not None for limit in quotas.values())
+
+    async def _acquire(self, provider: str, priority: Optional[int]) -> Optional[Dict[str, str]]:
+        """Returns the quota periods charged (None if the provider has no quota)."""
+        provider = self.canonical(provider)
+        quotas = self._quotas(provider)
+        if self._has_quota(quotas):
+            # SQLite (possibly waiting on another process' lock) stays off the event loop.
+            # Checked before queueing, so an exhausted quota fails fast.
+            await asyncio.to_thread(self._check_quota, provider, quotas)
+        bucket = self.bucket(provider)
+        if bucket is not None:
+            with _queued():
+                await self._gate(provider, bucket).acquire(
+                    priority if priority is not None else _priority.get()
+                )
+        if self._has_quota(quotas):
+            return await asyncio.to_thread(self._consume_quota, provider, quotas)
+        return None
+
+    def _acquire_sync(self, provider: str) -> Optional[Dict[str, str]]:
+        provider = self.canonical(provider)
+        quotas = self._quotas(provider)
+        if self._has_quota(quotas):
+            self._check_quota(provider, quotas)
+        bucket = self.bucket(provider)
+        if bucket is not None:
+            with _queued():
+                bucket.acquire_sync()
+        if self._has_quota(quotas):
+            return self._consume_quota(provider, quotas)
+        return None
+
+    async def acquire(self, provider: str, priority: Optional[int] = None):
+        """Waits for a call slot of `provider` (async callers, priority-ordered)."""
+        await self._acquire(provider, priority)
+
+    def acquire_sync(self, provider: str):
+        """Blocking variant for worker threads (FIFO: priorities only order async callers)."""
+        self._acquire_sync(provider)
+
+    # --- Calls with 429 handling ---
+
+    def _backoff(self, provider: str, attempt: int, retry_after: Optional[float]) -> float:
+        settings = self.settings(provider)
+        if retry_after is None:
+            retry_after = settings["backoff"] * (2 ** attempt) + random.uniform(0, 1)
+        return min(max(retry_after, 0.0), settings["max_backoff"])
+
+    def _throttled(self, provider: str, attempt: int, retry_after: Optional[float]) -> float:
+        """Pauses the provider after a 429; returns the pause, or raises once retries are spent."""
+        settings = self.settings(provider)
+        if attempt >= settings["max_retries"]:
+            raise RateLimited(provider, attempt)
+        delay = self._backoff(provider, attempt, retry_after)
+        bucket = self.bucket(provider)
+        if bucket is not None:
+            bucket.pause(delay)  # every caller of this provider backs off, not just this one
+        note_retry()
+        logger.info(f"{provider}: HTTP 429, retrying in {delay:.1f}s")
+        return delay
+
+    async def request(self, provider: str, send: Callable[[], Awaitable[Any]], priority: Optional[int] = None):
+        """
+        Runs `send()` (an HTTP call returning a response) inside the provider's limits.
+        429 answers are retried after Retry-After (their quota unit is given back);
+        raises RateLimited when retries run out.
+        """
+        attempt = 0
+        while True:
+            charged = await self._acquire(provider, priority)
+            response = await send()
+            if getattr(response, "status_code", None) != 429:
+                return response
+            if charged is not None:
+                await asyncio.to_thread(self._refund_quota, self.canonical(provider), charged)
+            delay = self._throttled(self.canonical(provider), attempt, retry_after(response))
+            attempt += 1
+            if self.bucket(provider) is None:
+                with _queued():
+                    await asyncio.sleep(delay)
+
+    def call_sync(self, provider: str, func: Callable[[], Any]) -> Any:
+        """`request` for blocking client libraries: rate-limit errors they raise are retried."""
+        attempt = 0
+        while True:
+            charged = self._acquire_sync(provider)
+            try:
+                return func()
+            except Exception as e:
+                if not is_rate_limit_error(e):
+                    raise
+                self._refund_quota(self.canonical(provider), charged)
+                delay = self._throttled(self.canonical(provider), attempt, None)
+            attempt += 1
+            if self.bucket(provider) is None:
+                with _queued():
+                    time.sleep(delay)
+
+    def usage(self) -> Dict[str, Dict[str, Any]]:
+        """{provider: {"daily": (used, limit), "monthly": (used, limit)}} for providers with quotas."""
+        report = {}
+        for provider in sorted(self.limits):
+            quotas = self._quotas(provider)
+            if all(limit is None for limit in quotas.values()):
+                continue
+            used = self.ledger.usage(provider)
+            report[provider] = {period: (used[period], quotas[period]) for period in PERIODS}
+        return report
+
+
+def _configured_limits(cfg: Optional[ConfigManager] = None) -> Dict[str, Dict[str, Any]]:
+    limits = {name: dict(settings) for name, settings in DEFAULT_RATE_LIMITS.items()}
+    for name, overrides in ((cfg or ConfigManager()).get("rate_limits") or {}).items():
+        limits.setdefault(name, {}).update(overrides or {})
+    return limits
+
+
+def retry_after(response: Any) -> Optional[float]:
+    """Seconds from a Retry-After header (delta-seconds or HTTP-date), if any."""
+    value = (getattr(response, "headers", None) or {}).get("Retry-After")
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """429s surfaced as exceptions by client libraries (shodan's APIError, requests' HTTPError)."""
+    response = getattr(error, "response", None)
+    if getattr(response, "status_code", None) == 429:
+        return True
+    text = str(error).lower()
+    return "rate limit" in text or "too many requests" in text
+
+
+# --- Shared instance ---
+
+_shared: Optional[RateLimiter] = None
+_shared_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Process-wide limiter (configured by the "rate_limits" block of config.json)."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = RateLimiter.from_config()
+        return _shared
@@ -0,0 +1,174 @@
+# Arquivo: anhanga/modules/crypto/checksums.py
+"""
+Offline address validation (Base58Check, bech32/bech32m, EIP-55).
+
+Regex matches are only "shaped like" an address; these checks confirm the embedded
+checksum so random tokens never reach the (slow, rate-limited) explorer APIs.
+"""
+import hashlib
+from typing import Dict, Iterable, List, Optional
+
+try:
+    from Crypto.Hash import keccak  # pycryptodome (extra "evm"): enables EIP-55 checks
+except ImportError:
+    keccak = None
+
+_B58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+_B58_INDEX = {c: i for i, c in enumerate(_B58_ALPHABET)}
+
+_BECH32_CHARSET = "qpzry9x8gf2tvdw0s3jn54khce6mua7l"
+_BECH32_INDEX = {c: i for i, c in enumerate(_BECH32_CHARSET)}
+_BECH32_CONST = 1
+_BECH32M_CONST = 0x2bc830a3
+
+
+# --- Base58 / Base58Check ---
+
+def b58decode(value: str) -> Optional[bytes]:
+    num = 0
+    for char in value:
+        digit = _B58_INDEX.get(char)
+        if digit is None:
+            return None
+        num = num * 58 + digit
+    body = num.to_bytes((num.bit_length() + 7) // 8, "big") if num else b""
+    # Each leading '1' encodes a leading zero byte
+    pad = len(value) - len(value.lstrip("1"))
+    return b"\x00" * pad + body
+
+
+def b58check_payload(value: str) -> Optional[bytes]:
+    """Returns version+payload if the 4-byte double-SHA256 checksum matches."""
+    raw = b58decode(value)
+    if raw is None or len(raw) < 5:
+        return None
+    payload, checksum = raw[:-4], raw[-4:]
+    if hashlib.sha256(hashlib.sha256(payload).digest()).digest()[:4] != checksum:
+        return None
+    return payload
+
+
+# --- Bech32 / Bech32m (BIP-173 / BIP-350) ---
+
+def _bech32_polymod(values: List[int]) -> int:
+    generator = (0x3b6a57b2, 0x26508e6d, 0x1ea119fa, 0x3d4233dd, 0x2a1462b3)
+    chk = 1
+    for value in values:
+        top = chk >> 25
+        chk = (chk & 0x1ffffff) << 5 ^ value
+        for i in range(5):
+            chk ^= generator[i] if ((top >> i) & 1) else 0
+    return chk
+
+
+def _bech32_hrp_expand(hrp: str) -> List[int]:
+    return [ord(c) >> 5 for c in hrp] + [0] + [ord(c) & 31 for c in hrp]
+
+
+def _convertbits(data: List[int], frombits: int, tobits: int) -> Optional[List[int]]:
+    acc, bits, ret = 0, 0, []
+    maxv = (1 << tobits) - 1
+    for value in data:
+        acc = (acc << frombits) | value
+        bits += frombits
+        while bits >= tobits:
+            bits -= tobits
+            ret.append((acc >> bits) & maxv)
+    if bits >= frombits or ((acc << (tobits - bits)) & maxv):
+        return None
+    return ret
+
+
+def is_valid_segwit(address: str, hrp: str = "bc") -> bool:
+    # Mixed case is invalid in bech32
+    if address.lower() != address and address.upper() != address:
+        return False
+    address = address.lower()
+    pos = address.rfind("1")
+    if pos < 1 or pos + 7 > len(address) or len(address) > 90 or address[:pos] != hrp:
+        return False
+    try:
+        data = [_BECH32_INDEX[c] for c in address[pos + 1:]]
+    except KeyError:
+        return False
+
+    const = _bech32_polymod(_bech32_hrp_expand(hrp) + data)
+    if const not in (_BECH32_CONST, _BECH32M_CONST):
+        return False
+
+    witness_version = data[0]
+    program = _convertbits(data[1:-6], 5, 8)
+    if witness_version > 16 or program is None or not 2 <= len(program) <= 40:
+        return False
+    if witness_version == 0:
+        # v0 must be bech32 with a 20 (P2WPKH) or 32 (P2WSH) byte program
+        return const == _BECH32_CONST and len(program) in (20, 32)
+    # v1+ (Taproot...) must use bech32m
+    return const == _BECH32M_CONST
+
+
+# --- Per-network checks ---
+
+def is_valid_btc_legacy(address: str) -> bool:
+    payload = b58check_payload(address)
+    # 0x00 = P2PKH ("1..."), 0x05 = P2SH ("3...")
+    return payload is not None and len(payload) == 21 and payload[0] in (0x00, 0x05)
+
+
+def is_valid_tron(address: str) -> bool:
+    payload = b58check_payload(address)
+    return payload is not None and len(payload) == 21 and payload[0] == 0x41
+
+
+def is_valid_evm(address: str) -> bool:
+    """All-lower/all-upper hex carries no checksum; mixed case must satisfy EIP-55."""
+    body = address[2:]
+    if len(body) != 40:
+        return False
+    if body == body.lower() or body == body.upper():
+        return True
+    if keccak is None:
+        return True  # Can't verify without a Keccak implementation: don't discard
+    digest = keccak.new(digest_bits=256, data=body.lower().encode()).hexdigest()
+    for char, nibble in zip(body, digest):
+        if char.isalpha() and char.isupper() != (int(nibble, 16) >= 8):
+            return False
+    return True
+
+
+def is_valid_solana(address: str) -> bool:
+    # Solana addresses are raw ed25519 public keys: exactly 32 bytes once decoded
+    raw = b58decode(address)
+    return raw is not None and len(raw) == 32
+
+
+def is_valid_address(address: str, network: str) -> bool:
+    """Dispatches on the network label used by WalletHunter / CryptoModule."""
+    if network.startswith("BTC (Legacy)"):
+        return is_valid_btc_legacy(address)
+    if network.startswith("BTC (Segwit)"):
+        return is_valid_segwit(address)
+    if network.startswith("ETH"):
+        return is_valid_evm(address)
+    if network.startswith("TRON"):
+        return is_valid_tron(address)
+    if network.startswith("SOL"):
+        return is_valid_solana(address)
+    return True
+
+
+def filter_valid(candidates: Iterable[Dict[str, str]], address_key: str = "address",
+                 network_key: str = "coin") -> List[Dict[str, str]]:
+    """
+    Bulk stage: keeps only candidates whose checksum validates.
+    Each (address, network) pair is verified once even if it repeats.
+    """
+    verdicts: Dict[tuple, bool] = {}
+    valid = []
+    for candidate in candidates:
+        key = (candidate[address_key], candidate[network_key])
+        if key not in verdicts:
+            verdicts[key] = is_valid_address(*key)
+        if verdicts[key]:
+            valid.append(candidate)
+    return valid
@@ -0,0 +1,228 @@
+# Arquivo: anhanga/modules/crypto/enrichment.py
+"""
+Enriquecimento de carteiras (saldo / total recebido) via exploradores públicos.
+
+Cada explorador passa pelo rate limiter compartilhado (core/ratelimit.py, com backoff
+em HTTP 429), as consultas são agrupadas quando a API
+aceita múltiplos endereços, e o resultado fica em cache (memória + EnrichmentCache,
+lido e gravado em lote numa thread, fora do event loop), então a mesma carteira vista
+em vários sites de uma varredura é consultada uma vez só.
+"""
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from anhanga.core.cache import CacheView
+from anhanga.core.http import get_http_client
+from anhanga.core.metrics import track_call
+from anhanga.core.ratelimit import get_rate_limiter
+
+logger = logging.getLogger(__name__)
+
+# Per-explorer query shape: `batch` is how many addresses fit in one multi-address
+# query. Request rates are set in core/ratelimit.py ("rate_limits" in config.json).
+EXPLORER_LIMITS = {
+    "blockchain": {"batch": 50, "timeout": 15},
+}
+BALANCE_TTL = 3600          # seconds an in-memory balance stays valid
+DEFAULT_CONCURRENCY = 4     # explorer requests in flight across all investigations
+
+_SATOSHI = 100_000_000
+
+
+def explorer_for(network: str) -> Optional[str]:
+    """Explorer used for balances on this network (None = link only, no lookup)."""
+    if "BTC" in network:
+        return "blockchain"
+    return None
+
+
+async def _fetch_blockchain(addresses: List[str], timeout: float) -> Dict[str, Dict[str, Any]]:
+    """One `multiaddr` call for up to `batch` addresses. Raises on HTTP/transport errors."""
+    r = await get_rate_limiter().request("blockchain", lambda: get_http_client().get(
+        "https://blockchain.info/multiaddr",
+        params={"active": "|".join(addresses), "n": 0},
+        timeout=timeout,
+    ))
+    r.raise_for_status()
+    results = {}
+    for entry in r.json().get("addresses", []):
+        results[entry.get("address", "")] = {
+            "final_balance": entry.get("final_balance", 0) / _SATOSHI,
+            "total_received": entry.get("total_received", 0) / _SATOSHI,
+            "n_tx": entry.get("n_tx", 0),
+            "unit": "BTC",
+            "status": "ok",
+        }
+    return results
+
+
+_FETCHERS = {
+    "blockchain": _fetch_blockchain,
+}
+
+# --- Process-wide state (shared by every loop / investigation) ---
+
+_memory: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+_memory_lock = threading.Lock()
+
+
+def _memory_get(address: str) -> Optional[Dict[str, Any]]:
+    with _memory_lock:
+        entry = _memory.get(address)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del _memory[address]
+            return None
+        return entry[1]
+
+
+def _memory_set(address: str, value: Dict[str, Any]):
+    with _memory_lock:
+        _memory[address] = (time.monotonic() + BALANCE_TTL, value)
+
+
+class WalletEnricher:
+    """
+    Async balance lookups with bounded concurrency.
+
+    Concurrent requests for the same address (e.g. two sites of a sweep sharing a
+    wallet) wait on a single in-flight lookup instead of hitting the explorer twice.
+    Failures are returned as {"status": "error", ...} and never cached.
+    """
+
+    def __init__(self, concurrency: int = DEFAULT_CONCURRENCY):
+        self._loop = asyncio.get_running_loop()
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    async def enrich(self, wallets: Iterable[Tuple[str, str]],
+                     cache: Optional[CacheView] = None) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Takes (address, network) pairs and returns {address: balance info}.
+        Networks without a balance explorer map to None.
+        """
+        results: Dict[str, Optional[Dict[str, Any]]] = {}
+        waiting: Dict[str, asyncio.Future] = {}
+        misses: Dict[str, str] = {}   # address -> explorer, not in memory nor in flight
+        pending: Dict[str, List[str]] = {}
+
+        for address, network in wallets:
+            if address in results or address in waiting:
+                continue
+            explorer = explorer_for(network)
+            if explorer is None:
+                results[address] = None
+                continue
+
+            cached = _memory_get(address)
+            if cached is not None:
+                results[address] = cached
+                continue
+            if address in self._inflight:
+                waiting[address] = self._inflight[address]
+                continue
+
+            waiting[address] = self._inflight[address] = self._loop.create_future()
+            misses[address] = explorer
+
+        hits: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        if cache is not None and misses:
+            # One SQLite trip (in a worker thread) for the whole page, not one per address
+            try:
+                hits = await cache.alookup_many([(explorer, address) for address, explorer in misses.items()])
+            except asyncio.CancelledError:
+                for address in misses:
+                    self._resolve(address, {"status": "error", "error": "cancelled"})
+                raise
+            except Exception as e:
+                logger.warning(f"enrichment cache unavailable, querying explorers directly: {e}")
+        for address, explorer in misses.items():
+            cached = hits.get((explorer, address))
+            if cached is not None:
+                _memory_set(address, cached)
+                self._resolve(address, cached)
+            else:
+                pending.setdefault(explorer, []).append(address)
+
+        jobs = []
+        for explorer, addresses in pending.items():
+            size = EXPLORER_LIMITS[explorer]["batch"]
+            for i in range(0, len(addresses), size):
+                jobs.append(self._lookup_batch(explorer, addresses[i:i + size], cache))
+        if jobs:
+            await asyncio.gather(*jobs)
+
+        for address, future in waiting.items():
+            results[address] = await asyncio.shield(future)
+        return results
+
+    async def _lookup_batch(self, explorer: str, addresses: List[str], cache: Optional[CacheView]):
+        settings = EXPLORER_LIMITS[explorer]
+        try:
+            async with self._semaphore:
+                with track_call(explorer):
+                    data = await _FETCHERS[explorer](addresses, settings["timeout"])
+        except asyncio.CancelledError:
+            # Don't leave other investigations waiting on a lookup that will never finish
+            for address in addresses:
+                self._resolve(address, {"status": "error", "error": "cancelled"})
+            raise
+        except Exception as e:
+            logger.warning(f"{explorer} lookup failed for {len(addresses)} address(es): {e}")
+            error = {"status": "error", "error": str(e) or type(e).__name__}
+            for address in addresses:
+                self._resolve(address, error)
+            return
+
+        # bech32 addresses may come back lowercased
+        lowered = {key.lower(): value for key, value in data.items()}
+        entries = []
+        for address in addresses:
+            value = data.get(address) or lowered.get(address.lower())
+            negative = value is None
+            if negative:
+                value = {"status": "not_found"}
+            _memory_set(address, value)
+            entries.append((address, value, negative))
+            self._resolve(address, value)
+        if cache is not None:
+            try:
+                await cache.astore_many(explorer, entries)
+            except Exception as e:
+                logger.warning(f"could not cache {len(entries)} {explorer} answer(s): {e}")
+
+    def _resolve(self, address: str, value: Dict[str, Any]):
+        future = self._inflight.pop(address, None)
+        if future is not None and not future.done():
+            future.set_result(value)
+
+
+# --- Shared instance ---
+
+_enricher: Optional[WalletEnricher] = None
+
+
+def get_wallet_enricher() -> WalletEnricher:
+    """Returns the enricher bound to the running event loop, creating it on first use."""
+    global _enricher
+    loop = asyncio.get_running_loop()
+    if _enricher is None or _enricher._loop is not loop:
+        _enricher = WalletEnricher()
+    return _enricher
+
+
+def format_balance(info: Optional[Dict[str, Any]]) -> str:
+    """Human-readable summary used by the CLI / CryptoModule evidence."""
+    if info is None:
+        return "Consulta API Indisponível (Ver Link)"
+    status = info.get("status")
+    if status == "ok":
+        unit = info.get("unit", "")
+        return f"💰 Saldo: {info['final_balance']} {unit}\n📥 Total Recebido: {info['total_received']} {unit}"
+    if status == "not_found":
+        return "Sem histórico on-chain"
+    return "Erro na consulta online (API Rate Limit)"
@@ -1,11 +1,17 @@
 # Arquivo: anhanga/modules/crypto/hunter.py
+import asyncio
 import re
-import requests
+from typing import Optional
 from anhanga.core.base import AnhangáModule
+from anhanga.core.cache import CacheView, get_enrichment_cache
+from anhanga.core.http import close_http_client
+from anhanga.modules.crypto.checksums import filter_valid
+from anhanga.modules.crypto.enrichment import format_balance, get_wallet_enricher
 
 class CryptoModule(AnhangáModule):
-    def __init__(self):
+    def __init__(self, cache: Optional[CacheView] = None):
         super().__init__()
+        self.cache = cache
         self.meta = {
             "name": "CryptoHunter",
             "description": "Rastreio de Criptoativos (BTC/ETH/TRON)",
@@ -16,8 +22,15 @@ class CryptoModule(AnhangáModule):
         """
         Busca endereços de criptomoedas em um texto (ou recebe o endereço direto).
         """
-        found = False
-        
+        async def _runner():
+            try:
+                return await self.run_async(text)
+            finally:
+                await close_http_client()
+
+        return asyncio.run(_runner())
+
+    async def run_async(self, text: str) -> bool:
         # 1. Regex Patterns (Padrões de Endereço)
         patterns = {
             "BTC (Legacy)": r"\b(1[a-km-zA-Z1-9]{25,34})\b",
@@ -27,39 +40,31 @@ class CryptoModule(AnhangáModule):
         }
 
         # 2. Varredura
+        candidates = []
         for net, pattern in patterns.items():
-            matches = re.findall(pattern, text)
-            for wallet in matches:
-                found = True
-                self._analyze_wallet(wallet, net)
+            for wallet in re.findall(pattern, text):
+                candidates.append({"address": wallet, "coin": net})
+
+        # 3. Validação de checksum em lote ANTES de qualquer consulta online
+        wallets = filter_valid(candidates)
+
+        # 4. Saldos: consultas em lote, com rate limit e cache por endereço
+        cache = self.cache if self.cache is not None else CacheView(get_enrichment_cache())
+        balances = await get_wallet_enricher().enrich(
+            ((w["address"], w["coin"]) for w in wallets), cache=cache
+        )
+        for wallet in wallets:
+            self._analyze_wallet(wallet["address"], wallet["coin"], balances.get(wallet["address"]))
 
-        if not found:
+        if not wallets:
             self.add_evidence("Info", "Nenhuma carteira cripto detectada no alvo.", "low")
             return False
             
         return True
 
-    def _analyze_wallet(self, wallet, network):
-        """Enriquece o dado da carteira com APIs públicas."""
-        
-        # Dados básicos
-        evidence_content = f"Endereço: {wallet}\nRede: {network}"
-        
-        # Consultas de Saldo (Free APIs - Best Effort)
-        balance_info = "Consulta API Indisponível (Ver Link)"
-        
-        try:
-            if "BTC" in network:
-                # Blockchain.com API (Free)
-                r = requests.get(f"https://blockchain.info/rawaddr/{wallet}", timeout=10)
-                if r.status_code == 200:
-                    data = r.json()
-                    total_rx = data.get('total_received', 0) / 100000000
-                    final_bal = data.get('final_balance', 0) / 100000000
-                    balance_info = f"💰 Saldo: {final_bal} BTC\n📥 Total Recebido: {total_rx} BTC"
-                    
-        except Exception:
-            balance_info = "Erro na consulta online (API Rate Limit)"
+    def _analyze_wallet(self, wallet, network, balance=None):
+        """Monta a evidência da carteira com o saldo já consultado (ver enrichment.py)."""
+        balance_info = format_balance(balance)
 
         # Adiciona ao relatório
         full_report = f"{balance_info}\n\n🔗 Explorador:\n{self._get_explorer_link(wallet, network)}"
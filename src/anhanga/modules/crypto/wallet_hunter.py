@@ -1,15 +1,63 @@
 import re
-from typing import List, Dict, Any
+from bisect import bisect_left
+from functools import lru_cache
+from typing import Callable, List, Dict, Any, Iterable, Optional, Tuple
 from anhanga.core.base import AnhangáModule
+from anhanga.modules.crypto.checksums import is_valid_address
+
+# Every coin pattern is "\b<ASCII alnum body>\b", so any match is a whole word-run
+# of 26-62 ASCII alphanumerics. One regex finds all such runs in a single pass;
+# each distinct run is then classified against the per-coin bodies below.
+_CANDIDATE_RE = re.compile(r"\b[0-9A-Za-z]{26,62}\b")
+
+# Regex Patterns (body only, matched with fullmatch against a candidate run)
+COIN_PATTERNS = {
+    "BTC (Legacy)": re.compile(r"1[a-km-zA-Z1-9]{25,34}"),
+    "BTC (Segwit)": re.compile(r"bc1[a-zA-Z0-9]{35,59}"),
+    "ETH/EVM": re.compile(r"0x[a-fA-F0-9]{40}"),
+    "TRON (TRC20)": re.compile(r"T[a-zA-Z0-9]{33}"),
+    # Strict Solana: Base58 (no 0,O,I,l), 32-44 chars.
+    "SOL": re.compile(r"[1-9A-HJ-NP-Za-km-z]{32,44}"),
+}
+
+_CAMEL_CASE_RE = re.compile(r"[a-z][A-Z]")
+
+
+@lru_cache(maxsize=None)
+def _coins_re(coins: Tuple[str, ...]) -> "re.Pattern[str]":
+    # One fullmatch per candidate instead of one per coin; group i+1 = coins[i]
+    return re.compile("|".join(f"({COIN_PATTERNS[coin].pattern})" for coin in coins))
+
+
+def has_checksummed_address(text: str, coins: Optional[Iterable[str]] = None) -> bool:
+    """
+    Cheap probe: does `text` hold a run that is a valid (checksummed) address of one
+    of `coins` (default: all)? Stops at the first one; no context or blacklist filters.
+    """
+    coins = tuple(coins or COIN_PATTERNS)
+    matcher = _coins_re(coins)
+    for match in _CANDIDATE_RE.finditer(text):
+        candidate = match.group(0)
+        hit = matcher.fullmatch(candidate)
+        if hit is None:
+            continue
+        # Alternation stops at the first matching coin; check every coin it could be
+        for coin in coins[hit.lastindex - 1:]:
+            if COIN_PATTERNS[coin].fullmatch(candidate) and is_valid_address(candidate, coin):
+                return True
+    return False
+
 
 class WalletHunter(AnhangáModule):
-    def __init__(self):
+    def __init__(self, validate_checksums: bool = True):
         super().__init__()
         self.meta = {
-            "name": "Wallet Hunter v2.2 - Strict Anti-Hallucination",
-            "description": "Crypto Wallet Extractor with CamelCase Filters and Entropy Checks",
-            "version": "2.2"
+            "name": "Wallet Hunter v2.3 - Strict Anti-Hallucination",
+            "description": "Crypto Wallet Extractor with CamelCase Filters, Entropy and Checksum Checks",
+            "version": "2.3"
         }
+        # Base58Check / bech32 / EIP-55 / ed25519-length validation (see checksums.py)
+        self.validate_checksums = validate_checksums
         # Keywords that indicate a financial context
         self.context_keywords = [
             "deposit", "deposito", "depósito",
@@ -34,53 +82,112 @@ class WalletHunter(AnhangáModule):
 
     def scan_html(self, html: str) -> List[Dict[str, Any]]:
         found_wallets = []
-        
-        # Regex Patterns
-        patterns = {
-            "BTC (Legacy)": r"\b(1[a-km-zA-Z1-9]{25,34})\b",
-            "BTC (Segwit)": r"\b(bc1[a-zA-Z0-9]{35,59})\b",
-            "ETH/EVM": r"\b(0x[a-fA-F0-9]{40})\b",
-            "TRON (TRC20)": r"\b(T[a-zA-Z0-9]{33})\b",
-            # Strict Solana: Base58 (no 0,O,I,l), 32-44 chars.
-            "SOL": r"\b[1-9A-HJ-NP-Za-km-z]{32,44}\b"
-        }
-        
-        for coin, pattern in patterns.items():
-            for match in re.finditer(pattern, html):
-                wallet_address = match.group(0) # Use group 0 as some patterns don't have groups
-                start, end = match.span()
-                
-                # --- FILTER 1: CamelCase / Code Variable Check ---
-                # A real wallet is random. It shouldn't look like "PaymentSuccessMessage"
-                # If it has a lowercase letter followed by an uppercase letter multiple times, suspicious.
-                if re.search(r'[a-z]+[A-Z]', wallet_address):
-                    continue
+        seen = set()
+
+        # Compiled once per scan: a single alternation instead of 40+ substring checks
+        blacklist_re = re.compile("|".join(map(re.escape, self.blacklist_words)))
+
+        # --- Single pass over the HTML ---
+        # Occurrences are grouped per coin so the output keeps the original order
+        # (coin by coin, then by position in the page).
+        hits: Dict[str, List[Tuple[str, int, int]]] = {coin: [] for coin in COIN_PATTERNS}
+        coins_for: Dict[str, List[str]] = {}
+        for match in _CANDIDATE_RE.finditer(html):
+            wallet_address = match.group(0)
+            coins = coins_for.get(wallet_address)
+            if coins is None:
+                coins = coins_for[wallet_address] = self._classify(wallet_address, blacklist_re)
+            for coin in coins:
+                hits[coin].append((wallet_address, match.start(), match.end()))
 
-                # --- FILTER 2: Entropy / Blacklist Check ---
-                # Check for common words inside the string (case insensitive)
-                lowered_wallet = wallet_address.lower()
-                if any(word in lowered_wallet for word in self.blacklist_words):
+        if not any(hits.values()):
+            return found_wallets
+
+        # --- FILTER 3: Context Validation (Strict 50 chars) ---
+        has_context = self._context_checker(html)
+        for coin, occurrences in hits.items():
+            for wallet_address, start, end in occurrences:
+                # Dedifferentiate
+                if wallet_address in seen:
                     continue
-                
-                # Specific check for Solana: Must contain at least one number
-                if coin == "SOL" and not any(char.isdigit() for char in wallet_address):
-                     continue
-
-                # --- FILTER 3: Context Validation (Strict 50 chars) ---
-                if self._validate_context(html, start, end):
-                    # Dedifferentiate
-                    if not any(w['address'] == wallet_address for w in found_wallets):
-                        found_wallets.append({
-                            'coin': coin,
-                            'address': wallet_address,
-                            'confidence': 'Alta'
-                        })
-                        
+                if has_context(start, end):
+                    seen.add(wallet_address)
+                    found_wallets.append({
+                        'coin': coin,
+                        'address': wallet_address,
+                        'confidence': 'Alta'
+                    })
+
         return found_wallets
 
+    def _classify(self, wallet_address: str, blacklist_re) -> List[str]:
+        """Coins a candidate can be, after the address-only filters (1 and 2)."""
+        # --- FILTER 1: CamelCase / Code Variable Check ---
+        # A real wallet is random. It shouldn't look like "PaymentSuccessMessage"
+        if _CAMEL_CASE_RE.search(wallet_address):
+            return []
+
+        # --- FILTER 2: Entropy / Blacklist Check ---
+        # Check for common words inside the string (case insensitive)
+        if blacklist_re.search(wallet_address.lower()):
+            return []
+
+        coins = []
+        for coin, pattern in COIN_PATTERNS.items():
+            if not pattern.fullmatch(wallet_address):
+                continue
+            # Specific check for Solana: Must contain at least one number
+            if coin == "SOL" and wallet_address.isalpha():
+                continue
+            # --- FILTER 4: Checksum ---
+            # A Base58 token that fails BTC's checksum may still be a valid SOL key, so
+            # validation is per coin, not per address.
+            if self.validate_checksums and not is_valid_address(wallet_address, coin):
+                continue
+            coins.append(coin)
+        return coins
+
+    def _context_checker(self, html: str, window: int = 50) -> Callable[[int, int], bool]:
+        """
+        Precomputes every context-keyword position once, so each candidate's
+        window check is a binary search instead of slicing + lowercasing + N scans.
+        """
+        lowered = html.lower()
+        if len(lowered) != len(html):
+            # Some chars expand when lowercased (e.g. "İ"): offsets no longer line up,
+            # fall back to the per-candidate check.
+            return lambda start, end: self._validate_context(html, start, end, window)
+
+        spans = []
+        for keyword in set(self.context_keywords):
+            size = len(keyword)
+            pos = lowered.find(keyword)
+            while pos != -1:
+                spans.append((pos, pos + size))
+                pos = lowered.find(keyword, pos + 1)
+        spans.sort()
+
+        starts = [s for s, _ in spans]
+        # min_end[i]: earliest keyword end among occurrences starting at or after starts[i]
+        min_end = [0] * len(spans)
+        running = len(html) + 1
+        for i in range(len(spans) - 1, -1, -1):
+            running = min(running, spans[i][1])
+            min_end[i] = running
+
+        length = len(html)
+
+        def has_context(start: int, end: int) -> bool:
+            snippet_start = max(0, start - window)
+            snippet_end = min(length, end + window)
+            i = bisect_left(starts, snippet_start)
+            return i < len(starts) and min_end[i] <= snippet_end
+
+        return has_context
+
     def _validate_context(self, html: str, start: int, end: int, window: int = 50) -> bool:
         snippet_start = max(0, start - window)
         snippet_end = min(len(html), end + window)
         snippet = html[snippet_start:snippet_end].lower()
-        
+
         return any(keyword in snippet for keyword in self.context_keywords)
@@ -1,68 +1,179 @@
+import hashlib
 import json
 import os
+import threading
 from urllib.parse import urlparse
-from typing import Dict, Any
+from typing import Dict, Any, Iterable, List, Optional
+
+# Process-wide registry: one parsed whitelist (and its index) per db file
+_shared_instances: Dict[str, "BetCompliance"] = {}
+_shared_lock = threading.Lock()
 
 class BetCompliance:
     def __init__(self, db_path: str = None):
+        self.db_path = self._resolve_path(db_path)
+        self.whitelist = []
+        self.domain_index = {}
+        self.db_hash = None
+        self._fingerprint = None
+        self._lock = threading.Lock()
+        self.load_db()
+
+    @staticmethod
+    def _resolve_path(db_path: Optional[str] = None) -> str:
         if db_path is None:
             # Determine path relative to this file
             base_dir = os.path.dirname(os.path.abspath(__file__))
             # Path to src/anhanga/data/bets_db.json relative to this file
             db_path = os.path.join(base_dir, "..", "..", "..", "data", "bets_db.json")
+        return os.path.abspath(db_path)
 
-        self.db_path = os.path.abspath(db_path)
-        self.whitelist = []
-        self.load_db()
+    @classmethod
+    def shared(cls, db_path: str = None) -> "BetCompliance":
+        """
+        Returns the process-wide checker for `db_path`, parsing the file only once.
+        The file is re-read only when its mtime/size changed AND its content hash differs.
+        Safe to call from worker threads and asyncio tasks.
+        """
+        path = cls._resolve_path(db_path)
+        with _shared_lock:
+            checker = _shared_instances.get(path)
+            if checker is None:
+                checker = _shared_instances[path] = cls(path)
+                return checker
+        checker.refresh_if_stale()
+        return checker
+
+    def _stat(self):
+        try:
+            st = os.stat(self.db_path)
+            return (st.st_mtime_ns, st.st_size)
+        except OSError:
+            return None
+
+    def refresh_if_stale(self) -> bool:
+        """Cheap stat() check; reloads only if the file content actually changed."""
+        if self._stat() == self._fingerprint:
+            return False
+        with self._lock:
+            fingerprint = self._stat()
+            if fingerprint == self._fingerprint:
+                return False  # Another thread already reloaded it
+            raw = self._read()
+            if raw is not None and hashlib.sha256(raw).hexdigest() == self.db_hash:
+                # Touched but identical (e.g. re-downloaded list): keep the parsed index
+                self._fingerprint = fingerprint
+                return False
+            self._apply(raw, fingerprint)
+            return True
+
+    def reload(self):
+        """Forces a re-read of the db file (e.g. a long-running worker picking up a new government list)."""
+        with self._lock:
+            fingerprint = self._stat()
+            self._apply(self._read(), fingerprint)
 
     def load_db(self):
+        self.reload()
+
+    def _read(self) -> Optional[bytes]:
         try:
-            with open(self.db_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                self.whitelist = data.get("whitelist", [])
+            with open(self.db_path, 'rb') as f:
+                return f.read()
         except FileNotFoundError:
             # Fallback or empty if file not found (should handle error properly in production)
             print(f"Aviso: Arquivo de banco de dados não encontrado em {self.db_path}")
-            self.whitelist = []
         except Exception as e:
             print(f"Erro ao carregar banco de dados: {e}")
-            self.whitelist = []
+        return None
 
-    def check_compliance(self, url: str) -> Dict[str, Any]:
+    def _apply(self, raw: Optional[bytes], fingerprint):
+        whitelist = []
+        if raw is not None:
+            try:
+                whitelist = json.loads(raw.decode('utf-8')).get("whitelist", [])
+            except Exception as e:
+                print(f"Erro ao carregar banco de dados: {e}")
+
+        # Build the new index fully before publishing it: readers never see a half-built one
+        index = self._build_index(whitelist)
+        self.whitelist, self.domain_index = whitelist, index
+        self.db_hash = hashlib.sha256(raw).hexdigest() if raw is not None else None
+        self._fingerprint = fingerprint
+
+    @staticmethod
+    def _build_index(whitelist: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
         """
-        Check if the domain exists in whitelist.
-        If Found: Return status: AUTHORIZED, auth_type: (from JSON), operator: (from JSON).
-        If Not Found: Check if ends with .bet.br. If yes -> UNLICENSED_SOVEREIGN. If no -> ILLEGAL_FOREIGN.
+        Compiles the whitelist into {normalized domain: entry}.
+        A host is then matched by probing its own suffixes (a.b.c -> a.b.c, b.c, c),
+        so a lookup costs O(labels in host) instead of O(whitelisted domains).
         """
+        index = {}
+        for entry in whitelist:
+            for whitelisted_domain in entry.get("domains", []):
+                # First entry wins, as in the original list scan
+                index.setdefault(whitelisted_domain.lower(), entry)
+        return index
+
+    @staticmethod
+    def _normalize_domain(url: str) -> str:
         # Normalize URL to domain
         if not url.startswith(("http://", "https://")):
-            # If the user passed something like "HTTPS://ZeroUm.Bet", urlparse might fail if we just prepend http://
-            # But "HTTPS://ZeroUm.Bet" is already having a scheme if we lowercase it.
-            # However, `urlparse` is case sensitive for scheme detection sometimes? No.
-            # If input is "HTTPS://ZeroUm.Bet", urlparse("HTTPS://ZeroUm.Bet").scheme is "https" (case insensitive usually)
-
             # If it doesn't start with http/https, assume it's a domain
             if "://" not in url:
                 url = "http://" + url
 
-        parsed_url = urlparse(url)
-        domain = parsed_url.netloc.lower()
+        domain = urlparse(url).netloc.lower()
         if domain.startswith("www."):
             domain = domain[4:]
+        return domain
+
+    def _lookup(self, domain: str) -> Optional[Dict[str, Any]]:
+        # Exact match first, then every parent suffix (subdomain match)
+        candidate = domain
+        while candidate:
+            entry = self.domain_index.get(candidate)
+            if entry is not None:
+                return entry
+            dot = candidate.find(".")
+            if dot < 0:
+                return None
+            candidate = candidate[dot + 1:]
+        return None
+
+    def check_compliance(self, url: str) -> Dict[str, Any]:
+        """
+        Check if the domain exists in whitelist.
+        If Found: Return status: AUTHORIZED, auth_type: (from JSON), operator: (from JSON).
+        If Not Found: Check if ends with .bet.br. If yes -> UNLICENSED_SOVEREIGN. If no -> ILLEGAL_FOREIGN.
+        """
+        domain = self._normalize_domain(url)
+        return self._verdict(domain)
 
+    def check_many(self, urls: Iterable[str]) -> List[Dict[str, Any]]:
+        """
+        Batch version of check_compliance. Results come back in input order;
+        hosts repeated in the batch are resolved once.
+        """
+        verdicts: Dict[str, Dict[str, Any]] = {}
+        results = []
+        for url in urls:
+            domain = self._normalize_domain(url)
+            if domain not in verdicts:
+                verdicts[domain] = self._verdict(domain)
+            results.append(dict(verdicts[domain]))
+        return results
+
+    def _verdict(self, domain: str) -> Dict[str, Any]:
         # Check whitelist
-        for entry in self.whitelist:
-            for whitelisted_domain in entry.get("domains", []):
-                # Normalize whitelisted domain
-                whitelisted_domain = whitelisted_domain.lower()
-                # Check exact match or subdomain
-                if domain == whitelisted_domain or domain.endswith("." + whitelisted_domain):
-                    return {
-                        "status": "AUTHORIZED",
-                        "auth_type": entry.get("auth_type"),
-                        "operator": entry.get("operator"),
-                        "brand": entry.get("brands", ["Unknown"])[0] # Taking first brand as representative
-                    }
+        entry = self._lookup(domain)
+        if entry is not None:
+            return {
+                "status": "AUTHORIZED",
+                "auth_type": entry.get("auth_type"),
+                "operator": entry.get("operator"),
+                "brand": entry.get("brands", ["Unknown"])[0] # Taking first brand as representative
+            }
 
         # Not found in whitelist
         if domain.endswith(".bet.br"):
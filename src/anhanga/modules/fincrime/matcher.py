@@ -0,0 +1,149 @@
+# Arquivo: anhanga/modules/fincrime/matcher.py
+"""
+Motor de similaridade de nomes para o "Orange Check" (detecção de laranjas).
+
+Nomes de operadores/marcas autorizados são normalizados (sem acentos, sem sufixos
+societários) e vetorizados em trigramas de caracteres uma única vez. Cada
+beneficiário PIX é comparado contra o índice invertido inteiro (cosseno),
+em vez de um SequenceMatcher por par.
+"""
+import heapq
+import math
+import re
+import threading
+import unicodedata
+from collections import Counter
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from anhanga.modules.fincrime.compliance.validator import BetCompliance
+
+MATCH_THRESHOLD = 0.6   # Same cut-off the difflib check used
+NGRAM = 3
+
+# Trailing company-type tokens that say nothing about who the company is
+LEGAL_SUFFIXES = frozenset({"LTDA", "SA", "ME", "EPP", "EIRELI", "MEI"})
+_SA_RE = re.compile(r"\bS\s*[./]\s*A\b\.?")   # "S.A.", "S/A", "S. A."
+_TOKEN_RE = re.compile(r"[A-Z0-9]+")
+
+
+def normalize_name(name: str) -> str:
+    """'Kaizen Gaming Brasil Ltda.' -> 'KAIZEN GAMING BRASIL'"""
+    if not name:
+        return ""
+    stripped = unicodedata.normalize("NFKD", name)
+    stripped = "".join(c for c in stripped if not unicodedata.combining(c)).upper()
+    tokens = _TOKEN_RE.findall(_SA_RE.sub(" SA ", stripped))
+    core = list(tokens)
+    while core and core[-1] in LEGAL_SUFFIXES:
+        core.pop()
+    # A name made only of suffixes ("S/A") keeps its tokens rather than vanishing
+    return " ".join(core or tokens)
+
+
+@lru_cache(maxsize=4096)
+def _vector(normalized: str) -> Tuple[Tuple[Tuple[str, float], ...], float]:
+    """Character n-gram counts of a normalized name, plus the vector norm."""
+    padded = f" {normalized} "
+    grams = Counter(padded[i:i + NGRAM] for i in range(len(padded) - NGRAM + 1))
+    norm = math.sqrt(sum(v * v for v in grams.values()))
+    return tuple(grams.items()), norm
+
+
+def similarity(a: str, b: str) -> float:
+    """Cosine similarity of two names after normalization (0.0 - 1.0)."""
+    va, na = _vector(normalize_name(a))
+    vb, nb = _vector(normalize_name(b))
+    if not na or not nb:
+        return 0.0
+    other = dict(vb)
+    return sum(w * other.get(g, 0) for g, w in va) / (na * nb)
+
+
+class OperatorMatcher:
+    """
+    Top-k fuzzy lookup of a name against every authorized operator and brand.
+
+    The corpus is built once (see `from_whitelist`); queries only touch the
+    postings of their own n-grams, so a lookup is sub-millisecond even when
+    checking every PIX beneficiary of a sweep.
+    """
+
+    def __init__(self, names: Iterable[Dict[str, Any]]):
+        """
+        `names`: dicts with at least "name"; any other keys ("operator", "kind"...)
+        are carried into the match result.
+        """
+        self.docs: List[Dict[str, Any]] = []
+        self._postings: Dict[str, List[Tuple[int, float]]] = {}
+        for doc in names:
+            normalized = normalize_name(doc.get("name", ""))
+            grams, norm = _vector(normalized)
+            if not norm:
+                continue
+            doc_id = len(self.docs)
+            self.docs.append(dict(doc, normalized=normalized))
+            for gram, count in grams:
+                # Postings hold pre-normalized weights: scoring is a sparse dot product
+                self._postings.setdefault(gram, []).append((doc_id, count / norm))
+
+    @classmethod
+    def from_whitelist(cls, whitelist: Iterable[Dict[str, Any]]) -> "OperatorMatcher":
+        names = []
+        for entry in whitelist:
+            operator = entry.get("operator")
+            if operator:
+                names.append({"name": operator, "operator": operator, "kind": "operator"})
+            for brand in entry.get("brands", []):
+                names.append({"name": brand, "operator": operator, "kind": "brand"})
+        return cls(names)
+
+    def top_k(self, name: str, k: int = 3) -> List[Dict[str, Any]]:
+        """Best `k` corpus entries for `name`, highest score first."""
+        grams, norm = _vector(normalize_name(name))
+        if not norm or not self.docs:
+            return []
+        scores: Dict[int, float] = {}
+        for gram, count in grams:
+            weight = count / norm
+            for doc_id, doc_weight in self._postings.get(gram, ()):
+                scores[doc_id] = scores.get(doc_id, 0.0) + weight * doc_weight
+        best = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+        return [self._result(doc_id, score) for doc_id, score in best]
+
+    def match(self, name: str) -> Optional[Dict[str, Any]]:
+        """Best match for `name` (or None if it shares no n-gram with the corpus)."""
+        top = self.top_k(name, k=1)
+        return top[0] if top else None
+
+    def match_many(self, names: Iterable[str]) -> List[Optional[Dict[str, Any]]]:
+        """Batch `match`: one result per input, repeated names scored once."""
+        memo: Dict[str, Optional[Dict[str, Any]]] = {}
+        results = []
+        for name in names:
+            if name not in memo:
+                memo[name] = self.match(name)
+            results.append(dict(memo[name]) if memo[name] else None)
+        return results
+
+    def _result(self, doc_id: int, score: float) -> Dict[str, Any]:
+        doc = self.docs[doc_id]
+        result = {key: value for key, value in doc.items() if key != "normalized"}
+        result["score"] = round(min(score, 1.0), 4)
+        return result
+
+
+# --- Shared instance (rebuilt when the compliance whitelist changes) ---
+
+_shared: Optional[Tuple[Optional[str], OperatorMatcher]] = None
+_shared_lock = threading.Lock()
+
+
+def get_operator_matcher(compliance: Optional[BetCompliance] = None) -> OperatorMatcher:
+    """Matcher over the shared BetCompliance whitelist, built once per db version."""
+    global _shared
+    compliance = compliance or BetCompliance.shared()
+    with _shared_lock:
+        if _shared is None or _shared[0] != compliance.db_hash:
+            _shared = (compliance.db_hash, OperatorMatcher.from_whitelist(compliance.whitelist))
+        return _shared[1]
@@ -1,8 +1,138 @@
-import re
-import crcmod
-from typing import List, Dict, Any, Optional
+from binascii import crc_hqx
+from typing import Iterable, Iterator, List, Dict, Any, Optional, Tuple, Union
 from anhanga.core.base import AnhangáModule
 
+# Tags 26 (Merchant Account Info) and 62 (Additional Data Field) contain nested TLV
+_NESTED_TAGS = frozenset(("26", "62"))
+
+# --- Streaming extraction ---
+_ANCHOR = "000201"            # Payload Format Indicator: every BR Code starts with it
+_PIX_GUI = "BR.GOV.BCB.PIX"
+MAX_PAYLOAD = 512             # EMV QRCPS limit, after cleanup
+_MAX_SPAN = 2 * MAX_PAYLOAD   # raw chars (incl. stripped whitespace) walked per anchor
+_STRIP = frozenset("\r\n\t")  # Do NOT strip " ": valid inside Name/City fields
+_DIGITS = frozenset("0123456789")
+_HEX = frozenset("0123456789abcdefABCDEF")
+
+_FOUND, _FAIL, _NEED_MORE = range(3)
+
+
+def _take(buf: str, j: int, n: int) -> Tuple[Optional[str], int]:
+    """Reads `n` chars from `buf[j:]` skipping \\r\\n\\t. Returns (None, j) if the buffer ends first."""
+    chunk = buf[j:j + n]
+    if len(chunk) == n and "\n" not in chunk and "\r" not in chunk and "\t" not in chunk:
+        return chunk, j + n
+    out = []
+    size = len(buf)
+    while len(out) < n:
+        if j >= size:
+            return None, j
+        c = buf[j]
+        j += 1
+        if c not in _STRIP:
+            out.append(c)
+    return "".join(out), j
+
+
+def _walk(buf: str, start: int) -> Tuple[int, int, Optional[str]]:
+    """
+    Walks the TLV fields forward from an anchor until the CRC field (6304 + 4 hex).
+    Returns (status, end, code): no backtracking, at most _MAX_SPAN chars per anchor.
+    """
+    j = start
+    parts = []
+    tags = set()
+    total = 0
+    while True:
+        tag, j = _take(buf, j, 2)
+        if tag is None:
+            return _NEED_MORE, j, None
+        length, j = _take(buf, j, 2)
+        if length is None:
+            return _NEED_MORE, j, None
+        if not (_DIGITS.issuperset(tag) and _DIGITS.issuperset(length)) or tag in tags:
+            # IDs never repeat in a payload: also stops "000201000201..." chains early
+            return _FAIL, j, None
+        tags.add(tag)
+
+        if tag == "63":
+            if length != "04":
+                return _FAIL, j, None
+            crc, j = _take(buf, j, 4)
+            if crc is None:
+                return _NEED_MORE, j, None
+            if not _HEX.issuperset(crc) or total + 8 > MAX_PAYLOAD:
+                return _FAIL, j, None
+            code = "".join(parts) + "6304" + crc
+            if _PIX_GUI not in code.upper():
+                return _FAIL, j, None
+            return _FOUND, j, code
+
+        value, j = _take(buf, j, int(length))
+        if value is None:
+            return _NEED_MORE, j, None
+        total += 4 + len(value)
+        if total > MAX_PAYLOAD or j - start > _MAX_SPAN:
+            return _FAIL, j, None
+        parts.append(tag + length + value)
+
+
+class PixStreamExtractor:
+    """
+    Incremental BR Code extractor: feed text chunks, get PIX payloads back.
+
+    Anchors on "000201" and validates the TLV chain forward up to the CRC field,
+    so cost is linear in the input. Only the unfinished tail of the current
+    anchor (at most ~1KB) is carried over between chunks.
+    """
+
+    def __init__(self):
+        self._buf = ""
+        self._pos = 0
+        self._seen = set()
+
+    def feed(self, chunk: str) -> List[str]:
+        self._buf += chunk
+        return self._scan(final=False)
+
+    def close(self) -> List[str]:
+        codes = self._scan(final=True)
+        self._buf, self._pos = "", 0
+        return codes
+
+    def _scan(self, final: bool) -> List[str]:
+        buf, pos = self._buf, self._pos
+        codes = []
+        keep = None
+        while True:
+            anchor = buf.find(_ANCHOR, pos)
+            if anchor == -1:
+                # A partial "000201" may straddle the chunk boundary
+                keep = max(pos, len(buf) - len(_ANCHOR) + 1)
+                break
+            status, end, code = _walk(buf, anchor)
+            if status == _NEED_MORE and not final and len(buf) - anchor <= _MAX_SPAN:
+                keep = anchor
+                break
+            if status == _FOUND:
+                if code not in self._seen:
+                    self._seen.add(code)
+                    codes.append(code)
+                pos = end
+            else:
+                pos = anchor + 1
+        self._buf = buf[keep:]
+        self._pos = 0
+        return codes
+
+
+def iter_pix_codes(chunks: Iterable[str]) -> Iterator[str]:
+    """Yields unique PIX payloads (first-seen order) from an iterable of text chunks."""
+    extractor = PixStreamExtractor()
+    for chunk in chunks:
+        yield from extractor.feed(chunk)
+    yield from extractor.close()
+
 class PixIntelligence(AnhangáModule):
     def __init__(self):
         super().__init__()
@@ -12,7 +142,7 @@ class PixIntelligence(AnhangáModule):
             "version": "3.0"
         }
 
-    def run(self, html: str) -> Dict[str, Any]:
+    def run(self, html: Union[str, Iterable[str]]) -> Dict[str, Any]:
         """
         Main entry point for PIX analysis.
         Returns a dictionary with extracted data and flags.
@@ -28,44 +158,51 @@ class PixIntelligence(AnhangáModule):
         results["raw_codes"] = raw_codes
         
         # 2. Decode & Validate
-        for code in raw_codes:
-            decoded = self.decode_emv(code)
+        for decoded in self.decode_many(raw_codes):
             if decoded:
                 results["decoded"].append(decoded)
                 
         return results
 
-    def extract_from_html(self, html: str) -> List[str]:
+    def extract_from_html(self, html: Union[str, Iterable[str]]) -> List[str]:
         """
-        Extracts raw Copy-Paste PIX strings (EMV QRCPS) using Regex.
-        Pattern: Starts with 000201 and contains BR.GOV.BCB.PIX
+        Extracts raw Copy-Paste PIX strings (EMV QRCPS).
+        Accepts the full HTML or an iterable of chunks (streamed page content).
+        Payloads start with 000201, contain BR.GOV.BCB.PIX and end at 6304 + CRC;
+        \\r\\n\\t inside them are dropped. Unique, in order of appearance.
         """
-        # Regex explanation:
-        # \b000201: Starts with payload format indicator
-        # [\w\.\-\$\%\@\s]+: Permissible characters (very broad to catch dirty inputs)
-        # BR\.GOV\.BCB\.PIX: Mandatory domain
-        # .+?6304[A-F0-9]{4}: Ends with CRC tag (6304) and 4 hex chars
-        
-        # Updated Regex: More permissive to capture various EMV content characters
-        # Matches: Start (000201) ... Domain ... End (6304 + 4 hex)
-        pattern = r"(000201.+?BR\.GOV\.BCB\.PIX.+?6304[A-F0-9]{4})"
-        matches = re.findall(pattern, html, re.IGNORECASE | re.DOTALL)
-        
-        # Clean up whitespace/newlines from matches
-        # CAUTION: Do NOT remove spaces " " as they are valid within Name/City fields.
-        cleaned_matches = [m.replace("\n", "").replace("\r", "").replace("\t", "") for m in matches]
-        return list(set(cleaned_matches))
+        if isinstance(html, str):
+            html = (html,)
+        return list(iter_pix_codes(html))
 
     def decode_emv(self, payload: str) -> Optional[Dict[str, Any]]:
         """
         Parses the EMV TLV structure and extracts critical IDs.
         """
-        if not self._verify_crc16(payload):
+        return self._extract(payload, self._verify_crc16(payload), self._parse_tlv(payload))
+
+    def decode_many(self, payloads: Iterable[str]) -> List[Optional[Dict[str, Any]]]:
+        """
+        Batch version of `decode_emv` (same results, same order).
+        Repeated payloads are CRC-checked and parsed once.
+        """
+        parsed: Dict[str, Tuple[bool, Dict[str, Any]]] = {}
+        results = []
+        for payload in payloads:
+            entry = parsed.get(payload)
+            if entry is None:
+                entry = parsed[payload] = (self._verify_crc16(payload), self._parse_tlv(payload))
+            crc_ok, data = entry
+            # Fresh copies of the nested dicts: callers get independent results
+            data = {tag: dict(value) if isinstance(value, dict) else value for tag, value in data.items()}
+            results.append(self._extract(payload, crc_ok, data))
+        return results
+
+    def _extract(self, payload: str, crc_ok: bool, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        if not crc_ok:
             self.add_evidence("Integridade", "CRC16 Inválido", "high")
             # We continue parsing even if CRC is bad, but flag it.
-            
-        data = self._parse_tlv(payload)
-        
+
         extracted = {
             "full_payload": payload,
             "beneficiary_name": data.get("59"),
@@ -86,7 +223,7 @@ class PixIntelligence(AnhangáModule):
         return extracted
 
     def _verify_crc16(self, payload: str) -> bool:
-        """Calculates CRC16-CCITT (0x1021)."""
+        """Calculates CRC16-CCITT (0x1021, init 0xFFFF) with the stdlib's table-driven crc_hqx."""
         try:
             if "6304" not in payload: return False
             
@@ -97,34 +234,44 @@ class PixIntelligence(AnhangáModule):
             
             if len(provided_crc) != 4: return False
             
-            crc16_func = crcmod.mkCrcFun(0x11021, initCrc=0xFFFF, rev=False, xorOut=0x0000)
-            calculated_crc = hex(crc16_func(data_to_check.encode('utf-8')))[2:].upper().zfill(4)
+            calculated_crc = f"{crc_hqx(data_to_check.encode('utf-8'), 0xFFFF):04X}"
             
             return calculated_crc == provided_crc.upper()
         except Exception:
             return False
 
-    def _parse_tlv(self, payload: str) -> Dict[str, Any]:
-        """Recursive TLV Parser."""
+    def _parse_tlv(self, payload: str, start: int = 0, end: Optional[int] = None) -> Dict[str, Any]:
+        """
+        TLV Parser. Walks `payload[start:end]` by index: nested templates (26/62)
+        are parsed in place instead of being sliced out first.
+        """
+        if end is None:
+            end = len(payload)
         data = {}
-        i = 0
-        while i < len(payload):
-            tag = payload[i:i+2]
+        i = start
+        while i < end:
+            tag = payload[i:min(i + 2, end)]
             i += 2
-            
-            try:
-                length = int(payload[i:i+2])
-            except ValueError:
-                break
+
+            # Fast path: two ASCII digits. Anything else goes through int() so odd
+            # inputs (" 5", "+1"...) behave exactly as before.
+            if i + 2 <= end and "0" <= payload[i] <= "9" and "0" <= payload[i + 1] <= "9":
+                length = (ord(payload[i]) - 48) * 10 + ord(payload[i + 1]) - 48
+            else:
+                try:
+                    length = int(payload[i:min(i + 2, end)])
+                except ValueError:
+                    break
+                # "-4" used to walk the cursor backwards forever
+                if length < 0:
+                    break
             i += 2
-            
-            value = payload[i:i+length]
-            i += length
-            
-            # Tags 26 (Merchant Account Info) and 62 (Additional Data Field) contain nested TLV
-            if tag in ["26", "62"]:
-                data[tag] = self._parse_tlv(value) 
+
+            value_end = max(i, min(i + length, end))
+            if tag in _NESTED_TAGS:
+                data[tag] = self._parse_tlv(payload, i, value_end)
             else:
-                data[tag] = value
-                
-        return data
\ No newline at end of file
+                data[tag] = payload[i:value_end]
+            i += length
+
+        return data
@@ -1,5 +1,5 @@
-import requests
 import json
+from anhanga.core.http import get_session
 
 class LaranjaHunter:
     def __init__(self):
@@ -12,7 +12,7 @@ class LaranjaHunter:
         cnpj = "".join(filter(str.isdigit, cnpj_raw))
         
         try:
-            response = requests.get(f"{self.base_url}/{cnpj}", timeout=10)
+            response = get_session().get(f"{self.base_url}/{cnpj}", timeout=10)
             
             if response.status_code == 200:
                 data = response.json()
@@ -1,6 +1,6 @@
-import requests
 import hashlib
 from anhanga.core.base import AnhangáModule
+from anhanga.core.http import get_session
 
 class IdentityModule(AnhangáModule):
     def __init__(self):
@@ -31,7 +31,7 @@ class IdentityModule(AnhangáModule):
             email_hash = hashlib.md5(email.lower().strip().encode('utf-8')).hexdigest()
             url = f"https://en.gravatar.com/{email_hash}.json"
             
-            r = requests.get(url, headers={'User-Agent': 'Anhangá-OSINT'}, timeout=5)
+            r = get_session().get(url, headers={'User-Agent': 'Anhangá-OSINT'}, timeout=5)
             if r.status_code == 200:
                 data = r.json()
                 entry = data['entry'][0]
@@ -56,7 +56,7 @@ class IdentityModule(AnhangáModule):
         try:
             url = f"https://spclient.wg.spotify.com/signup/public/v1/account?validate=1&email={email}"
             headers = {'User-Agent': 'Mozilla/5.0'}
-            r = requests.get(url, headers=headers, timeout=5)
+            r = get_session().get(url, headers=headers, timeout=5)
             
             if r.status_code == 200:
                 data = r.json()
@@ -69,7 +69,7 @@ class IdentityModule(AnhangáModule):
         """Tenta resolver o e-mail para um usuário Skype."""
         try:
             url = f"https://login.skype.com/json/validator?new_username={email}"
-            r = requests.get(url, timeout=5)
+            r = get_session().get(url, timeout=5)
             if r.status_code == 200:
                 data = r.json()
                 if data.get("status") == 406:
@@ -1,4 +1,4 @@
-import requests
+from anhanga.core.http import get_session
 from bs4 import BeautifulSoup
 import ollama
 
@@ -8,15 +8,20 @@ class ContractAnalyzer:
         if not self.url.startswith("http"):
             self.url = f"http://{self.url}"
 
-    def extract_text(self):
-        """Baixa o site e limpa o HTML para sobrar só o texto jurídico."""
+    def extract_text(self, html=None):
+        """
+        Limpa o HTML para sobrar só o texto jurídico.
+        Se `html` vier (ex: page artifacts da investigação), o site não é baixado de novo.
+        """
         headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64)'}
         try:
-            response = requests.get(self.url, headers=headers, timeout=10)
-            if response.status_code != 200:
-                return None
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
+            if html is None:
+                response = get_session().get(self.url, headers=headers, timeout=10)
+                if response.status_code != 200:
+                    return None
+                html = response.content
+
+            soup = BeautifulSoup(html, 'html.parser')
             
             for script in soup(["script", "style", "nav", "footer"]):
                 script.extract()
@@ -52,9 +57,9 @@ class ContractAnalyzer:
         except Exception as e:
             return f"Erro na IA: {str(e)}"
 
-    def analyze_legal_entity(self):
+    def analyze_legal_entity(self, html=None):
         """Envia o texto para o Ollama (Phi-3) extrair a capivara."""
-        text_content = self.extract_text()
+        text_content = self.extract_text(html)
         
         if not text_content:
             return {"erro": "Não foi possível ler o site."}
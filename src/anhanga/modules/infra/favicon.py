@@ -0,0 +1,104 @@
+# Arquivo: anhanga/modules/infra/favicon.py
+"""
+Favicon discovery + Shodan-style mmh3 hash.
+
+The icon <link> is found by scanning only the <link> tags (no full DOM parse), and
+hashes are memoized by content digest: white-label platforms serve the same icon
+bytes from thousands of domains. Per-URL results go through the EnrichmentCache
+("favicon" provider) so a sweep never downloads the same icon twice.
+"""
+import base64
+import codecs
+import hashlib
+import re
+import threading
+from html.parser import HTMLParser
+from typing import Any, Dict, Optional
+from urllib.parse import unquote_to_bytes, urljoin
+
+import mmh3
+
+from anhanga.core.http import get_http_client
+
+FETCH_TIMEOUT = 5
+_MAX_DIGESTS = 50_000
+
+_LINK_TAG_RE = re.compile(r"<link\b[^>]*>", re.IGNORECASE)
+
+_hash_by_digest: Dict[str, int] = {}
+_digest_lock = threading.Lock()
+
+
+class _TagAttrs(HTMLParser):
+    """Parses the attributes of a single tag (quoting, entities, case) like a browser would."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.attrs: Dict[str, Optional[str]] = {}
+
+    def handle_starttag(self, tag, attrs):
+        self.attrs = dict(attrs)
+
+
+def find_icon_href(html: str) -> Optional[str]:
+    """
+    href of the first <link> whose rel contains "icon" ("icon", "shortcut icon",
+    "apple-touch-icon"...). None if there is none, or if it has no href.
+    """
+    for m in _LINK_TAG_RE.finditer(html):
+        tag = m.group(0)
+        if "icon" not in tag.lower():
+            continue  # stylesheet / preload / canonical...
+        parser = _TagAttrs()
+        parser.feed(tag)
+        parser.close()
+        rel = (parser.attrs.get("rel") or "").lower()
+        if any("icon" in token for token in rel.split()):
+            href = (parser.attrs.get("href") or "").strip()
+            return href or None
+    return None
+
+
+def favicon_url(page_url: str, html: Optional[str]) -> str:
+    href = find_icon_href(html) if html else None
+    return urljoin(page_url, href or "/favicon.ico")
+
+
+def favicon_hash(content: bytes) -> Dict[str, Any]:
+    """Shodan's http.favicon.hash (mmh3 of the base64 body), memoized by sha256."""
+    digest = hashlib.sha256(content).hexdigest()
+    with _digest_lock:
+        hash_val = _hash_by_digest.get(digest)
+    if hash_val is None:
+        hash_val = mmh3.hash(codecs.encode(content, "base64"))
+        with _digest_lock:
+            if len(_hash_by_digest) >= _MAX_DIGESTS:
+                _hash_by_digest.clear()
+            _hash_by_digest[digest] = hash_val
+    return {"hash": hash_val, "sha256": digest, "size": len(content)}
+
+
+def _decode_data_uri(uri: str) -> Optional[bytes]:
+    header, sep, data = uri.partition(",")
+    if not sep:
+        return None
+    if header.endswith(";base64"):
+        return base64.b64decode(data)
+    return unquote_to_bytes(data)
+
+
+async def fetch_favicon(url: str, timeout: float = FETCH_TIMEOUT) -> Optional[Dict[str, Any]]:
+    """
+    Returns {"hash", "sha256", "size", "url"}, {"status": "not_found"} on 404,
+    or None for other answers (not cached).
+    """
+    if url.startswith("data:"):
+        content = _decode_data_uri(url)
+        return dict(favicon_hash(content), url="data:") if content else None
+
+    r = await get_http_client().get(url, verify=False, timeout=timeout)
+    if r.status_code == 200 and r.content:
+        return dict(favicon_hash(r.content), url=url)
+    if r.status_code == 404:
+        return {"status": "not_found"}
+    return None
@@ -1,19 +1,48 @@
 # Arquivo: anhanga/modules/infra/hunter.py
 import re
-import socket
-import requests
-import mmh3
-import codecs
+import asyncio
+from typing import Any, Dict, Optional
 from urllib.parse import urlparse
-from bs4 import BeautifulSoup
 from anhanga.core.base import AnhangáModule
 from anhanga.core.config import ConfigManager
+from anhanga.core.dns import get_resolver
+from anhanga.core.http import DEFAULT_USER_AGENT, close_http_client, get_http_client
+from anhanga.core.metrics import OUTCOME_THROTTLED, track_call
+from anhanga.core.page import page_html
+from anhanga.core.ratelimit import RateLimitError, get_rate_limiter
+from anhanga.modules.infra.favicon import favicon_url, fetch_favicon
+from anhanga.modules.infra.providers import is_not_found
 
 import urllib3
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
+# --- Dirty Scraper: one combined scanner, compiled once ---
+# Every branch fails fast on unrelated text, so a single finditer pass stays linear
+# even on minified JS / long digit blobs:
+#  - e-mails only start at the beginning of a local-part run (lookbehind), so a long
+#    alphanumeric blob is scanned once instead of once per position;
+#  - phones need a DDD and can't touch other digits (lookarounds), so a digit run
+#    that isn't exactly a phone number is rejected right away.
+_DIRTY_RE = re.compile(
+    r"(?P<email>(?<![a-zA-Z0-9._%+-])[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,6})"
+    r"|(?P<ua>UA-[0-9]+-[0-9]+)"
+    r"|(?P<gtag>G-[A-Z0-9]{10,})"
+    r"|fbq\('init',\s*'(?P<pixel>[0-9]+)'\)"
+    r"|(?P<phone>(?<![0-9+])(?:(?:\+|00)?55\s?)?\(?(?P<ddd>[1-9][0-9])\)?\s?"
+    r"(?P<prefix>(?:9[0-9]|[2-9])[0-9]{3})-?(?P<line>[0-9]{4})(?![0-9]))"
+)
+
+# Evidence labels, in report order
+DIRTY_LABELS = {
+    "ua": "Google Analytics (UA)",
+    "gtag": "Google Tag (G-)",
+    "pixel": "Meta Pixel",
+    "email": "E-mails",
+    "phone": "Telefones (BR)",
+}
+
 class InfraModule(AnhangáModule):
-    def __init__(self):
+    def __init__(self, cache=None):
         super().__init__()
         self.meta = {
             "name": "InfraHunter v2",
@@ -21,47 +50,97 @@ class InfraModule(AnhangáModule):
             "version": "2.0"
         }
         self.cfg = ConfigManager()
+        self.cache = cache  # Optional CacheView (core/cache.py) for paid lookups
 
     def run(self, url: str) -> bool:
+        """
+        Executa o pipeline completo de infraestrutura (wrapper síncrono de `run_async`).
+        """
+        async def _runner():
+            try:
+                return await self.run_async(url)
+            finally:
+                await close_http_client()
+
+        return asyncio.run(_runner())
+
+    async def run_async(self, url: str, page: Optional[Dict[str, Any]] = None) -> bool:
         """
         Executa o pipeline completo de infraestrutura.
+        As requisições usam o cliente HTTP compartilhado (core/http.py): conexões
+        keep-alive são reaproveitadas entre módulos e investigações.
+        `page`: artefatos já baixados (core/page.py) -> o HTML não é baixado de novo.
         """
         if not url.startswith("http"):
             target_url = f"https://{url}"
         else:
             target_url = url
         
-        domain = urlparse(target_url).netloc
+        domain = urlparse(target_url).hostname or ""
         
+        tasks = []
         try:
-            ip = self._resolve_ip(domain)
-            self.add_evidence("Endereço IP", ip, "high")
+            # DNS and the page download don't depend on each other
+            ip_task = asyncio.ensure_future(self._resolve_ip(domain))
+            if page is not None:
+                html_task = asyncio.ensure_future(self._page_html(page))
+                target_url = page.get("final_url") or target_url
+            else:
+                html_task = asyncio.ensure_future(self._fetch_html(target_url))
+            tasks = [ip_task, html_task]
+
+            record = await ip_task
+            ips = record["addresses"]
+            self.add_evidence("Endereço IP", ", ".join(ips) or "N/A", "high")
+            if record["cname"]:
+                self.add_evidence("CNAME", " -> ".join(record["cname"]), "medium")
+
+            # VT reputation only needs the IP: overlap it with the HTML/favicon work
+            vt_task = None
+            vt_key = self.cfg.get_key("virustotal")
+            if vt_key and ips:
+                vt_task = asyncio.ensure_future(self._check_virustotal(ips[0], vt_key))
+                tasks.append(vt_task)
 
-            html_content = self._fetch_html(target_url)
+            html_content = await html_task
             if html_content:
-                self._dirty_scrape(html_content)
-                self._get_favicon_hash(target_url, html_content)
-            
-            vt_key = self.cfg.get_key("virustotal")
-            if vt_key and ip != "N/A":
-                self._check_virustotal(ip, vt_key)
+                # CPU-bound scan: keep it off the event loop
+                await asyncio.to_thread(self._dirty_scrape, html_content)
+                await self._get_favicon_hash(target_url, html_content)
+
+            if vt_task:
+                await vt_task
 
             return True
 
         except Exception as e:
             self.add_evidence("Erro de Execução", str(e), "low")
             return False
-
-    def _resolve_ip(self, domain):
-        try:
-            return socket.gethostbyname(domain)
-        except:
-            return "N/A"
-
-    def _fetch_html(self, url):
+        finally:
+            # Timeouts/cancellation of run_async must not leave requests running
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def _resolve_ip(self, domain):
+        """Todos os registros A/AAAA + cadeia CNAME (core/dns.py, com cache por TTL)."""
+        with track_call("dns") as tracked:
+            record = await get_resolver().resolve(domain)
+            if record["status"] != "ok":
+                tracked.outcome = record["status"]
+        if record["status"] == "error":
+            self.add_evidence("Erro de DNS", record.get("error", "falha na resolução"), "low")
+        return record
+
+    async def _page_html(self, page):
+        if page.get("fetch_error"):
+            self.add_evidence("Erro de Conexão", f"Site inacessível: {page['fetch_error']}", "medium")
+        return await asyncio.to_thread(page_html, page)  # blob read + decompress
+
+    async def _fetch_html(self, url):
         try:
-            headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
-            r = requests.get(url, headers=headers, verify=False, timeout=10)
+            headers = {'User-Agent': DEFAULT_USER_AGENT}
+            r = await get_http_client().get(url, headers=headers, verify=False, timeout=10)
             return r.text
         except Exception as e:
             self.add_evidence("Erro de Conexão", f"Site inacessível: {str(e)}", "medium")
@@ -70,63 +149,82 @@ class InfraModule(AnhangáModule):
     def _dirty_scrape(self, html):
         """
         O 'Dirty Scraper': Usa Regex para achar agulha no palheiro.
-        Inspirado no STRX.
+        Inspirado no STRX. Uma única passada (_DIRTY_RE) coleta todas as classes.
         """
-        patterns = {
-            "Google Analytics (UA)": r"UA-[0-9]+-[0-9]+",
-            "Google Tag (G-)": r"G-[A-Z0-9]{10,}",
-            "Meta Pixel": r"fbq\('init',\s*'([0-9]+)'\)",
-            "E-mails": r"[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,6}",
-            "Telefones (BR)": r"(?:(?:\+|00)?(55)\s?)?(?:\(?([1-9][0-9])\)?\s?)?(?:((?:9\d|[2-9])\d{3})\-?(\d{4}))"
-        }
+        found = {kind: {} for kind in DIRTY_LABELS}  # dicts as ordered sets
 
-        found_tech = []
+        for m in _DIRTY_RE.finditer(html):
+            kind = m.lastgroup
+            if kind == "phone":
+                found["phone"][f"{m.group('ddd')} {m.group('prefix')}-{m.group('line')}"] = None
+            else:
+                found[kind][m.group(kind)] = None
 
-        for label, pattern in patterns.items():
-            matches = list(set(re.findall(pattern, html)))
+        found_tech = []
+        for kind, label in DIRTY_LABELS.items():
+            matches = list(found[kind])
             if matches:
-                if "Telefone" in label:
-                    matches = [f"{m[1]} {m[2]}-{m[3]}" for m in matches if m[1]]
-
-                if matches:
-                    self.add_evidence(f"Scraping: {label}", ", ".join(matches[:5]), "high")
-                    found_tech.append(label)
+                self.add_evidence(f"Scraping: {label}", ", ".join(matches[:5]), "high")
+                found_tech.append(label)
 
         if not found_tech:
             self.add_evidence("Scraping", "Nenhum identificador oculto encontrado.", "low")
 
-    def _get_favicon_hash(self, url, html):
-        """Calcula o Hash do ícone para buscar servidores reais no Shodan."""
+    async def _get_favicon_hash(self, url, html):
+        """
+        Calcula o Hash do ícone para buscar servidores reais no Shodan.
+        O resultado fica em cache por URL do ícone (e o mmh3 por digest do conteúdo).
+        """
         try:
-            soup = BeautifulSoup(html, 'html.parser')
-            icon_link = soup.find("link", rel=lambda x: x and 'icon' in x.lower())
-            
-            favicon_url = f"{url}/favicon.ico"
-            if icon_link and icon_link.get('href'):
-                href = icon_link.get('href')
-                if href.startswith("http"): favicon_url = href
-                else: favicon_url = f"{url.rstrip('/')}/{href.lstrip('/')}"
-
-            r = requests.get(favicon_url, verify=False, timeout=5)
-            if r.status_code == 200:
-                favicon_base64 = codecs.encode(r.content, 'base64')
-                hash_val = mmh3.hash(favicon_base64)
+            icon_url = favicon_url(url, html)
+            fetch = lambda: fetch_favicon(icon_url)
+            with track_call("favicon"):
+                if self.cache and not icon_url.startswith("data:"):
+                    info = await self.cache.aget_or_fetch("favicon", icon_url, fetch, is_not_found)
+                else:
+                    info = await fetch()
+
+            if info and info.get("status") != "not_found":
+                hash_val = info["hash"]
                 self.add_evidence("Favicon Hash", str(hash_val), "high")
                 self.add_evidence("Shodan Dork", f"http.favicon.hash:{hash_val}", "high")
-        except:
+        except Exception:
             pass
 
-    def _check_virustotal(self, ip, key):
+    async def _check_virustotal(self, ip, key):
         """Consulta rápida de reputação (Free API)."""
         try:
-            headers = {"x-apikey": key}
-            r = requests.get(f"https://www.virustotal.com/api/v3/ip_addresses/{ip}", headers=headers, timeout=5)
-            if r.status_code == 200:
-                stats = r.json().get('data', {}).get('attributes', {}).get('last_analysis_stats', {})
+            fetch = lambda: self._query_virustotal_ip(ip, key)
+            with track_call("virustotal_ip") as tracked:
+                try:
+                    if self.cache:
+                        stats = await self.cache.aget_or_fetch("virustotal_ip", ip, fetch, is_not_found)
+                    else:
+                        stats = await fetch()
+                except RateLimitError as e:
+                    # Quota esgotada / 429 persistente: a consulta não foi feita.
+                    # Título próprio: "VirusTotal" é o veredito do IP (infra_data["virustotal_ip"])
+                    tracked.outcome = OUTCOME_THROTTLED
+                    self.add_evidence("VirusTotal (IP)", f"Consulta não realizada: {e}", "low")
+                    return
+
+            if stats and stats.get("status") != "not_found":
                 malicious = stats.get('malicious', 0)
                 if malicious > 0:
                     self.add_evidence("VirusTotal", f"⚠️ DETECTADO como malicioso por {malicious} motores.", "high")
                 else:
                     self.add_evidence("VirusTotal", "✅ IP Limpo (0 detecções).", "medium")
-        except:
-            pass
\ No newline at end of file
+        except Exception:
+            pass
+
+    async def _query_virustotal_ip(self, ip, key):
+        headers = {"x-apikey": key}
+        # Same key (and quota) as the URL lookups of the engine
+        r = await get_rate_limiter().request("virustotal_ip", lambda: get_http_client().get(
+            f"https://www.virustotal.com/api/v3/ip_addresses/{ip}", headers=headers, timeout=5,
+        ))
+        if r.status_code == 200:
+            return r.json().get('data', {}).get('attributes', {}).get('last_analysis_stats', {})
+        if r.status_code == 404:
+            return {"status": "not_found"}
+        return None
\ No newline at end of file
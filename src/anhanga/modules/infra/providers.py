@@ -0,0 +1,110 @@
+# Arquivo: anhanga/modules/infra/providers.py
+"""
+External enrichment providers (Whois, Shodan, VirusTotal, URLScan).
+
+Whois/Shodan wrap blocking libraries; the HTTP APIs are coroutines on the shared
+client (core/http.py). Every call goes through the rate limiter (core/ratelimit.py:
+per-provider buckets, quotas, 429 backoff). Each returns structured data or raises;
+the engine decides how to run them (concurrently, with per-provider timeouts).
+"""
+import base64
+from typing import Any, Dict, Optional
+
+from anhanga.core.blobs import get_blob_store
+from anhanga.core.config import ConfigManager
+from anhanga.core.http import get_http_client
+from anhanga.core.ratelimit import get_rate_limiter
+
+try:
+    import whois
+except ImportError:
+    whois = None
+try:
+    import shodan
+except ImportError:
+    shodan = None
+
+# Seconds each provider may take before the engine gives up on it.
+# Override per provider with a "provider_timeouts" block in config.json.
+PROVIDER_TIMEOUTS = {
+    "infra": 30,
+    "whois": 15,
+    "shodan": 15,
+    "virustotal": 15,
+    "urlscan": 15,
+}
+
+
+def provider_timeout(name: str, cfg: Optional[ConfigManager] = None) -> float:
+    overrides = (cfg or ConfigManager()).get("provider_timeouts") or {}
+    return float(overrides.get(name, PROVIDER_TIMEOUTS.get(name, 15)))
+
+
+def extract_domain(url: str) -> str:
+    # Robust extraction: remove protocol and path
+    return url.split("//")[-1].split("/")[0]
+
+
+def is_not_found(result: Any) -> bool:
+    """Negative answers (404 / unknown host) are cached with a shorter TTL."""
+    return isinstance(result, dict) and result.get("status") == "not_found"
+
+
+def lookup_whois(domain: str) -> Dict[str, Any]:
+    if whois is None:
+        raise RuntimeError("python-whois not installed")
+    w = get_rate_limiter().call_sync("whois", lambda: whois.whois(domain))
+    return {
+        "registrar": w.registrar,
+        "creation_date": str(w.creation_date[0] if isinstance(w.creation_date, list) else w.creation_date),
+        "org": w.org
+    }
+
+
+def lookup_shodan(ip: str, key: str) -> Dict[str, Any]:
+    if shodan is None:
+        raise RuntimeError("shodan library not installed")
+    api = shodan.Shodan(key)
+    try:
+        host = get_rate_limiter().call_sync("shodan", lambda: api.host(ip))
+    except shodan.APIError as e:
+        # Shodan answers unknown hosts with an error; treat it as a cacheable "not found"
+        if "No information available" in str(e):
+            return {"ports": [], "org": None, "tags": [], "vulns": [], "status": "not_found"}
+        raise
+    return {
+        "ports": host.get("ports", []),
+        "org": host.get("org", "Unknown"),
+        "tags": host.get("tags", []),
+        "vulns": list(host.get("vulns", [])),
+        "raw": get_blob_store().put_json(host),  # full host record (banners...) kept out of the state
+    }
+
+
+async def lookup_virustotal_url(url: str, key: str, timeout: float = 15) -> Optional[Dict[str, Any]]:
+    """Returns last_analysis_stats, {"status": "not_found"} or None for other responses."""
+    # VT requires base64 URL ID (urlsafe, no padding)
+    url_id = base64.urlsafe_b64encode(url.encode()).decode().strip("=")
+    headers = {"x-apikey": key}
+
+    res = await get_rate_limiter().request("virustotal", lambda: get_http_client().get(
+        f"https://www.virustotal.com/api/v3/urls/{url_id}", headers=headers, timeout=timeout,
+    ))
+    if res.status_code == 200:
+        return res.json().get("data", {}).get("attributes", {}).get("last_analysis_stats", {})
+    if res.status_code == 404:
+        # URL not found in VT
+        return {"status": "not_found"}
+    return None
+
+
+async def submit_urlscan(url: str, key: str, timeout: float = 15) -> Optional[str]:
+    """Submits a public scan and returns the report URL (None if the submission was refused)."""
+    headers = {'API-Key': key, 'Content-Type': 'application/json'}
+    data = {"url": url, "visibility": "public"}
+    res = await get_rate_limiter().request("urlscan", lambda: get_http_client().post(
+        'https://urlscan.io/api/v1/scan/', headers=headers, json=data, timeout=timeout,
+    ))
+    if res.status_code == 200:
+        return res.json().get("result", "N/A")
+    return None
@@ -2,6 +2,8 @@ import ollama
 import json
 from datetime import datetime
 
+from anhanga.core.blobs import get_blob_store, is_blob_handle
+
 class AIReporter:
     def __init__(self):
         self.model = "phi3"  
@@ -40,8 +42,28 @@ class AIReporter:
         except Exception as e:
             return f"Erro ao gerar relatório com IA: {str(e)}"
 
-    def save_report(self, text):
+    def save_report(self, text, evidence=None):
+        """
+        `evidence`: {rótulo: handle do blob store}. Os arquivos só são localizados aqui,
+        e o SHA-256 do handle entra no dossiê como prova de integridade.
+        """
         filename = f"DOSSIE_FINAL_{datetime.now().strftime('%Y%m%d_%H%M')}.md"
         with open(filename, 'w', encoding='utf-8') as f:
             f.write(f"# RELATÓRIO DE INTELIGÊNCIA ANHANGÁ\n\n{text}")
-        return filename
\ No newline at end of file
+            appendix = self._evidence_appendix(evidence or {})
+            if appendix:
+                f.write(appendix)
+        return filename
+
+    def _evidence_appendix(self, evidence):
+        lines = []
+        store = get_blob_store()
+        for label, handle in evidence.items():
+            if not is_blob_handle(handle):
+                continue
+            path = store.path(handle) or "(arquivo ausente)"
+            digest = handle.split(":", 1)[1].split(".", 1)[0]
+            lines.append(f"- **{label}**: `{path}` (SHA-256 `{digest}`)")
+        if not lines:
+            return ""
+        return "\n\n## EVIDÊNCIAS COLETADAS\n\n" + "\n".join(lines) + "\n"
\ No newline at end of file